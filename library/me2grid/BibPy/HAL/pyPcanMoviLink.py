@@ -12,10 +12,10 @@ import ctypes, ctypes.util
 from ctypes import CFUNCTYPE
 import threading
 
-try:
-    from .pyCanPort import pyCanPort, stCanMsg
-except:
-  from pyCanPort import pyCanPort, stCanMsg
+if __package__:
+    from me2grid.BibPy.HAL.pyCanPort import pyCanPort, stCanMsg
+else: # Necessary, to run this file directly
+    from pyCanPort import pyCanPort, stCanMsg
     
 from time import sleep
 
@@ -31,10 +31,10 @@ Note
 
 _all_ = ['COB', 'NMT_Command', 'Result', 'CanOpenMsg', 'uCanMsg', 'CanOpenNetwork']
 
-try:
-    from .HAL.pyCanPort import pyCanPort, stCanMsg
-except:
-    from BibPy.HAL.pyCanPort import pyCanPort, stCanMsg
+if __package__:
+    from me2grid.BibPy.HAL.pyCanPort import pyCanPort, stCanMsg
+else: # Necessary, to run this file directly
+    from HAL.pyCanPort import pyCanPort, stCanMsg
 from enum import IntEnum
 from ctypes import Structure, Union, c_ubyte, c_ushort, c_ulong
 import time
@@ -41,10 +41,10 @@ Attributes
 
 
 """
-try:
-    from .canopen import pyCANopen
-    from .node import CanOpenNode, ObjGeneric
-except:
+if __package__:
+    from me2grid.BibPy.canopen import pyCANopen
+    from me2grid.BibPy.node import CanOpenNode, ObjGeneric
+else: # Necessary, to run this file directly
     from canopen import pyCANopen
     from node import CanOpenNode, ObjGeneric
         
@@ -15,10 +15,10 @@ The implementation is inspired by the class Vector(tuple) from the autor 'tobal'
 
 import math
 
-try:   # Necessary, for direct module execution
-    from mathext import norm
-except:
+if __package__:
     from me2grid.BibPy.mathlib.mathext import norm
+else:   # Necessary, for direct module execution
+    from mathext import norm
     
 class Spherical():
     """! @brief Vector within spherical coordinates in radians (see math.radians(degreeAngle) and math.degree(radiansAngle))
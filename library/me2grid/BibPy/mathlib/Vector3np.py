@@ -6,10 +6,10 @@
 
 import numpy
 
-try: # Necessary, to run this file directly
+if __package__:
+    from me2grid.BibPy.mathlib.Vector3 import BaseVector3, Vector3
+else: # Necessary, to run this file directly
     from Vector3 import BaseVector3, Vector3
-except:
-    from me2grid.BibPy.math.Vector3 import Vector3
 
 class Vector3np(numpy.array):
     """! @brief A cartesian three dimensional vector based on 'numpy.array'
@@ -38,10 +38,10 @@ Attributes
 
 
         
-try:
-    from .canopen import pyCANopen, NMT_Command, Result
-except:
-   from canopen import pyCANopen, NMT_Command, Result        
+if __package__:
+    from me2grid.BibPy.canopen import pyCANopen, NMT_Command, Result
+else: # Necessary, to run this file directly
+    from canopen import pyCANopen, NMT_Command, Result
 from enum import IntEnum
 import time
     
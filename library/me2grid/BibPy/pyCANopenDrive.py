@@ -41,11 +41,11 @@ Attributes
 
 
 """
-try:
-    from .canopen import pyCANopen
-    from .pyDrive import pyDrive
-    from .node import CanOpenNode, ObjGeneric
-except:
+if __package__:
+    from me2grid.BibPy.canopen import pyCANopen
+    from me2grid.BibPy.pyDrive import pyDrive
+    from me2grid.BibPy.node import CanOpenNode, ObjGeneric
+else: # Necessary, to run this file directly
     from canopen import pyCANopen
     from pyDrive import pyDrive
     from node import CanOpenNode, ObjGeneric
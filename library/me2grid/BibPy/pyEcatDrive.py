@@ -5,10 +5,10 @@ This class uses parameter access, only.
 """
 
 
-try:
+if __package__:
+    from me2grid.BibPy.pyDrive import pyDrive
+else: # Necessary, to run this file directly
     from pyDrive import pyDrive
-except:
-    from BibPy.pyDrive import pyDrive
 
 from enum import Enum, IntEnum
     
@@ -3,12 +3,12 @@
 The pyMoviLinkDrive object describes a drive using the Movi Link protocol to be controlled
 """
 
-try:
+if __package__:
+    from me2grid.BibPy.pyDrive import pyDrive
+    from me2grid.BibPy.HAL.pyPcanMoviLink import pyPCan, pyMoviLink, pyCanPort
+else: # Necessary, to run this file directly
     from pyDrive import pyDrive
     from HAL.pyPcanMoviLink import pyPCan, pyMoviLink, pyCanPort
-except:
-    from BibPy.pyDrive import pyDrive
-    from BibPy.HAL.pyPcanMoviLink import pyPCan, pyMoviLink, pyCanPort
 
 _all_ = ['pyMoviLinkDrive']
 
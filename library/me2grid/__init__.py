@@ -0,0 +1,42 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  __init__.py
+
+@brief The me2grid package loading its subpackages on first use
+
+Importing 'me2grid' loads nothing but this file. The subpackages are imported when first accessed as attribute
+(PEP 562), e.g. 'me2grid.easybleak' imports the Bluetooth stack (bleak), 'me2grid.BibPy' does not. Thus tools only
+parsing configurations or doing CANopen work do not pay the startup of the Bluetooth stack.
+
+@code{.py}
+import me2grid
+import me2grid.BibPy.canopen             # bleak is not loaded
+from me2grid.devices import SensorTag   # loads bleak and the easybleak stack
+@endcode
+
+Subpackages of 'me2grid' installed at other locations of the search path, e.g. 'me2grid.smarthome', are merged into
+this package as by pkgutil.extend_path. The path is extended without pkgutil, whose import costs more than this package.
+"""
+
+import importlib
+import os
+import sys
+
+__path__ = list(__path__)
+for __directory in (os.path.abspath(os.path.join(entry, __name__)) for entry in sys.path if isinstance(entry, str)):
+    if __directory not in __path__ and os.path.isdir(__directory):
+        __path__.append(__directory)
+del __directory
+
+__subpackages__ = ("BibPy", "devices", "easybleak", "network")
+"""! Subpackages imported on first attribute access """
+
+def __getattr__(name: str):
+    """! @brief Imports the subpackage on first access (PEP 562) """
+    if name in __subpackages__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__subpackages__))
@@ -0,0 +1,37 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  __init__.py
+
+@brief The device classes loading their module, and with it the Bluetooth stack, on first use (PEP 562)
+
+@code{.py}
+from me2grid.devices import SensorTag, CC_RT_BLE
+@endcode
+"""
+
+import importlib
+
+__exports__ = {
+    "eq3":               ("CC_RT_BLE",),
+    "texas_instruments": ("SensorTag", "sensorTagServices"),
+    "simulated":         ("SimulatedSensorTag", "SimulatedValve"),
+}
+"""! Module name -> names exported by the package """
+
+__origin__ = {name: module for module, names in __exports__.items() for name in names}
+
+__all__ = sorted(__origin__)
+
+def __getattr__(name: str):
+    """! @brief Imports the module of the name on first access and memorizes the name in the package (PEP 562) """
+    if name in __origin__:
+        value = getattr(importlib.import_module(f"{__name__}.{__origin__[name]}"), name)
+        globals()[name] = value
+        return value
+    if name in __exports__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__origin__) | set(__exports__))
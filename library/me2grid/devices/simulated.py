@@ -0,0 +1,204 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  simulated.py
+
+@brief Simulated devices for the in-memory bleak backend \ref easybleak.simulation
+
+The profiles reproduce the GATT tables and the behavior of the devices supported by this package, thus applications and
+benchmarks run without hardware. They are kept apart from the device modules, which do not load the simulation.
+
+@code{.py}
+from me2grid.devices import SensorTag, SimulatedSensorTag
+from me2grid.easybleak.simulation import SimulatedBleakClient, register
+
+register(SimulatedSensorTag("54:6C:0E:00:00:01", latency=0.02))
+tag = SensorTag("54:6C:0E:00:00:01", backend=SimulatedBleakClient)
+@endcode
+"""
+
+import asyncio
+import struct
+import time
+
+from typing import Union
+
+from me2grid.easybleak.gatt import BaseService
+from me2grid.easybleak.gatt_services import DeviceInformationService
+from me2grid.easybleak.simulation import SimulatedPeripheral
+from me2grid.devices.eq3 import CC_RT_BLE, RequestService
+from me2grid.devices.texas_instruments import (IrTemperatureSensor, HumiditySensor, BarometricPressureSensor, MotionSensor, OpticalSensor,
+                                               InputSensor, OutputActor, SensorActor, sensorTagServices)
+
+class SimulatedSensorTag(SimulatedPeripheral):
+    """! @brief Simulated CC2650 Sensor Tag providing the sensor services, see \ref easybleak.simulation
+        Enabled sensors deliver slightly varying samples when read and, if notifications are started, notify them
+        with the period of their PERIOD characteristic.
+        @code{.py}
+        register(SimulatedSensorTag("54:6C:0E:00:00:01", latency=0.02))
+        tag = SensorTag("54:6C:0E:00:00:01", backend=SimulatedBleakClient)
+        @endcode
+    """
+    __samples = {IrTemperatureSensor:       (struct.Struct("<HH"), (2000, 25 * 128)),
+                 HumiditySensor:            (struct.Struct("<HH"), (26000, 32768)),
+                 BarometricPressureSensor:  (struct.Struct("<HbHB"), (2150, 0, 101325 & 0xFFFF, 101325 >> 16)),
+                 MotionSensor:              (struct.Struct("<9h"), (10, -10, 5, 0, 0, 4096, 200, -200, 100)),
+                 OpticalSensor:             (struct.Struct("<H"), ((2 << 12) | 500,))}
+
+    def __init__(self, address: str, **link):
+        link.setdefault("name", "CC2650 SensorTag")
+        super().__init__(address, **link)
+        service = self.addService(DeviceInformationService.uuidService())
+        for characteristic, value in ((DeviceInformationService.MODEL, b"CC2650 SensorTag"), (DeviceInformationService.FIRMWARE, b"1.30 (Simulated)"),
+                                      (DeviceInformationService.MANUFACTURER, b"Texas Instruments")):
+            self.addCharacteristic(service, characteristic.uuid, ["read"], value)
+        for sensorService in sensorTagServices.values():
+            service = self.addService(sensorService.uuidService())
+            if sensorService is InputSensor:
+                self.addCharacteristic(service, sensorService.DATA.uuid, ["notify"], b"\x00")
+                continue
+            if sensorService is OutputActor:
+                self.addCharacteristic(service, sensorService.DATA.uuid, ["read", "write"], b"\x00")
+                self.addCharacteristic(service, sensorService.CONFIGURATION.uuid, ["read", "write"], b"\x00")
+                continue
+            size = self.__samples[sensorService][0].size
+            self.addCharacteristic(service, sensorService.DATA.uuid, ["read", "notify"], bytes(size), onRead=self.__onRead__)
+            self.addCharacteristic(service, sensorService.CONFIGURATION.uuid, ["read", "write"], bytes(2 if sensorService is MotionSensor else 1))
+            self.addCharacteristic(service, sensorService.PERIOD.uuid, ["read", "write"], b"\x64")
+        self.onSubscribe = self.__onSubscribe__
+        self.__timers = {}      # handle of a notifying DATA characteristic -> timer of its next sample
+
+    def __service__(self, characteristic) -> Union[BaseService, None]:
+        for sensorService in self.__samples:
+            if sensorService.DATA.uuid == characteristic.uuid:
+                return sensorService
+        return None
+
+    def sample(self, sensorService: BaseService) -> bytearray:
+        """! @brief Returns a sample of the DATA characteristic of an enabled sensor, zeros for a disabled one """
+        format, values = self.__samples[sensorService]
+        if not any(self.characteristic(sensorService.CONFIGURATION.uuid).value):
+            return bytearray(format.size)
+        varied = [v + self.random.randint(-2, 2) if isinstance(v, int) and v > 255 else v for v in values]
+        return bytearray(format.pack(*varied))
+
+    def __onRead__(self, peripheral, characteristic) -> bytearray:
+        return self.sample(self.__service__(characteristic))
+
+    def __onSubscribe__(self, peripheral, characteristic, enabled: bool):
+        sensorService = self.__service__(characteristic)
+        if sensorService is None:
+            return
+        timer = self.__timers.pop(characteristic.handle, None)
+        if timer is not None:
+            timer.cancel()
+        if enabled:
+            self.__schedule__(sensorService, characteristic, asyncio.get_running_loop())
+
+    def __schedule__(self, sensorService: BaseService, characteristic, loop):
+        """! @brief \b private Schedules the next notification of the sensor according to its PERIOD characteristic """
+        period = SensorActor._decodePeriodTime_(self.characteristic(sensorService.PERIOD.uuid).value)
+        self.__timers[characteristic.handle] = loop.call_later(period, self.__onPeriod__, sensorService, characteristic, loop)
+
+    def __onPeriod__(self, sensorService: BaseService, characteristic, loop):
+        if self.isSubscribed(characteristic):
+            self.notify(characteristic, self.sample(sensorService))
+            self.__schedule__(sensorService, characteristic, loop)
+        else:
+            self.__timers.pop(characteristic.handle, None)
+
+class SimulatedValve(SimulatedPeripheral):
+    """! @brief Simulated EQ3 valve implementing the command protocol of the 'RequestService', see \ref easybleak.simulation
+        Commands written to the COMMAND characteristic are answered by a notification of the RESPONSE characteristic.
+        Two known misbehaviors of the valve are reproduced:
+        - With 'unansweredAfterManual' set, switching to manual mode by command enters the state in which only the
+          serial number request (0x00) is answered. Switching to automatic mode leaves it. \n
+        - Notifications started again within 'settleTime' after stopping them are not delivered until restarted.
+        @code{.py}
+        register(SimulatedValve("00:1A:22:00:00:01", latency=0.03))
+        valve = CC_RT_BLE("00:1A:22:00:00:01", backend=SimulatedBleakClient)
+        @endcode
+    """
+    def __init__(self, address: str, serial: str = "OEQ0000001", unansweredAfterManual: bool = False, settleTime: float = CC_RT_BLE.notificationSettleTime, **link):
+        link.setdefault("name", "CC-RT-BLE")
+        super().__init__(address, **link)
+        self.serial = serial
+        self.unansweredAfterManual = unansweredAfterManual
+        self.settleTime = settleTime
+        self.modes = 0x08           # automatic mode, daylight saving time
+        self.valve = 0
+        self.targetTemperature = 20.0
+        self.timers = {day: bytearray(b'\x22\x90' + bytes(12)) for day in range(7)}
+        self.unanswered = False     #!> 'True' while commands except 0x00 are not answered
+        self.__muted = False        # notification restarted too early
+        self.__stopTime = None
+        service = self.addService(RequestService.uuidService())
+        self.addCharacteristic(service, RequestService.COMMAND.uuid, ["write"], onWrite=self.__onCommand__)
+        self.response = self.addCharacteristic(service, RequestService.RESPONSE.uuid, ["notify"])
+        self.onSubscribe = self.__onSubscribe__
+
+    def __onSubscribe__(self, peripheral, characteristic, enabled: bool):
+        if characteristic is not self.response:
+            return
+        if enabled:
+            self.__muted = self.__stopTime is not None and time.monotonic() - self.__stopTime < self.settleTime
+        else:
+            self.__stopTime = time.monotonic()
+
+    def __status__(self) -> bytearray:
+        return bytearray([0x02, 0x01, self.modes, self.valve, 0x04, int(self.targetTemperature * 2)])
+
+    def __onCommand__(self, peripheral, characteristic, data: bytearray):
+        opcode = data[0]
+        response = None
+        if opcode == 0x00:
+            response = bytearray([0x01, 0x78, 0x00, 0x00]) + bytearray(c + 0x30 for c in self.serial.encode("utf-8"))
+        elif opcode == 0x10:
+            self.timers[data[1]] = bytearray(data[2:16])
+            response = bytearray([0x02, 0x02, data[1]])
+        elif opcode == 0x20:
+            response = bytearray([0x21, data[1]]) + self.timers.get(data[1], bytearray(14))
+        else:
+            if opcode == 0x40:
+                manual = len(data) > 1 and (data[1] & 0x40) != 0
+                self.modes = (self.modes | int(CC_RT_BLE.Mode.MANUAL)) if manual else (self.modes & ~int(CC_RT_BLE.Mode.MANUAL))
+                self.unanswered = manual and self.unansweredAfterManual
+            elif opcode == 0x41:
+                self.targetTemperature = data[1] / 2
+            elif opcode == 0x43:
+                self.targetTemperature = 21.0
+            elif opcode == 0x44:
+                self.targetTemperature = 17.0
+            response = self.__status__()
+        if self.__muted or (self.unanswered and opcode != 0x00):
+            return
+        self.notify(self.response, response)
+
+if __name__ == "__main__":
+    from me2grid.devices.eq3 import CC_RT_BLE
+    from me2grid.devices.texas_instruments import MotionValues, OutputValues, SensorTag
+    from me2grid.easybleak.simulation import SimulatedBleakClient, register, unregister
+
+    print("Testing SimulatedSensorTag and SimulatedValve with their clients")
+    simulatedTag = SimulatedSensorTag("54:6C:0E:00:00:01", seed=1)
+    register(simulatedTag)
+    register(SimulatedValve("00:1A:22:00:00:01", seed=1))
+    tag = SensorTag("54:6C:0E:00:00:01", backend=SimulatedBleakClient)
+    valve = CC_RT_BLE("00:1A:22:00:00:01", backend=SimulatedBleakClient)
+    try:
+        tag.connect()
+        temperatures = tag.readSensor(IrTemperatureSensor)
+        print(f"IR temperatures: {temperatures}")
+        assert temperatures is not None
+        assert isinstance(tag.readSensor(MotionSensor), MotionValues)
+        tag.writeSensor(OutputActor, OutputValues(ledRed=True))     # Acknowledged, as the IO output supports no write command
+        assert simulatedTag.characteristic(OutputActor.DATA.uuid).value == b"\x01"
+        valve.connect()
+        valve.writeTargetTemperature(22.5)
+        assert valve.readTargetTemperature() == 22.5
+    finally:
+        tag.disconnect()
+        valve.disconnect()
+        unregister("54:6C:0E:00:00:01")
+        unregister("00:1A:22:00:00:01")
+    print("Ready")
@@ -23,6 +23,9 @@ client.disconnect()
 
 @endcode
 
+The client 'SensorTag' is defined in \ref texas_instruments_client and imported on its first access. The services and the
+sensor representations of this module are available without loading bleak.
+
 @section TI_ERR Error handling
 
 - bleak.exc.BleakError: Device with address 54:6C:0E:52:C7:84 was not found.
@@ -70,21 +73,13 @@ Viewing the code helped developing my SensorTag implementation concept.
 #import binascii
 #from datetime import datetime, timedelta
 
-import time
 import math 
+import struct
 from typing import Union
 from enum import Enum
 
-try: # Necessary, to run this file directly
-    from .easybleak.EasyBleakClient import EasyBleakClient
-    from .easybleak.ExtBleakClient import BaseService, CharacteristicType
-    from .easybleak.gatt import BLE_UUID, ClassServices
-    from .BibPy.mathlib.Vector3 import Vector3
-except:
-    from me2grid.easybleak.EasyBleakClient import EasyBleakClient
-    from me2grid.easybleak.ExtBleakClient import BaseService, CharacteristicType
-    from me2grid.easybleak.gatt import BLE_UUID, ClassServices
-    from me2grid.BibPy.mathlib.Vector3 import Vector3
+from me2grid.BibPy.mathlib.Vector3 import Vector3
+from me2grid.easybleak.gatt import BLE_UUID, BaseService, CharacteristicType, ClassServices
 
 # TI SensorTag specific predifined services
 def TI_UUID(val: int) -> str:
@@ -101,7 +96,7 @@ class IrTemperatureSensor(BaseService):
 
     @classmethod
     def uuidService(cls) -> str:
-        return TI_UUID(0xaa20)
+        return TI_UUID(0xaa00)
 
 class HumiditySensor(BaseService):
     """! @brief Service enumeration of characteristics within the 'Optical Sensor Service'
@@ -161,7 +156,7 @@ class InputSensor(BaseService):
 
 class OutputActor(BaseService):
     """! @brief Service enumeration of characteristics within the 'IO Service' """
-    DATA           = CharacteristicType(TI_UUID(0xaa65))  #!> IO output data: Remote CONFIGURATION -> bit0: LED1 red, bit1: LED2 green, bit2: buzzer ; Test CONFIGURATION (Error indication)-> bit0: IR temperature sensor, bit1: Humidity sensor, bit2: Optical sensor, bit3: Pressure sensor, bit4: MPU, bit5: Magnetometer, bit6: External Flash, bit7: Dev Pack
+    DATA           = CharacteristicType(TI_UUID(0xaa65), coalesce=True)  #!> IO output data (read and acknowledged write only): Remote CONFIGURATION -> bit0: LED1 red, bit1: LED2 green, bit2: buzzer ; Test CONFIGURATION (Error indication)-> bit0: IR temperature sensor, bit1: Humidity sensor, bit2: Optical sensor, bit3: Pressure sensor, bit4: MPU, bit5: Magnetometer, bit6: External Flash, bit7: Dev Pack
     CONFIGURATION  = CharacteristicType(TI_UUID(0xaa66))  #!> IO configuration: value -> 0: Application usage (Advertisiung blinking green and error indication red), 1: Remote usage (DATA characteristic controls the output), 2: Test usage (DATA characteristic deliveres self test result)
 
     @classmethod
@@ -234,6 +229,11 @@ class OutputValues():
             self.buzzer = True
         else:
             self.buzzer = False
+        return self
+
+    def toBytearray(self) -> bytearray:
+        """! brief Encodes the member variables to the data 'byte', members of value 'None' as unset bits """
+        return bytearray([(1 if self.ledRed else 0) | (2 if self.ledGreen else 0) | (4 if self.buzzer else 0)])
 
     def __str__(self):
         return (f"OutputValues(ledRed={self.ledRed}, ledGreen={self.ledGreen}, buzzer={self.buzzer})")
@@ -360,6 +360,7 @@ class SensorIrTemperature(SensorActor):
     Apoly = [1.0,      1.75e-3, -1.678e-5]
     Bpoly = [-2.94e-5, -5.7e-7,  4.63e-9]
     Cpoly = [0.0,      1.0,      13.4]
+    __format = struct.Struct("<HH")     # object voltage, ambient temperature
 
     def __init__(self):
         super().__init__(IrTemperatureSensor)
@@ -371,8 +372,7 @@ class SensorIrTemperature(SensorActor):
             @returns A tuple with targeted object temperature and the ambient temperature in °C
         """
         SensorActor._checkSize_(data, 4)
-        rawVobj = int.from_bytes(data[0:2], "little", signed=False)
-        rawTamb = int.from_bytes(data[2:4], "little", signed=False)
+        rawVobj, rawTamb = SensorIrTemperature.__format.unpack_from(data)
 
         tAmb = rawTamb / 128.0
         Vobj = 1.5625e-7 * rawVobj
@@ -390,6 +390,8 @@ class SensorIrTemperature(SensorActor):
         return coeffs[0] + (coeffs[1]*x) + (coeffs[2]*x*x)
 
 class SensorHumidity(SensorActor):
+    __format = struct.Struct("<2xH")    # temperature (unused), humidity
+
     def __init__(self):
         super().__init__(HumiditySensor)
         
@@ -401,9 +403,11 @@ class SensorHumidity(SensorActor):
             @returns A float value of the relative humidity in %RH
         """
         SensorActor._checkSize_(data, 4)
-        return self.__returnFromDecode__( float(int.from_bytes(data[2:4], "little", signed=False) / 65536 * 100) )
+        return self.__returnFromDecode__( float(SensorHumidity.__format.unpack_from(data)[0] / 65536 * 100) )
 
 class SensorBarometricPressure(SensorActor):
+    __format = struct.Struct("<HbHB")   # 24 bit values as low word and high byte: temperature (signed), pressure (unsigned)
+
     def __init__(self):
         super().__init__(BarometricPressureSensor)
         
@@ -415,12 +419,17 @@ class SensorBarometricPressure(SensorActor):
             @returns A tuple in the order of pressure and temperature. The values are of 'float' type.  The pressure is in hPa (1 hPa = 1 mbar), the temperature in °C.
         """
         SensorActor._checkSize_(data, 6)
-        temperature = int.from_bytes(data[0:3], "little", signed=True)  / 100
-        pressure    = int.from_bytes(data[3:6], "little", signed=False) / 100;
+        tLow, tHigh, pLow, pHigh = SensorBarometricPressure.__format.unpack_from(data)
+        temperature = (tLow + (tHigh << 16)) / 100
+        pressure    = (pLow + (pHigh << 16)) / 100
         return self.__returnFromDecode__( (float(pressure), float(temperature)) )
 
 class SensorMotion(SensorActor):
     """! @brief Motion sensor (including gyroscope, accelleration and magnetism) representation """
+    __format = struct.Struct("<9h")     # gyroscope x, y, z, acceleration x, y, z, magnetism x, y, z
+    __gyroScale = 250 / 32768
+    __magScale = 1000 / 32768
+
     def __init__(self):
         """! @brief Constructor
             The accelleration sensor, as part of the motion sensor, requires the value of the CONFIG characteristic for value calculation
@@ -436,10 +445,11 @@ class SensorMotion(SensorActor):
             @returns A 'MotionValues' instance implementing members 'gyroscope', 'accelleration' and 'magnetism' data, each as 'Vector3' having x,y and z properties.
         """
         SensorActor._checkSize_(data, 18)
+        rawGyrX, rawGyrY, rawGyrZ, rawAccX, rawAccY, rawAccZ, rawMagX, rawMagY, rawMagZ = SensorMotion.__format.unpack_from(data)
         # Gyroscope of motion sensor
-        gyrX = int.from_bytes(data[0:2], "little", signed=True)  / 32768 * 250
-        gyrY = int.from_bytes(data[2:4], "little", signed=True)  / 32768 * 250
-        gyrZ = int.from_bytes(data[4:6], "little", signed=True)  / 32768 * 250
+        gyrX = rawGyrX * SensorMotion.__gyroScale
+        gyrY = rawGyrY * SensorMotion.__gyroScale
+        gyrZ = rawGyrZ * SensorMotion.__gyroScale
         # Acceleration of motion sensor
         if config is None and self.config is None:
             # print('Config missing')
@@ -450,14 +460,14 @@ class SensorMotion(SensorActor):
             if self.config is None:
                 self.config = config
             SensorActor._checkSize_(self.config, 2)
-            scale = 2**(self.config[1] & 0x3 + 1)
-            accX = int.from_bytes(data[6:8], "little", signed=True)    / 32768 * scale
-            accY = int.from_bytes(data[8:10], "little", signed=True)   / 32768 * scale
-            accZ = int.from_bytes(data[10:12], "little", signed=True)  / 32768 * scale
+            scale = 2**(self.config[1] & 0x3 + 1) / 32768
+            accX = rawAccX * scale
+            accY = rawAccY * scale
+            accZ = rawAccZ * scale
         # Magnetism of motion sensor
-        magX = int.from_bytes(data[12:14], "little", signed=True)  / 32768 * 1000  
-        magY = int.from_bytes(data[14:16], "little", signed=True)  / 32768 * 1000
-        magZ = int.from_bytes(data[16:18], "little", signed=True)  / 32768 * 1000
+        magX = rawMagX * SensorMotion.__magScale
+        magY = rawMagY * SensorMotion.__magScale
+        magZ = rawMagZ * SensorMotion.__magScale
         # Result of motion sensor
         return self.__returnFromDecode__( MotionValues(gyrX, gyrY, gyrZ, accX, accY, accZ, magX, magY, magZ) )
 
@@ -475,6 +485,8 @@ class SensorMotion(SensorActor):
 
 class SensorOptical(SensorActor):
     """! @brief Optical sensor representation, measuring light intensity """
+    __format = struct.Struct("<H")      # mantissa (12 bit), exponent (4 bit)
+
     def __init__(self):
         super().__init__(OpticalSensor)
         
@@ -485,7 +497,7 @@ class SensorOptical(SensorActor):
             @returns A 'float' value in Lux
         """
         SensorActor._checkSize_(data, 2)
-        val = int.from_bytes(data[0:2], "little", signed=False)
+        val, = SensorOptical.__format.unpack_from(data)
         m = val & 0x0FFF;
         e = (val & 0xF000) >> 12;
         return self.__returnFromDecode__( float(m * (0.01 * 2**e)) )
@@ -575,204 +587,15 @@ class Sensors():
         raise ValueError(f"The requested service {service.name} is not a Sensor Tag service for reading from sensors!")
        
  
-class SensorTag(EasyBleakClient):
-    """! @brief Sensor Tag BLE client based on \ref EasyBleakClient """
-
-    __services__ : ClassServices = EasyBleakClient.createAppendedServices(sensorTagServices)
-
-    def __init__(self, mac: str):
-        super().__init__(mac)
-        self._sensors = Sensors()
-        self.lastException = None
-            
-    @staticmethod
-    def sensorServices() -> ClassServices:
-        """! @brief Returns a dictionary of SensorTag services, only
-            This method is equivalent to the 'gatt' property but contains less content. On the other hand, the delivered content
-            is appropriate for all application interfacing methods of this class. \n
-            The usage is e.g. SensorTag.services()["OpticalSensor"] .
-        """
-        return sensorTagServices
-    
-    def connect(self):
-        super().connect()
-        self.notifySensor(InputSensor, None)        
-        
-    def disconnect(self):
-        self.stopNotifySensor(InputSensor)        
-        super().disconnect()
-        
-    def readSensor(self, service: BaseService, noExceptions = True) -> Union[float, tuple, MotionValues, InputValues, OutputValues, None]:
-        """! @brief Reads from a service provided by the Sensor Tag
-            You can achieve the services by several ways:
-            - use the Sensor Tag class method services like e.g. SensorTag.services()["OpticalSensor"] . SensorTag.services() is a printable 'dict', from which you can receive all availabe sensor service names.
-            - Through import from this module e.g. import texas_instruments.OpticalSensor
-            - Through your Sensor Tag sensor representation instances property by e.g. using mySensorTag.sensors.sensorOptical.service
-            @param service The serivce of the sensor to be read from
-            @param noExceptions If 'True' the method captures all exceptions and in case of an exceptions stores the exception in its member 'lastException' and returns 'False'.
-            The returned value class type and its physical unit depend on the sensor service (all derived from 'BaseService') chosen:
-            - 'IrTemperaturesSensor' service
-            @returns A tuple in the order of targeted object temperature and the ambient temperature in °C
-            - 'HumiditySensor' service
-            @returns A float value of the relative humidity in %RH
-            - 'BarometricPressureSensor' service
-            @returns A tuple in the order of pressure and temperature. The values are of 'float' type. The pressure is in hPa (1 hPa = 1 mbar), the temperature in °C.
-            - 'MotionSensor' service
-            @returns A 'MotionValues' instance implementing the members 'gyroscope', 'accelleration' and 'magnetism' each of type 'Vector3' providing x,y and z properties as 'float'. Unit of the gyroscope is deg/s, of the accelleration is G and of the magnetism is uT.
-            - 'OpticalSensor' service
-            @returns A 'float' value in Lux
-            - 'InputSensor' service
-            @returns An 'InputValues' class representing 'userKey', 'powerKey' and 'reedRelai' digital values as 'bool' members
-            - 'OutputActor'
-            @returns An 'OutputValues' class representing 'ledRed', 'ledGreen' and 'buzzer' digital values as 'bool' members
-        """
-        sensor = self.__checkEnabled__(service)
-        data = self.read(service.DATA)
-        return sensor.decode(data)     
-    
-    def readAllSensors(self):
-        """! @brief Reads all sensor values, storing the result within this instance
-            The value can be accessed to by calling the 'getSensorValue' method.
-        """
-        for service in self.sensorServices().values():
-            if service is not InputSensor:
-                self.readSensor(service)
-        self.getNotifications()  # Acquiring input sensor notifications
-        
-    def writeSensor(self, service: BaseService, value: OutputValues):
-        """! @brief Writes to an actor service provided by the Sensor Tag
-            - 'OutputActor'
-            @param service The only actor service is 'me2grid.devices.texas_instruments.OutputActor'
-            @param data An object 'OutputValues' representing 'LEDred', 'LEDgreen', 'buzzer as bool members. Standard value of each member is None to indicate no change on that output.
-        """
-        sensor = self.__checkEnabled__(service)
-        if service is OutputActor:
-            prevdata = self.read(OutputActor.DATA)
-            data = sensor.encode(value, prevdata)
-        else:
-            data = sensor.encode(service, value)
-        self.write(service.DATA, data)
-        return
-
-    def getSensorValue(self, service: BaseService) -> Union[float, tuple, MotionValues, InputValues, OutputValues, None]:
-        """! @brief Returns the last memorized value from the passed sensor service
-            To return valid values the sensor must have been read using 'readSensor' or notifications must be enabled (with or without a notification handler).
-        """
-        sensor = self._sensors.find(service)
-        return sensor.value        
-        
-    def enableSensor(self, service: BaseService, enable: bool = True, waitTime: float = 1.5):
-        """! @brief Enables or disables the sensor according to 'service' to take measurements
-            @param service A sensor service, e.g. out of the 'dict' 'SensorTag.services'
-            @param enable 'True' to enable, 'False' to disable
-            @param waitTime Sensors require a start up time before valid measurements can be taken. If severel sensors are to be enalbled, wait time is only required after the last enable call.
-        """
-        if not self.is_connected:
-            self.connect()
-        sensor = self._sensors.find(service)
-        if service is not InputSensor:
-            cfg = sensor.enableCode(enable)
-            if sensor.service is OutputSensor:
-                self.write(sensor.service.DATA, 0)
-            self.write(service.CONFIGURATION, cfg)
-            if  service is MotionSensor:
-                sensor.config = cfg
-            time.sleep(waitTime)
-        
-    def enableAllSensors(self, enable: bool = True):
-        """! @brief Enables or disables all sensor of the Sensor Tag to take measurements
-            @param enable 'True' to enable, 'False' to disable
-        """
-        for sensor in self._sensors:
-            if sensor.service is not InputSensor:
-                cfg = sensor.enableCode(enable)
-                if sensor.service is OutputActor:
-                    self.write(sensor.service.DATA, b'\x00')
-                self.write(sensor.service.CONFIGURATION, cfg)
-                if  sensor.service is MotionSensor:
-                    sensor.config = cfg
-        time.sleep(1.5)
-        
-    def readSensorEnabled(self, service: BaseService) -> bool:
-        """! @brief Actually reads from the sensor to veryfy if it is enabled to take measurements
-            @param service A sensor service, e.g. out of the 'dict' 'SensorTag.services'
-            @returns 'bool' value indicating if the sensor is enabled
-        """
-        self.__checkEnabled__(service)
-        data = self.write(service.CONFIGURATION)
-        return (int(data) & int(disabledMask(service))) != 0
-
-    def isSensorEnabled(self, service: BaseService) -> bool:
-        """! @brief Reads from the memorized enabled state
-            @param service A sensor service, e.g. out of the 'dict' 'SensorTag.services'
-            @returns 'bool' value indicating if the sensor is enabled
-        """
-        sensor = self._sensors.find(service)
-        return sensor.enabled
-
-    def writeSensorPeriod(self, service: BaseService,  periodTime: float) -> bool:
-        """! @brief Sets the measurement period time for the sensor according to 'service' (ranges from 0.1s to 2.55s)
-            @returns 'bool' value indicating success
-        """
-        self.__checkEnabled__(service)
-        return self.write(service.PERIOD, SensorActor._codePeriodTime_(periodTime))
-
-    def readSensorPeriod(self, service: BaseService,  periodTime: float) -> bool:
-        """! @brief Sets the measurement period time for the sensor according to 'service' (ranges from 0.1s to 2.55s)
-            @returns 'bool' value indicating success
-        """
-        self.__checkEnabled__(service)
-        return SensorTag._decodePeriodTime(self.read(service.PERIOD))
-
-    def notifySensor(self, service: BaseService, notificationHandler = None) -> bool:
-        """! @brief Enales notifications from the passed sensor service and sets the appropriate notification handler
-            If 'None' is passed as 'notificationHandler' the notifications will be collected by the Sensor Tag client and received values are stored.
-            These values can be accessed using the method getSensor().
-            @param service A sensor service, e.g. out of the 'dict' 'SensorTag.services'
-            @param notificationHandler A method or function delegate accepting a single parameter of type Union[float, tuple, MotionValues, None] delivering the sensor value similar to the 'readSensor' method
-            @returns 'bool' value indicating success
-        """
-        sensor = self.__checkEnabled__(service)
-        if service is not InputSensor:
-            self.readSensor(service)    # in order to initialize the memorized sensor value (sensor.value) you access by calling getSensorValue()
-        self.start_notify(service.DATA, sensor._OnNotification_)
-        sensor._setNotificationHandler_(notificationHandler)
-               
-    def notifyAllSensors(self):
-        """! @brief Activates notifications from all sensors
-            Received notification values can be accessed by calling the 'getSensorValue' method.
-        """
-        for service in self.sensorServices().values():
-            if service is not InputSensor and service is not OutputActor:
-                self.notifySensor(service)
-        
-    def stopNotifySensor(self, service: BaseService):
-        """! @brief Disables notifications from the passed sensor service
-            @param service A sensor service, e.g. out of the 'dict' 'SensorTag.services'
-        """
-        sensor = self.__checkEnabled__(service)
-        if service is not InputSensor:
-            self.stop_notify(service.DATA)
-        sensor._setNotificationHandler_(None)
-        return
-   
-    def stopNotifyAllSensors(self):
-        """! @brief Deactivates notifications from all sensors
-        """
-        for service in self.sensorServices().values():
-            if service is not InputSensor and service is not OutputActor:
-                self.stopNotifySensor(service)
-        
-    def __checkEnabled__(self, service) -> SensorActor:
-        """! @brief Checks, whether the device is connected and the passed service already has been enabled and returns the corresponding 'SensorActor' instance """ 
-        if not self.is_connected:
-            self.connect()
-        sensor = self._sensors.find(service)
-        if not sensor.isEnabled:
-            if service is OutputActor:
-                self.write_gatt_char(OutputActor.DATA.uuid, b'\x00')
-            self.enableSensor(service)
-        return sensor
+def __getattr__(name: str):
+    """! @brief Imports the \ref texas_instruments_client.SensorTag client, and with it 'bleak', on first access (PEP 562)
+        The services and sensor representations of this module are available without the Bluetooth stack.
+    """
+    if name == "SensorTag":
+        from me2grid.devices.texas_instruments_client import SensorTag
+        globals()[name] = SensorTag
+        return SensorTag
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def programGettingStarted():
     from me2grid.devices.texas_instruments import SensorTag
@@ -0,0 +1,236 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  texas_instruments_client.py
+
+@brief SensorTag client object based on 'bleak' library
+
+The client is imported on first access of 'texas_instruments.SensorTag', thus importing the services and sensor
+representations of \ref texas_instruments does not load the Bluetooth stack. See \ref texas_instruments for the usage.
+"""
+
+import time
+from typing import Union
+
+from me2grid.easybleak.EasyBleakClient import EasyBleakClient
+from me2grid.easybleak.gatt import BaseService, ClassServices
+from me2grid.devices.texas_instruments import (MotionSensor, InputSensor, OutputActor, sensorTagServices, MotionValues, OutputValues,
+                                               InputValues, SensorActor, Sensors)
+
+class SensorTag(EasyBleakClient):
+    """! @brief Sensor Tag BLE client based on \ref EasyBleakClient """
+
+    __services__ : ClassServices = EasyBleakClient.createAppendedServices(sensorTagServices)
+
+    def __init__(self, mac: str, **kwargs):
+        super().__init__(mac, **kwargs)
+        self._sensors = Sensors()
+        self.lastException = None
+            
+    @staticmethod
+    def sensorServices() -> ClassServices:
+        """! @brief Returns a dictionary of SensorTag services, only
+            This method is equivalent to the 'gatt' property but contains less content. On the other hand, the delivered content
+            is appropriate for all application interfacing methods of this class. \n
+            The usage is e.g. SensorTag.services()["OpticalSensor"] .
+        """
+        return sensorTagServices
+    
+    def connect(self):
+        super().connect()
+        self.notifySensor(InputSensor, None)        
+        
+    def disconnect(self):
+        self.stopNotifySensor(InputSensor)        
+        super().disconnect()
+        
+    def readSensor(self, service: BaseService, noExceptions = True) -> Union[float, tuple, MotionValues, InputValues, OutputValues, None]:
+        """! @brief Reads from a service provided by the Sensor Tag
+            You can achieve the services by several ways:
+            - use the Sensor Tag class method services like e.g. SensorTag.services()["OpticalSensor"] . SensorTag.services() is a printable 'dict', from which you can receive all availabe sensor service names.
+            - Through import from this module e.g. import texas_instruments.OpticalSensor
+            - Through your Sensor Tag sensor representation instances property by e.g. using mySensorTag.sensors.sensorOptical.service
+            @param service The serivce of the sensor to be read from
+            @param noExceptions If 'True' the method captures all exceptions and in case of an exceptions stores the exception in its member 'lastException' and returns 'False'.
+            The returned value class type and its physical unit depend on the sensor service (all derived from 'BaseService') chosen:
+            - 'IrTemperaturesSensor' service
+            @returns A tuple in the order of targeted object temperature and the ambient temperature in °C
+            - 'HumiditySensor' service
+            @returns A float value of the relative humidity in %RH
+            - 'BarometricPressureSensor' service
+            @returns A tuple in the order of pressure and temperature. The values are of 'float' type. The pressure is in hPa (1 hPa = 1 mbar), the temperature in °C.
+            - 'MotionSensor' service
+            @returns A 'MotionValues' instance implementing the members 'gyroscope', 'accelleration' and 'magnetism' each of type 'Vector3' providing x,y and z properties as 'float'. Unit of the gyroscope is deg/s, of the accelleration is G and of the magnetism is uT.
+            - 'OpticalSensor' service
+            @returns A 'float' value in Lux
+            - 'InputSensor' service
+            @returns An 'InputValues' class representing 'userKey', 'powerKey' and 'reedRelai' digital values as 'bool' members
+            - 'OutputActor'
+            @returns An 'OutputValues' class representing 'ledRed', 'ledGreen' and 'buzzer' digital values as 'bool' members
+        """
+        sensor = self.__checkEnabled__(service)
+        data = self.read(service.DATA)
+        return sensor.decode(data)     
+    
+    def readAllSensors(self):
+        """! @brief Reads all sensor values, storing the result within this instance
+            The value can be accessed to by calling the 'getSensorValue' method.
+        """
+        services = [service for service in self.sensorServices().values() if service is not InputSensor]
+        sensors = [self.__checkEnabled__(service) for service in services]
+        values = self.read_many([service.DATA for service in services])
+        for service, sensor in zip(services, sensors):
+            sensor.decode(values[service.DATA])
+        self.getNotifications()  # Acquiring input sensor notifications
+        
+    def writeSensor(self, service: BaseService, value: OutputValues):
+        """! @brief Writes to an actor service provided by the Sensor Tag
+            - 'OutputActor'
+            @param service The only actor service is 'me2grid.devices.texas_instruments.OutputActor'
+            @param data An object 'OutputValues' representing 'LEDred', 'LEDgreen', 'buzzer as bool members. Standard value of each member is None to indicate no change on that output.
+            The unchanged outputs are taken from the memorized output state instead of reading the device before each write.
+        """
+        sensor = self.__checkEnabled__(service)
+        if service is OutputActor:
+            if sensor.value is None:    # The outputs have not been written or read by this client yet
+                sensor.decode(self.read(OutputActor.DATA))
+            data = sensor.encode(value, sensor.value.toBytearray())
+        else:
+            data = sensor.encode(service, value)
+        self.write(service.DATA, data)
+        return
+
+    def getSensorValue(self, service: BaseService) -> Union[float, tuple, MotionValues, InputValues, OutputValues, None]:
+        """! @brief Returns the last memorized value from the passed sensor service
+            To return valid values the sensor must have been read using 'readSensor' or notifications must be enabled (with or without a notification handler).
+        """
+        sensor = self._sensors.find(service)
+        return sensor.value        
+        
+    def enableSensor(self, service: BaseService, enable: bool = True, waitTime: float = 1.5):
+        """! @brief Enables or disables the sensor according to 'service' to take measurements
+            @param service A sensor service, e.g. out of the 'dict' 'SensorTag.services'
+            @param enable 'True' to enable, 'False' to disable
+            @param waitTime Sensors require a start up time before valid measurements can be taken. If severel sensors are to be enalbled, wait time is only required after the last enable call.
+        """
+        if not self.is_connected:
+            self.connect()
+        sensor = self._sensors.find(service)
+        if service is not InputSensor:
+            cfg = sensor.enableCode(enable)
+            if sensor.service is OutputActor:
+                self.write(sensor.service.DATA, b'\x00')
+                sensor.decode(b'\x00')
+            self.write(service.CONFIGURATION, cfg)
+            if  service is MotionSensor:
+                sensor.config = cfg
+            time.sleep(waitTime)
+        
+    def enableAllSensors(self, enable: bool = True):
+        """! @brief Enables or disables all sensor of the Sensor Tag to take measurements
+            @param enable 'True' to enable, 'False' to disable
+        """
+        for sensor in self._sensors:
+            if sensor.service is not InputSensor:
+                cfg = sensor.enableCode(enable)
+                if sensor.service is OutputActor:
+                    self.write(sensor.service.DATA, b'\x00')
+                    sensor.decode(b'\x00')
+                self.write(sensor.service.CONFIGURATION, cfg)
+                if  sensor.service is MotionSensor:
+                    sensor.config = cfg
+        time.sleep(1.5)
+        
+    def readSensorEnabled(self, service: BaseService) -> bool:
+        """! @brief Actually reads from the sensor to veryfy if it is enabled to take measurements
+            @param service A sensor service, e.g. out of the 'dict' 'SensorTag.services'
+            @returns 'bool' value indicating if the sensor is enabled
+        """
+        self.__checkEnabled__(service)
+        data = self.write(service.CONFIGURATION)
+        return (int(data) & int(disabledMask(service))) != 0
+
+    def isSensorEnabled(self, service: BaseService) -> bool:
+        """! @brief Reads from the memorized enabled state
+            @param service A sensor service, e.g. out of the 'dict' 'SensorTag.services'
+            @returns 'bool' value indicating if the sensor is enabled
+        """
+        sensor = self._sensors.find(service)
+        return sensor.enabled
+
+    def writeSensorPeriod(self, service: BaseService,  periodTime: float) -> bool:
+        """! @brief Sets the measurement period time for the sensor according to 'service' (ranges from 0.1s to 2.55s)
+            @returns 'bool' value indicating success
+        """
+        self.__checkEnabled__(service)
+        return self.write(service.PERIOD, SensorActor._codePeriodTime_(periodTime))
+
+    def readSensorPeriod(self, service: BaseService,  periodTime: float) -> bool:
+        """! @brief Sets the measurement period time for the sensor according to 'service' (ranges from 0.1s to 2.55s)
+            @returns 'bool' value indicating success
+        """
+        self.__checkEnabled__(service)
+        return SensorTag._decodePeriodTime(self.read(service.PERIOD))
+
+    def notifySensor(self, service: BaseService, notificationHandler = None) -> bool:
+        """! @brief Enales notifications from the passed sensor service and sets the appropriate notification handler
+            If 'None' is passed as 'notificationHandler' the notifications will be collected by the Sensor Tag client and received values are stored.
+            These values can be accessed using the method getSensor().
+            @param service A sensor service, e.g. out of the 'dict' 'SensorTag.services'
+            @param notificationHandler A method or function delegate accepting a single parameter of type Union[float, tuple, MotionValues, None] delivering the sensor value similar to the 'readSensor' method
+            @returns 'bool' value indicating success
+        """
+        sensor = self.__checkEnabled__(service)
+        if service is not InputSensor:
+            self.readSensor(service)    # in order to initialize the memorized sensor value (sensor.value) you access by calling getSensorValue()
+        self.start_notify(service.DATA, sensor._OnNotification_)
+        sensor._setNotificationHandler_(notificationHandler)
+               
+    def notifyAllSensors(self):
+        """! @brief Activates notifications from all sensors
+            Received notification values can be accessed by calling the 'getSensorValue' method.
+        """
+        for service in self.sensorServices().values():
+            if service is not InputSensor and service is not OutputActor:
+                self.notifySensor(service)
+        
+    def stopNotifySensor(self, service: BaseService):
+        """! @brief Disables notifications from the passed sensor service
+            @param service A sensor service, e.g. out of the 'dict' 'SensorTag.services'
+        """
+        sensor = self.__checkEnabled__(service)
+        if service is not InputSensor:
+            self.stop_notify(service.DATA)
+        sensor._setNotificationHandler_(None)
+        return
+   
+    def streamSensor(self, service: BaseService, capacity: int = 256, waitTime: float = 1.0):
+        """! @brief Returns a generator of the decoded notifications of the passed sensor service as (timestamp, value) tuples
+            The values equal those of the 'readSensor' method. The notifications are buffered, see 'EasyBleakClient.notifications'.
+            @code{.py}
+            for timestamp, lux in tag.streamSensor(OpticalSensor):
+                print(timestamp, lux)
+            @endcode
+            @param service A sensor service, e.g. out of the 'dict' 'SensorTag.services'
+        """
+        sensor = self.__checkEnabled__(service)
+        return self.notifications(service.DATA, sensor.decode, capacity, waitTime=waitTime)
+
+    def stopNotifyAllSensors(self):
+        """! @brief Deactivates notifications from all sensors
+        """
+        for service in self.sensorServices().values():
+            if service is not InputSensor and service is not OutputActor:
+                self.stopNotifySensor(service)
+        
+    def __checkEnabled__(self, service) -> SensorActor:
+        """! @brief Checks, whether the device is connected and the passed service already has been enabled and returns the corresponding 'SensorActor' instance """ 
+        if not self.is_connected:
+            self.connect()
+        sensor = self._sensors.find(service)
+        if not sensor.isEnabled:
+            if service is OutputActor:
+                self.write_gatt_char(OutputActor.DATA.uuid, b'\x00')
+                sensor.decode(b'\x00')
+            self.enableSensor(service)
+        return sensor
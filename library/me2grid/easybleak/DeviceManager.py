@@ -0,0 +1,233 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  DeviceManager.py
+
+@brief Distributes the connections of a device fleet over several Bluetooth adapters
+
+A single adapter (controller) supports a limited number of simultaneous connections. The \ref DeviceManager is given
+several adapters and creates the clients of the devices. Each time a client connects, the manager assigns the adapter
+with the best score of the received signal strength (RSSI) and the current load. If connecting fails, the client tries
+the next best adapter. Adapters failing repeatedly are avoided for a recovery time, thus the devices are rebalanced
+to the remaining adapters.
+
+@code{.py}
+manager = DeviceManager({"hci0": 7, "hci1": 7})
+await manager.scan()                        # or manager.observe(mac, "hci1", rssi) from an own scanner
+tag = manager.client(SensorTag, "B0:B4:48:BE:AF:01")
+valve = manager.client(CC_RT_BLE, "00:1A:22:12:0F:87")
+print(tag.readSensor(HumiditySensor), tag.adapter)
+print(manager.stats())
+@endcode
+
+The clients and device classes are used as without manager. Any class deriving from \ref EasyBleakClient or
+\ref ExtBleakClient and passing its keyword arguments to its base class can be managed.
+"""
+
+import asyncio
+import threading
+import time
+import bleak
+
+from typing import Union
+
+class AdapterState():
+    """! @brief Connections and failures of a single Bluetooth adapter
+        @param name The adapter name, e.g. 'hci0'
+        @param maxConnections Maximum number of simultaneous connections of the adapter
+    """
+    def __init__(self, name: str, maxConnections: int = 7):
+        self.name = name
+        self.maxConnections = maxConnections
+        self.devices = set()        #!> Addresses of the devices connected or connecting through this adapter
+        self.failures = 0           #!> Number of consecutive connect failures
+        self.blockedUntil = 0.0     #!> Monotonic time until which the adapter is avoided after repeated failures
+
+    @property
+    def load(self) -> float:
+        """! @brief Returns the used share of the connections (0.0 ... 1.0) """
+        return len(self.devices) / self.maxConnections if self.maxConnections > 0 else 1.0
+
+    @property
+    def isFull(self) -> bool:
+        return len(self.devices) >= self.maxConnections
+
+    def isBlocked(self, now: float) -> bool:
+        return now < self.blockedUntil
+
+class DeviceManager():
+    """! @brief Assigns devices to Bluetooth adapters by RSSI and load and rebalances them on failures
+        The score of an adapter for a device is its RSSI in dBm reduced by 'loadWeight' times the load of the adapter.
+        An adapter without RSSI observation of the device is scored with 'defaultRssi'.
+        @param adapters List of adapter names or dictionary of adapter names and their maximum number of connections
+        @param maxConnections Maximum number of connections of adapters passed without own limit
+        @param loadWeight Score reduction in dB of a fully loaded adapter compared to an unused one
+        @param failureThreshold Number of consecutive connect failures after which an adapter is avoided
+        @param recoveryTime Time in seconds a failing adapter, or an adapter failing for a single device, is avoided
+        @param defaultRssi RSSI in dBm assumed for adapters which have not observed the device
+    """
+    def __init__(self, adapters: Union[list, dict] = ("hci0",), maxConnections: int = 7, loadWeight: float = 20.0, failureThreshold: int = 3, recoveryTime: float = 30.0, defaultRssi: float = -90.0):
+        if not adapters:
+            raise ValueError("The device manager requires at least one adapter!")
+        if not isinstance(adapters, dict):
+            adapters = {name: maxConnections for name in adapters}
+        self.adapters = {name: AdapterState(name, limit) for name, limit in adapters.items()}   #!> adapter name -> \ref AdapterState
+        self.loadWeight = loadWeight
+        self.failureThreshold = failureThreshold
+        self.recoveryTime = recoveryTime
+        self.defaultRssi = defaultRssi
+        self.clients = {}           #!> address -> managed client
+        self.__rssi = {}            # address -> {adapter name: RSSI in dBm}
+        self.__avoided = {}         # (address, adapter name) -> monotonic time until which the pair is avoided
+        self.__lock = threading.Lock()  # Clients may connect from several threads and event loops
+
+    def observe(self, address: str, adapter: str, rssi: Union[float, None]):
+        """! @brief Records the RSSI in dBm an adapter receives from a device, e.g. from the advertisements of a scan
+            @param rssi 'None' forgets the observation, e.g. if the device was not found by the adapter
+        """
+        with self.__lock:
+            observations = self.__rssi.setdefault(address.upper(), {})
+            if rssi is None:
+                observations.pop(adapter, None)
+            else:
+                observations[adapter] = rssi
+
+    def rssi(self, address: str) -> dict:
+        """! @brief Returns the dictionary of adapter names and the RSSI observed for the device """
+        return dict(self.__rssi.get(address.upper(), {}))
+
+    async def scan(self, timeOut: float = 5.0):
+        """! @brief Scans with all adapters at the same time and records the RSSI of the advertising devices (see \ref observe) """
+        async def scanAdapter(name: str):
+            def detected(device, advertisementData):
+                self.observe(device.address, name, getattr(advertisementData, "rssi", None) or device.rssi)
+            scanner = bleak.BleakScanner(detected, adapter=name)
+            await scanner.start()
+            await asyncio.sleep(timeOut)
+            await scanner.stop()
+        await asyncio.gather(*[scanAdapter(name) for name in self.adapters])
+
+    def score(self, address: str, adapter: str) -> float:
+        """! @brief Returns the score of the adapter for the device, the higher the better """
+        state = self.adapters[adapter]
+        rssi = self.__rssi.get(address.upper(), {}).get(adapter, self.defaultRssi)
+        return rssi - self.loadWeight * state.load
+
+    def client(self, clientClass, address: str, **kwargs):
+        """! @brief Creates a managed client of the device, e.g. 'manager.client(SensorTag, mac)'
+            @param clientClass \ref EasyBleakClient, \ref ExtBleakClient or a class derived from them
+            @param kwargs Further arguments of the client class, e.g. 'backend=simulation.SimulatedBleakClient'
+        """
+        address = address.upper()
+        kwargs.setdefault("adapter", self.__best__(address, [])[0])
+        instance = clientClass(address, **kwargs)
+        bleakClient = getattr(instance, "_bleakClient", instance)   # The asynchronous client of an EasyBleakClient
+        bleakClient.deviceManager = self
+        self.clients[address] = instance
+        return instance
+
+    def release(self, address: str):
+        """! @brief Stops managing the client of the device. The client keeps its last adapter. """
+        address = address.upper()
+        instance = self.clients.pop(address, None)
+        if instance is not None:
+            getattr(instance, "_bleakClient", instance).deviceManager = None
+        self._disconnected_(address)
+
+    def adapterOf(self, address: str) -> Union[str, None]:
+        """! @brief Returns the adapter the device is connected or connecting through, 'None' if it is not connected """
+        address = address.upper()
+        for state in self.adapters.values():
+            if address in state.devices:
+                return state.name
+        return None
+
+    def stats(self) -> dict:
+        """! @brief Returns a dictionary of the adapters with their connected devices, load and failure state """
+        now = time.monotonic()
+        with self.__lock:
+            return {name: {"devices": sorted(state.devices), "max_connections": state.maxConnections, "load": state.load,
+                           "failures": state.failures, "blocked": state.isBlocked(now)}
+                    for name, state in self.adapters.items()}
+
+    def __best__(self, address: str, tried: [str]) -> [str]:
+        """! @brief \b private Returns the adapter names not yet tried in the order of preference
+            Adapters with free connections come first, avoided adapters last, each ordered by score.
+        """
+        now = time.monotonic()
+        def preference(state: AdapterState):
+            avoided = state.isBlocked(now) or self.__avoided.get((address, state.name), 0.0) > now
+            return (state.isFull, avoided, -self.score(address, state.name))
+        candidates = sorted((state for state in self.adapters.values() if state.name not in tried), key=preference)
+        return [state.name for state in candidates]
+
+    def _assign_(self, address: str, tried: [str]) -> str:
+        """! @brief \b protected Returns the adapter the device connects through and reserves a connection of it
+            Called by the client on connecting. Raises a BleakError if all adapters not yet tried are fully loaded.
+        """
+        address = address.upper()
+        with self.__lock:
+            for state in self.adapters.values():
+                state.devices.discard(address)      # A reconnecting device frees its previous connection
+            candidates = self.__best__(address, tried)
+            if not candidates or self.adapters[candidates[0]].isFull:
+                raise bleak.exc.BleakError(f"No adapter with a free connection left for {address} ({self.__statsText__()})")
+            state = self.adapters[candidates[0]]
+            state.devices.add(address)
+            return state.name
+
+    def _connected_(self, address: str, adapter: str):
+        """! @brief \b protected Records the successful connect of the device through the adapter """
+        with self.__lock:
+            state = self.adapters[adapter]
+            state.failures = 0
+            state.blockedUntil = 0.0
+            self.__avoided.pop((address.upper(), adapter), None)
+
+    def _failed_(self, address: str, adapter: str, tried: [str]) -> bool:
+        """! @brief \b protected Records the failed connect of the device through the adapter
+            @returns 'True' if another adapter is left to be tried
+        """
+        address = address.upper()
+        now = time.monotonic()
+        with self.__lock:
+            state = self.adapters[adapter]
+            state.devices.discard(address)
+            state.failures = state.failures + 1
+            if state.failures >= self.failureThreshold:
+                state.blockedUntil = now + self.recoveryTime
+            self.__avoided[(address, adapter)] = now + self.recoveryTime
+            return any(not self.adapters[name].isFull for name in self.__best__(address, tried))
+
+    def _disconnected_(self, address: str):
+        """! @brief \b protected Frees the connection of the device """
+        address = address.upper()
+        with self.__lock:
+            for state in self.adapters.values():
+                state.devices.discard(address)
+
+    def __statsText__(self) -> str:
+        return ", ".join(f"{state.name}: {len(state.devices)}/{state.maxConnections}" for state in self.adapters.values())
+
+if __name__ == "__main__":
+    print("Testing DeviceManager: assignment by RSSI and load, fallback after failures, full adapters")
+    manager = DeviceManager({"hci0": 2, "hci1": 1}, failureThreshold=2)
+    manager.observe("B0:B4:48:00:00:01", "hci1", -50)
+    manager.observe("B0:B4:48:00:00:01", "hci0", -70)
+    assert manager._assign_("b0:b4:48:00:00:01", []) == "hci1"
+    assert not manager._failed_("B0:B4:48:00:00:01", "hci1", ["hci1", "hci0"])     # All adapters tried
+    assert manager._assign_("B0:B4:48:00:00:01", []) == "hci0"                     # The failed pair is avoided
+    manager._connected_("B0:B4:48:00:00:01", "hci0")
+    assert manager.adapterOf("B0:B4:48:00:00:01") == "hci0"
+    assert manager._assign_("B0:B4:48:00:00:02", []) == "hci1"                     # The unloaded adapter wins at equal RSSI
+    assert manager._assign_("B0:B4:48:00:00:03", []) == "hci0"
+    try:
+        manager._assign_("B0:B4:48:00:00:04", [])
+        raise AssertionError("full adapters expected")
+    except bleak.exc.BleakError:
+        pass
+    manager._disconnected_("B0:B4:48:00:00:02")
+    manager._assign_("B0:B4:48:00:00:04", [])
+    manager._failed_("B0:B4:48:00:00:04", "hci1", ["hci1"])
+    assert manager.stats()["hci1"]["blocked"] and manager.stats()["hci1"]["failures"] == 2    # Second consecutive failure
+    print("Ready")
@@ -13,6 +13,8 @@ Installation and usage is described at https://bleak.readthedocs.io/en/latest/in
 """
 
 import asyncio
+import threading
+import time
 import bleak
 
 from sys import stderr
@@ -20,31 +22,73 @@ from typing import Union
 from uuid import UUID
 from bleak.backends.characteristic import BleakGATTCharacteristic
 
-try: # Necessary, to run this file directly
-    from gatt import BaseService
-    from gatt_services import DeviceInformationService
-    from ExtBleakClient import ExtBleakClient, GATT_Dict
-except:
+if __package__:
     from me2grid.easybleak.gatt import BaseService
     from me2grid.easybleak.gatt_services import DeviceInformationService
-    from me2grid.easybleak.ExtBleakClient import ExtBleakClient, GATT_Dict
+    from me2grid.easybleak.ExtBleakClient import ExtBleakClient, GATT_Dict, NotificationSettleTime
+    from me2grid.easybleak.RequestEngine import RequestCorrelator
+    from me2grid.easybleak.retry import RetryPolicy
+    from me2grid.easybleak.notifications import NotificationBuffer, Overflow
+else: # Necessary, to run this file directly
+    from gatt import BaseService
+    from gatt_services import DeviceInformationService
+    from ExtBleakClient import ExtBleakClient, GATT_Dict, NotificationSettleTime
+    from RequestEngine import RequestCorrelator
+    from retry import RetryPolicy
+    from notifications import NotificationBuffer, Overflow
 
 def syncCall(func):    
     def Call(*args, **kwargs):
         inst = args[0]
-        inst._checkConnect_()
-        try:
-            #print("-> Decorator")
-            #print(args)
-            result = inst._loop.run_until_complete(func(*args, **kwargs))
-            #result = func(*args, **kwargs)
-        except bleak.exc.BleakError as e:
+        with inst._lock:
+            inst._checkConnect_()
+            try:
+                #print("-> Decorator")
+                #print(args)
+                result = inst._run_(func(*args, **kwargs))
+                #result = func(*args, **kwargs)
+            except bleak.exc.BleakError as e:
+                inst._checkDisconnect_()
+                raise e
             inst._checkDisconnect_()
-            raise e
-        inst._checkDisconnect_()
         return result
     return Call
 
+class BackgroundLoop():
+    """! @brief Persistent asyncio event loop running within a daemon thread
+        A single instance, received by \ref instance, serves all EasyBleakClient objects created in background loop mode.
+        As the loop runs continuously, notifications are delivered as soon as they arrive. Notification handlers are
+        therefore called from within the loop thread and not from the thread of the application.
+    """
+    __instance = None
+    __instanceLock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> 'BackgroundLoop':
+        """! @brief \b static Deliveres the shared background loop, starting its thread on first use """
+        with cls.__instanceLock:
+            if cls.__instance is None or not cls.__instance.thread.is_alive():
+                cls.__instance = cls()
+            return cls.__instance
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.__runForever__, name="EasyBleakLoop", daemon=True)
+        self.thread.start()
+
+    def __runForever__(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coroutine, timeOut: Union[float, None] = None):
+        """! @brief Executes the coroutine within the background loop and blocks until its result is available
+            @param timeOut Maximum waiting time in seconds. 'None' waits without limit.
+        """
+        if threading.current_thread() is self.thread:
+            coroutine.close()
+            raise RuntimeError("A synchronous EasyBleakClient method must not be called from within the background loop, e.g. from a notification handler!")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeOut)
+
 class EasyBleakClient(GATT_Dict):
     """! @brief Object to commuinicate to devices by BLE for synchronous programming
     
@@ -75,18 +119,61 @@ class EasyBleakClient(GATT_Dict):
         client = BleCient('[Bluetooth MAC Address]')
         data = client.read('[UUID]')
         @endcode
+
+        @section SEC_BACKGROUNDLOOP Background loop mode
+
+        By default each instance uses its own asyncio loop, which only runs during a method call. Notifications are therefore
+        executed not before \ref getNotifications is called. In background loop mode a single persistent loop thread
+        (see \ref BackgroundLoop) serves all instances. Notifications are delivered continuously from within that thread
+        without the need of polling. The mode is chosen per instance by the 'backgroundLoop' parameter or for all instances,
+        including those of derived device classes, by the class attribute 'useBackgroundLoop':
+
+        @code{.py}
+        EasyBleakClient.useBackgroundLoop = True
+        tag = SensorTag('[Bluetooth MAC Address]')
+        @endcode
+
+        @section SEC_KEEPALIVE Keep alive connection policy
+
+        Besides connecting on each call and the permanent connection from \ref connect until \ref disconnect, the client
+        can connect on demand and stay connected until no call has been made for an idle time out or a maximum connection
+        time has expired (see \ref keepAlive). The disconnect is executed in the background.
+
+        @code{.py}
+        client = EasyBleakClient('[Bluetooth MAC Address]')
+        client.keepAlive(idleTimeOut=5.0)
+        model = client.read(DeviceInformationService.MODEL)    # connects
+        firmware = client.read(DeviceInformationService.FIRMWARE)  # uses the same connection
+        @endcode
     """
-    def __init__(self, mac: str):
+    useBackgroundLoop = False       #!> Standard value for the 'backgroundLoop' parameter of the constructor
+
+    def __init__(self, mac: str, backgroundLoop: Union[bool, None] = None, **kwargs):
         """! @brief Initialization
         @param mac String representing the bluetooth mac address of the device this instance is representing 
+        @param backgroundLoop If 'True' the shared background loop thread is used instead of a local loop. 'None' uses the class attribute 'useBackgroundLoop'.
+        @param kwargs Further arguments of 'BleakClient', e.g. 'backend=simulation.SimulatedBleakClient' for a simulated device
         """
-        self._bleakClient = ExtBleakClient(mac)
-        self.__globalLoop = asyncio.get_event_loop()
-        self._loop = asyncio.new_event_loop()       # A local loop is necessary as the user might call asyncio.run for other purpose.
-                                                    # asyncio.run might open a new loop which must not be the case for BleakClient
-                                                    # in between the connect and disconnect command.
-        asyncio.set_event_loop(self.__globalLoop)   # necessary, as new_event_loop automatically sets the new loop as global
+        self._bleakClient = ExtBleakClient(mac, **kwargs)
+        if backgroundLoop is None:
+            backgroundLoop = self.useBackgroundLoop
+        self._backgroundLoop = None
+        if backgroundLoop:
+            self._backgroundLoop = BackgroundLoop.instance()
+            self._loop = self._backgroundLoop.loop
+        else:
+            self.__globalLoop = self.__currentLoop__()
+            self._loop = asyncio.new_event_loop()       # A local loop is necessary as the user might call asyncio.run for other purpose.
+                                                        # asyncio.run might open a new loop which must not be the case for BleakClient
+                                                        # in between the connect and disconnect command.
+            asyncio.set_event_loop(self.__globalLoop)   # necessary, as new_event_loop automatically sets the new loop as global
         self._continuousConnect = False
+        self._lock = threading.RLock()                  # Serializes calls of the application and the background idle disconnect
+        self._idleTimeOut = None
+        self._maxConnectionTime = None
+        self.__idleTimer = None
+        self.__connectedSince = 0.0
+        self.__lastCall = 0.0
         
     def __destroy__(self):
         if self.is_connected:
@@ -95,10 +182,20 @@ class EasyBleakClient(GATT_Dict):
                 print("Undesired automatic disconnect within the destructor of {self.__class__} successful!", file=stderr)
             except:
                 pass
-            self._loop.close()
+            self.__closeLoop__()
             raise BleakError(f"Recource leak because {self.__class__} BLE 'bleak' client has not been disconnected before object destruction!") 
-        self._loop.close()
+        self.__closeLoop__()
         super().__destroy__()
+
+    def __closeLoop__(self):
+        """! @brief \b private Closes the local loop. The shared background loop is kept running for other instances. """
+        if self._backgroundLoop is None:
+            self._loop.close()
+
+    @property
+    def isBackgroundLoop(self) -> bool:
+        """! @brief Indicates if this instance uses the shared background loop thread """
+        return self._backgroundLoop is not None
             
     # Context managers
     def __aenter__(self):
@@ -112,47 +209,146 @@ class EasyBleakClient(GATT_Dict):
     def connect(self):
         """! @brief Connects to the remote BLE device
              Using this method the connection will kept open until \ref disconnect is called. The connection process
-             is time consuming as the remote device is scanned for services and characteristics.
+             is time consuming as the remote device is scanned for services and characteristics. Use \ref useServiceCache
+             to skip the scan when reconnecting to a known device.
         """
-        self._continuousConnect = True;
-        # print("-> Easy connect")
-        self._checkConnect_()
-        self._checkDisconnect_()
+        with self._lock:
+            self._continuousConnect = True;
+            self.__cancelIdleTimer__()
+            # print("-> Easy connect")
+            self._checkConnect_()
+            self._checkDisconnect_()
         
     def disconnect(self):
         """! @brief Disconnects to the remote BLE device
              To be called after the \ref connect method to finish communication to the remote device.
+             A connection kept alive (see \ref keepAlive) is closed immediately as well.
         """
-        self._continuousConnect = False;
-        self._checkConnect_()
-        self._checkDisconnect_()
+        with self._lock:
+            self._continuousConnect = False;
+            self.__cancelIdleTimer__()
+            if self._bleakClient.is_connected:
+                self._checkConnect_()
+                self.__disconnectNow__()
         
+    def keepAlive(self, idleTimeOut: Union[float, None] = 5.0, maxConnectionTime: Union[float, None] = None):
+        """! @brief Chooses the keep alive connection policy for calls without a permanent connection
+             The first call connects and the connection is kept open for following calls. It is closed in the background
+             after 'idleTimeOut' seconds without a call or, at the latest, after the 'maxConnectionTime' has expired.
+             \ref connect switches to the permanent connection policy, which is not affected by this method.
+             @param idleTimeOut Seconds without a call until disconnecting. 'None' returns to connecting and disconnecting at each call.
+             @param maxConnectionTime Maximum duration of a connection in seconds. 'None' for no limit.
+        """
+        with self._lock:
+            self._idleTimeOut = idleTimeOut
+            self._maxConnectionTime = maxConnectionTime
+            if idleTimeOut is None:
+                self.__cancelIdleTimer__()
+                self._checkDisconnect_()
+            elif self._bleakClient.is_connected and not self._continuousConnect:
+                self.__armIdleTimer__()
+
+    def __disconnectDeadline__(self) -> float:
+        """! @brief \b private Returns the monotonic time the kept alive connection is to be closed """
+        deadline = self.__lastCall + self._idleTimeOut
+        if self._maxConnectionTime is not None:
+            deadline = min(deadline, self.__connectedSince + self._maxConnectionTime)
+        return deadline
+
+    def __armIdleTimer__(self):
+        """! @brief \b private (Re)starts the background timer closing the kept alive connection """
+        self.__cancelIdleTimer__()
+        self.__idleTimer = threading.Timer(max(self.__disconnectDeadline__() - time.monotonic(), 0.0), self.__onIdleTimer__)
+        self.__idleTimer.daemon = True
+        self.__idleTimer.start()
+
+    def __cancelIdleTimer__(self):
+        if self.__idleTimer is not None:
+            self.__idleTimer.cancel()
+            self.__idleTimer = None
+
+    def __onIdleTimer__(self):
+        """! @brief \b private Closes the kept alive connection from the timer thread, if the deadline has been reached """
+        with self._lock:
+            if threading.current_thread() is not self.__idleTimer:
+                return  # The timer has been cancelled or restarted in the meantime
+            self.__idleTimer = None
+            if self._continuousConnect or self._idleTimeOut is None or not self._bleakClient.is_connected:
+                return
+            if time.monotonic() < self.__disconnectDeadline__():
+                self.__armIdleTimer__()
+                return
+            try:
+                self._run_(self._bleakClient.disconnect())
+            except Exception as e:
+                print(f"Background disconnect of {self._bleakClient.address} failed: {e}", file=stderr)
+
+    def __disconnectNow__(self):
+        """! @brief \b private Disconnects regardless of the connection policy and switches back to the global asyncio loop """
+        try:
+            self._run_(self._bleakClient.disconnect())
+        finally:
+            self.__restoreGlobalLoop__()
+        
+    def _run_(self, coroutine):
+        """! @brief \b protected Executes a coroutine within the loop of this instance and returns its result
+            In background loop mode the coroutine is submitted to the loop thread and the calling thread blocks until the
+            result is available. Otherwise the local loop runs until the coroutine is complete.
+        """
+        if self._backgroundLoop is not None:
+            return self._backgroundLoop.run(coroutine)
+        return self._loop.run_until_complete(coroutine)
+
     def _checkConnect_(self):
         """! @brief \b protected Connects if not connected yet and switches to the client asyncio loop """
-        # Switching to the objects own local event loop
-        self.__globalLoop = asyncio.get_event_loop()
-        asyncio.set_event_loop(self._loop)
+        # Switching to the objects own local event loop (not needed for the background loop)
+        if self._backgroundLoop is None:
+            self.__globalLoop = self.__currentLoop__()
+            asyncio.set_event_loop(self._loop)
         # Check for the connection status
         if not self._bleakClient.is_connected:
             try:
                 #print("-> Easy _check_ connect")
-                self._loop.run_until_complete(self._bleakClient.connect())
+                self._run_(self._bleakClient.connect())
+                self.__connectedSince = time.monotonic()
             except bleak.exc.BleakError as e:
-                asyncio.set_event_loop(self.__globalLoop)
+                self.__restoreGlobalLoop__()
                 raise e
                         
     def _checkDisconnect_(self):
-        """! @brief \b protected Disconnects if no permanent connection is chosen and switches back to the global asyncio loop """
+        """! @brief \b protected Disconnects if no permanent connection is chosen and switches back to the global asyncio loop
+             In keep alive mode the disconnect is postponed to the background idle timer instead.
+        """
+        self.__lastCall = time.monotonic()
         # Check for the need of disconnecting
+        if not self._continuousConnect and self._bleakClient.is_connected and self._idleTimeOut is not None:
+            if self.__lastCall < self.__disconnectDeadline__():
+                if self.__idleTimer is None:
+                    self.__armIdleTimer__()     # A pending timer re-arms itself for the postponed deadline
+                self.__restoreGlobalLoop__()
+                return
         if not self._continuousConnect and self._bleakClient.is_connected:
             try:
                 #print("-> disconnect")
-                self._loop.run_until_complete(self._bleakClient.disconnect())
+                self._run_(self._bleakClient.disconnect())
             except bleak.exc.BleakError as e:
-                asyncio.set_event_loop(self.__globalLoop)
+                self.__restoreGlobalLoop__()
                 raise e
         # switch back to global system loop from the objects own local event loop
-        asyncio.set_event_loop(self.__globalLoop)
+        self.__restoreGlobalLoop__()
+
+    @staticmethod
+    def __currentLoop__() -> Union[asyncio.AbstractEventLoop, None]:
+        """! @brief \b private Returns the global asyncio loop of the thread, 'None' if there is none (e.g. after asyncio.run) """
+        try:
+            return asyncio.get_event_loop()
+        except RuntimeError:
+            return None
+
+    def __restoreGlobalLoop__(self):
+        """! @brief \b private Switches back to the global asyncio loop, if a local loop is used """
+        if self._backgroundLoop is None:
+            asyncio.set_event_loop(self.__globalLoop)
 
     # ExtBleakClient interface
     
@@ -162,30 +358,54 @@ class EasyBleakClient(GATT_Dict):
         return await self._bleakClient.read(uuid)
         
     @syncCall
-    async def write(self, uuid: Union[BaseService, BleakGATTCharacteristic, int, str, UUID], data: Union[bytearray, str, int]):
-        """! @brief Writes to a GATT characteristic  """
-        await self._bleakClient.write(uuid, data)
+    async def read_many(self, uuids: [Union[BaseService, BleakGATTCharacteristic, int, str, UUID]]) -> dict:
+        """! @brief Reads several GATT characteristics concurrently within a single call
+            The connection check and loop switching take place once for all reads.
+            @returns A dictionary of the passed characteristics as keys and their values
+        """
+        return await self._bleakClient.read_many(uuids)
 
-    def requestUsing(self, requestResponseUUID: Union[BaseService, BleakGATTCharacteristic, int, str, UUID], requestCommandUUID: Union[BaseService, BleakGATTCharacteristic, int, str, UUID], timeOut: float = 1.0):            
+    @syncCall
+    async def write(self, uuid: Union[BaseService, BleakGATTCharacteristic, int, str, UUID], data: Union[bytearray, str, int], response: Union[bool, None] = None, idempotent: bool = False):
+        """! @brief Writes to a GATT characteristic
+            @param response 'False' writes without response, 'None' uses the declaration of the characteristic (see \ref ExtBleakClient.write)
+            @param idempotent 'True' allows the retry policy to repeat the write after a time-out
+        """
+        await self._bleakClient.write(uuid, data, response, idempotent)
+
+    def requestUsing(self, requestResponseUUID: Union[BaseService, BleakGATTCharacteristic, int, str, UUID], requestCommandUUID: Union[BaseService, BleakGATTCharacteristic, int, str, UUID], timeOut: float = 1.0, correlator: Union[RequestCorrelator, None] = None, maxInFlight: int = 1, settleTime: Union[NotificationSettleTime, None] = None):            
         """! @brief Configures the command and notification response procedure
              Some BLE devices use a command characeristic. Writing e.g. a read request command coded
              within the data bytearry, specific to the vendor of the device, will force a notification
              response containing the answer with the requested information content, also specifically coded
              by the vendor.
              To execute a response procedure call the method 'request'.
+             @param correlator A \ref RequestCorrelator matching responses to commands, e.g. by an opcode. 'None' matches in the order of sending.
+             @param maxInFlight Maximum number of commands waiting for their response at the same time (see \ref request_many)
+             @param settleTime A \ref NotificationSettleTime as device profile for restarting the response notification. 'None' learns the delay.
         """
-        self._bleakClient.requestUsing(requestResponseUUID, requestCommandUUID, timeOut)
+        self._bleakClient.requestUsing(requestResponseUUID, requestCommandUUID, timeOut, correlator, maxInFlight, settleTime)
 
     @syncCall
-    async def request(self, data: Union[bytearray, None] = None, timeOut: float = 1.0) -> bytearray:           
+    async def request(self, data: Union[bytearray, None] = None, timeOut: float = 1.0, idempotent: bool = False) -> bytearray:           
         """! @brief Requesting a read or write operation of a GATT characteristic using a GATT command characteristic
             This method uses a notification answer (response) of the BLE device for reading initiated by the write to the command characteristic.
             The method 'requestUsing' must be called at least once in order to set the request command and response characteristic
             Fore derived classes the COMMAND and RESONSE characteristics should be defined within the 'RequestService' enumeration.
+            @param idempotent 'True' allows the retry policy to repeat the command after a time-out
         """
-        res = await self._bleakClient.request(data, timeOut)
+        res = await self._bleakClient.request(data, timeOut, idempotent)
         return res
 
+    @syncCall
+    async def request_many(self, commands: [bytearray], timeOut: float = 1.0, returnExceptions: bool = False) -> [Union[bytearray, Exception]]:
+        """! @brief Sends several request commands back to back and returns the list of responses in the order of the commands
+            The commands are written without waiting for the response of the previous command, as long as less than 'maxInFlight'
+            commands (see \ref requestUsing) are waiting for their responses.
+            @param returnExceptions If 'True' a failed command delivers its exception within the list instead of raising it
+        """
+        return await self._bleakClient.request_many(commands, timeOut, returnExceptions)
+
     @syncCall
     async def __sleep__(self, time: float=0):
         """! @brief Synchronous call of asyncio.sleep(), used to keep the loop running """ 
@@ -197,12 +417,69 @@ class EasyBleakClient(GATT_Dict):
              notifications are received asynchronously and memoriezed within a stack. This method executes all memorized
              notifications by calling the coresponding callback methods. \n
              Usually, this method is called periodically during application program execution.
+             In background loop mode notifications are executed continuously and this method just waits for 'waitTime'.
              @param waitTime If zero all memorized notifications since the last call are executed. Otherwise continues to receive and execute incoming notifications.
         """
+        if self._backgroundLoop is not None:
+            time.sleep(waitTime)
+            return
         self.__sleep__(waitTime)
         
     def printServices(self):
         self._bleakClient.printServices()
+
+    def useCache(self, enable: bool = True, defaultTimeToLive: Union[float, None] = None):
+        """! @brief Enables or disables the characteristic value cache
+            Values of characteristics declaring a 'cache' time, e.g. DeviceInformationService.MODEL, are read from the device once.
+            @param defaultTimeToLive Time in seconds values are cached, if the characteristic declares no 'cache' time. 'None' does not cache them.
+        """
+        self._bleakClient.useCache(enable, defaultTimeToLive)
+
+    def useServiceCache(self, enable: bool = True, directory: Union[str, None] = None):
+        """! @brief Enables or disables the persistent service table cache
+            The service table of the device is stored within a user cache directory. Reconnecting to a known device with unchanged
+            services uses cached services instead of waiting for the service discovery, if the bleak backend allows it. The
+            backend keeps these services within the running process only (see \ref ExtBleakClient.ExtBleakClient).
+            @param directory Directory of the stored tables. 'None' uses the user cache directory.
+        """
+        self._bleakClient.useServiceCache(enable, directory)
+
+    @property
+    def cache(self):
+        """! @brief The characteristic value cache providing the 'hits' and 'misses' counters, 'None' if not used """
+        return self._bleakClient.cache
+
+    def stats(self) -> dict:
+        """! @brief Returns the latency histograms and event counters of the device as dictionary, see ExtBleakClient.stats """
+        return self._bleakClient.stats()
+
+    def usePresence(self, enable: bool = True, presenceRegistry = None, maxAge: Union[float, None] = None):
+        """! @brief Enables or disables failing fast on the first connect to a device the scanners have not seen recently
+            The first connect raises a BleakError at once, if the device has not advertised to a running EasyBleakScanner within
+            'maxAge' seconds, instead of blocking until the connect time out. Reconnects are not checked, as a connected device
+            usually stops advertising.
+            @param presenceRegistry The presence.PresenceRegistry filled by the scanners. 'None' uses the module wide one.
+            @param maxAge Time in seconds without advertisement, connect or disconnect after which connecting fails. 'None' uses the estimate of the registry.
+        """
+        self._bleakClient.usePresence(enable, presenceRegistry, maxAge)
+
+    def isReachable(self, maxAge: Union[float, None] = None) -> bool:
+        """! @brief Returns 'True' if the device advertised recently to a scanner, without connecting """
+        return self._bleakClient.isReachable(maxAge)
+
+    @property
+    def adapter(self) -> Union[str, None]:
+        """! @brief Name of the Bluetooth adapter used, e.g. 'hci1'. 'None' for the default adapter. See \ref DeviceManager.DeviceManager """
+        return self._bleakClient.adapter
+
+    @property
+    def retryPolicy(self) -> RetryPolicy:
+        """! @brief The \ref retry.RetryPolicy of transient errors used by read, write, request and start_notify """
+        return self._bleakClient.retryPolicy
+
+    @retryPolicy.setter
+    def retryPolicy(self, policy: RetryPolicy):
+        self._bleakClient.retryPolicy = policy
         
     # BaseBleakClient interface
     
@@ -226,12 +503,12 @@ class EasyBleakClient(GATT_Dict):
         return await self._bleakClient.read_gatt_char(uuid)
 
     @syncCall
-    async def write_gatt_char(self, uuid: Union[BleakGATTCharacteristic, int, str, UUID], data: bytearray):
+    async def write_gatt_char(self, uuid: Union[BleakGATTCharacteristic, int, str, UUID], data: bytearray, response: bool = False):
         """! @brief Not recommended, use \ref write instead! Writes a value to a characteristic
             Calls the same method of the BleakClient class. This method is not safe in case of disconnections without notice,
             thus it is recommended to use the method \ref write with safe access instead.
         """
-        await self._bleakClient.write_gatt_char(uuid, data)
+        await self._bleakClient.write_gatt_char(uuid, data, response)
                            
     @syncCall
     async def read_gatt_descriptor(self, handle: int) -> bytearray:
@@ -259,6 +536,41 @@ class EasyBleakClient(GATT_Dict):
         """! @brief Removes a notification callback method and stops notifications"""        
         await self._bleakClient.stop_notify(uuid)
          
+    @syncCall
+    async def bufferNotifications(self, uuid: Union[BaseService, BleakGATTCharacteristic, str, UUID], capacity: int = 256, overflow: Overflow = Overflow.DROP_OLDEST) -> NotificationBuffer:
+        """! @brief Starts notifications on a characteristic, memorizing them within a bounded buffer instead of calling a handler
+             The notifications are consumed in batches by \ref drainNotifications. See ExtBleakClient.bufferNotifications.
+        """
+        return await self._bleakClient.bufferNotifications(uuid, capacity, overflow)
+
+    @syncCall
+    async def drainNotifications(self, uuid: Union[BaseService, BleakGATTCharacteristic, str, UUID], maxItems: Union[int, None] = None, timeOut: float = 0.0) -> [tuple]:
+        """! @brief Removes and returns the buffered notifications of a characteristic as list of (timestamp, data) tuples, oldest first
+             Like \ref getNotifications the loop receives notifications during the call, up to 'timeOut' seconds if none is buffered.
+        """
+        return await self._bleakClient.drainNotifications(uuid, maxItems, timeOut)
+
+    def notifications(self, uuid: Union[BaseService, BleakGATTCharacteristic, str, UUID], decoder = None, capacity: int = 256, overflow: Overflow = Overflow.DROP_OLDEST, waitTime: float = 1.0):
+        """! @brief Generator of the notifications of a characteristic as (timestamp, value) tuples
+             The notifications are buffered and received while the generator waits for the next value (see \ref drainNotifications).
+             The stream ends on disconnection. Closing the generator stops the notifications. Requires a connection by \ref connect.
+             @code{.py}
+             for timestamp, value in client.notifications(BatteryService.LEVEL):
+                 print(timestamp, value)
+             @endcode
+             @param decoder Function converting the notification bytearray into the value. 'None' uses the type of a characteristic passed as BaseService.
+             @param waitTime Maximum time in seconds the loop receives notifications within a single call
+        """
+        decode = ExtBleakClient._decoder_(uuid, decoder)
+        buffer = self.bufferNotifications(uuid, capacity, overflow)
+        try:
+            while self.is_connected or len(buffer) > 0:
+                for timestamp, data in self.drainNotifications(uuid, None, waitTime):
+                    yield timestamp, decode(data)
+        finally:
+            if self.is_connected:
+                self.stop_notify(uuid)
+
     @syncCall
     async def get_services(self) -> bleak.backends.service.BleakGATTServiceCollection:
         """! @brief Receives services, characteristics and descriptors from the remote device """
@@ -3,7 +3,47 @@
 """!
 @file  EasyBleakScanner.py
 
-@brief Provides an easy to use BLE devices scanner 
+@brief Provides an easy to use BLE devices scanner
+
+The scanner filters the advertisements by MAC addresses, service UUIDs and name prefixes and reports each device once,
+or again if its advertised content changes. The reported \ref Advertisement objects are delivered by a synchronous or
+asynchronous generator. Scanning stops as soon as all wanted devices are found, instead of waiting for the time out:
+
+@code{.py}
+scanner = EasyBleakScanner(addresses=["54:6C:0E:52:C7:84"])
+found = scanner.scan(timeOut=5.0)           # returns after the first advertisement of the device
+
+for advertisement in EasyBleakScanner(namePrefix="CC2650").advertisements(timeOut=10.0):
+    print(advertisement)
+
+async for advertisement in EasyBleakScanner(serviceUUIDs=[0x180a]).as_advertisements():   # continuous scanning
+    print(advertisement.address, advertisement.rssi)
+@endcode
+
+Many devices broadcast their measurements within the manufacturer or service data of their advertisements. Decoders
+registered by company identifier or service UUID turn these payloads into \ref Reading objects without any connection.
+A decoder is a function(bytes) or a \ref CharacteristicType, whose 'from_bytearray' conversion is used:
+
+@code{.py}
+EasyBleakScanner.registerDecoder(CharacteristicType(None, format="<BhH", scale=(1, 0.01, 0.01)), companyId=0x0059)
+for reading in EasyBleakScanner().readings(timeOut=60.0):
+    print(reading.address, reading.value, reading.rssi, reading.time)
+@endcode
+
+Scanning, preferably passive, receives hundreds of devices with a single adapter, whereas an adapter connects to only a
+few devices at once. BlueZ scans passively only with an advertisement monitor pattern and without 'serviceUUIDs', e.g.
+for the manufacturer data of the company above (little endian company identifier at the start of the data):
+
+@code{.py}
+from bleak.assigned_numbers import AdvertisementDataType
+from bleak.backends.bluezdbus.advertisement_monitor import OrPattern
+
+pattern = OrPattern(0, AdvertisementDataType.MANUFACTURER_SPECIFIC_DATA, b"\x59\x00")
+scanner = EasyBleakScanner(scanning_mode="passive", bluez={"or_patterns": [pattern]})
+@endcode
+
+Every received advertisement, also of devices not passing the filters, is recorded within a \ref presence.PresenceRegistry,
+which clients ask whether a device is reachable before connecting (see ExtBleakClient.usePresence).
 
 @section Requirements \n
 
@@ -13,6 +53,7 @@ Installation and usage is described at https://bleak.readthedocs.io/en/latest/in
 """
 
 import asyncio
+import time
 from typing import Union
 from uuid import UUID
 import bleak
@@ -25,32 +66,269 @@ from bleak import BleakScanner #, BleakClient, exc
 # from dbus_next.signature import Variant
 # from bleak.backends.bluezdbus.utils import assert_reply
 
+if __package__:
+    from me2grid.easybleak.gatt import BaseService, CharacteristicType, normalizeUUID
+    from me2grid.easybleak import presence
+else: # Necessary, to run this file directly
+    from gatt import BaseService, CharacteristicType, normalizeUUID
+    import presence
+
+class Advertisement():
+    """! @brief Advertisement of a device reported by the \ref EasyBleakScanner
+        @param device The bleak BLEDevice
+        @param advertisementData The bleak AdvertisementData
+    """
+    def __init__(self, device, advertisementData):
+        self.device = device
+        self.advertisementData = advertisementData
+        self.address = device.address.upper()
+        self.name = advertisementData.local_name or device.name         #!> Advertised local name, 'None' if not advertised
+        self.rssi = advertisementData.rssi                              #!> RSSI in dBm
+        self.serviceUUIDs = [uuid.lower() for uuid in advertisementData.service_uuids]
+        self.manufacturerData = dict(advertisementData.manufacturer_data)   #!> company identifier -> bytes
+        self.serviceData = dict(advertisementData.service_data)             #!> service UUID -> bytes
+        self.time = time.monotonic()                                    #!> Monotonic time of the reception
+        self.readings = []      #!> \ref Reading objects decoded from the manufacturer and service data
+
+    @property
+    def content(self) -> tuple:
+        """! @brief Returns the advertised content without the RSSI, equal for repeated advertisements """
+        return (self.name, tuple(sorted(self.serviceUUIDs)), tuple(sorted(self.manufacturerData.items())), tuple(sorted(self.serviceData.items())))
+
+    def __str__(self):
+        return f"Advertisement({self.address}, name={self.name!r}, rssi={self.rssi} dBm, services={self.serviceUUIDs})"
+
+class Reading():
+    """! @brief Value decoded from the manufacturer or service data of an advertisement
+        @param advertisement The \ref Advertisement the value was received with
+        @param source The company identifier (int) or the service UUID (str) of the decoded data
+        @param value The value returned by the decoder
+    """
+    def __init__(self, advertisement: Advertisement, source: Union[int, str], value):
+        self.address = advertisement.address
+        self.name = advertisement.name
+        self.rssi = advertisement.rssi          #!> RSSI in dBm of the advertisement
+        self.time = advertisement.time          #!> Monotonic time of the reception
+        self.source = source
+        self.value = value
+
+    def __str__(self):
+        source = "0x%04x" % self.source if isinstance(self.source, int) else self.source
+        return f"Reading({self.address}, {source}: {self.value}, rssi={self.rssi} dBm)"
+
 class EasyBleakScanner(BleakScanner):
+    """! @brief Scanner reporting filtered and deduplicated advertisements
+        A device is reported if it passes all given filters.
+        @param addresses MAC addresses of the wanted devices. Scanning stops as soon as all of them are reported.
+        @param serviceUUIDs Service UUIDs in any form accepted by \ref normalizeUUID, or service enumerations (see \ref BaseService),
+        of which a device has to advertise at least one. They are passed to bleak, which filters by the operating system if supported.
+        @param namePrefix Prefix or list of prefixes of the advertised name
+        @param deduplicate If 'True' a device is reported again only if its advertised content changes, not at each advertisement
+        @param callback Function(advertisement) called for each reported \ref Advertisement
+        @param manufacturerDecoders Dictionary of company identifiers and decoders used by this scanner in addition to the registered ones
+        @param serviceDecoders Dictionary of service UUIDs and decoders used by this scanner in addition to the registered ones
+        @param presenceRegistry The \ref presence.PresenceRegistry recording all received advertisements. 'None' records none.
+        @param queueSize Maximum number of reported advertisements waiting for the generators (see \ref as_advertisements). If the
+        consumer falls behind, the oldest one is discarded and counted as 'dropped'.
+        @param kwargs Further arguments of BleakScanner, e.g. 'adapter="hci1"', 'scanning_mode="passive"' (requiring 'bluez={"or_patterns": ...}'
+        on BlueZ) or 'backend=simulation.SimulatedBleakScanner'
+    """
+    manufacturerDecoders = {}   #!> company identifier -> decoder function(bytes) used by all scanners, see \ref registerDecoder
+    serviceDecoders = {}        #!> service UUID -> decoder function(bytes) used by all scanners, see \ref registerDecoder
+
+    def __init__(self, addresses: Union[list, None] = None, serviceUUIDs: Union[list, None] = None, namePrefix: Union[str, list, None] = None,
+                 deduplicate: bool = True, callback = None, manufacturerDecoders: Union[dict, None] = None, serviceDecoders: Union[dict, None] = None,
+                 presenceRegistry: Union[presence.PresenceRegistry, None] = presence.registry, queueSize: int = 256, **kwargs):
+        self.addresses = {address.upper() for address in addresses} if addresses else None
+        self.serviceUUIDs = {self.__serviceUUID__(uuid) for uuid in serviceUUIDs} if serviceUUIDs else None
+        self.namePrefix = (namePrefix,) if isinstance(namePrefix, str) else (tuple(namePrefix) if namePrefix else None)
+        self.deduplicate = deduplicate
+        self.callback = callback
+        self.found = {}         #!> address -> latest \ref Advertisement of the devices passing the filters
+        self.decodeErrors = 0   #!> Number of payloads a decoder raised an exception for
+        self.presenceRegistry = presenceRegistry
+        self.__manufacturerDecoders = {companyId: self.__decoder__(decoder) for companyId, decoder in (manufacturerDecoders or {}).items()}
+        self.__serviceDecoders = {normalizeUUID(uuid): self.__decoder__(decoder) for uuid, decoder in (serviceDecoders or {}).items()}
+        self.__contents = {}    # address -> content of the latest reported advertisement
+        self.queueSize = queueSize
+        self.dropped = 0        #!> Number of reported advertisements discarded, as the generator consumer fell behind
+        self.__queue = None     # Reported advertisements waiting for the generator
+        super().__init__(self.detection_callback, sorted(self.serviceUUIDs) if self.serviceUUIDs else None, **kwargs)
+
+    @classmethod
+    def registerDecoder(cls, decoder, companyId: Union[int, None] = None, serviceUUID: Union[str, int, UUID, None] = None):
+        """! @brief \b static Registers the decoder of the manufacturer data of a company or of the service data of a service for all scanners
+            @param decoder Function(bytes) returning the decoded value or 'None' for payloads it does not decode, a
+            \ref CharacteristicType or a characteristic of a \ref BaseService. 'None' removes the decoder.
+        """
+        if (companyId is None) == (serviceUUID is None):
+            raise ValueError("Either 'companyId' or 'serviceUUID' has to be given!")
+        decoders, key = (cls.manufacturerDecoders, companyId) if companyId is not None else (cls.serviceDecoders, normalizeUUID(serviceUUID))
+        if decoder is None:
+            decoders.pop(key, None)
+        else:
+            decoders[key] = cls.__decoder__(decoder)
+
+    @staticmethod
+    def __decoder__(decoder):
+        """! @brief \b private Returns the conversion function of a decoder """
+        if isinstance(decoder, BaseService):
+            decoder = decoder.value
+        if isinstance(decoder, CharacteristicType):
+            return decoder.from_bytearray
+        if not callable(decoder):
+            raise TypeError(f"The decoder {decoder!r} is neither callable nor a CharacteristicType!")
+        return decoder
+
+    def decode(self, advertisement: Advertisement) -> [Reading]:
+        """! @brief Returns the readings decoded from the manufacturer and service data of the advertisement by the registered decoders """
+        readings = []
+        for payloads, ownDecoders, sharedDecoders in ((advertisement.manufacturerData, self.__manufacturerDecoders, self.manufacturerDecoders),
+                                                      (advertisement.serviceData, self.__serviceDecoders, self.serviceDecoders)):
+            for source, payload in payloads.items():
+                decoder = ownDecoders.get(source) or sharedDecoders.get(source)
+                if decoder is None:
+                    continue
+                try:
+                    value = decoder(bytes(payload))
+                except Exception:   # A malformed payload of a single device must not stop the scan
+                    self.decodeErrors = self.decodeErrors + 1
+                    continue
+                if value is not None:
+                    readings.append(Reading(advertisement, source, value))
+        return readings
+
+    @staticmethod
+    def __serviceUUID__(uuid) -> str:
+        if isinstance(uuid, type) and issubclass(uuid, BaseService):
+            uuid = uuid.uuidService()
+        return normalizeUUID(uuid)
+
+    def matches(self, device, advertisementData) -> bool:
+        """! @brief Returns 'True' if the advertisement of the device passes the filters """
+        if self.addresses is not None and device.address.upper() not in self.addresses:
+            return False
+        if self.serviceUUIDs is not None and self.serviceUUIDs.isdisjoint(uuid.lower() for uuid in advertisementData.service_uuids):
+            return False
+        if self.namePrefix is not None and not (advertisementData.local_name or device.name or "").startswith(self.namePrefix):
+            return False
+        return True
+
+    def _connectable_(self, device, advertisementData) -> Union[bool, None]:
+        """! @brief \b protected Returns whether the advertisement is connectable, 'None' if the backend does not report it
+            The backends of bleak report the flag within their platform specific data only, if at all. Backends providing
+            a dictionary with key 'connectable' are supported, e.g. the simulated one.
+        """
+        for data in advertisementData.platform_data:
+            if isinstance(data, dict) and "connectable" in data:
+                return bool(data["connectable"])
+        return None
+
     def detection_callback(self, device, advertisement_data):
-        # print("Notification of ", device.address, " ", device.name)
-        return
-
-    def __init__(self):
-        super().__init__()
-        self.register_detection_callback(self.detection_callback)
-       
-    async def as_scan(self):
-        # await self.discover()
+        if self.presenceRegistry is not None:
+            self.presenceRegistry.observe(device.address, advertisement_data.rssi, advertisement_data.local_name or device.name,
+                                          self._connectable_(device, advertisement_data))
+        if not self.matches(device, advertisement_data):
+            return
+        advertisement = Advertisement(device, advertisement_data)
+        previous = self.found.get(advertisement.address)
+        self.found[advertisement.address] = advertisement
+        if self.deduplicate:
+            content = advertisement.content
+            if self.__contents.get(advertisement.address) == content:
+                advertisement.readings = previous.readings      # Unchanged payload, not decoded again
+                return
+            self.__contents[advertisement.address] = content
+        advertisement.readings = self.decode(advertisement)
+        if self.__queue is not None:
+            if self.__queue.full():
+                dropped = self.__queue.get_nowait()     # The oldest, the consumer has fallen behind
+                self.__contents.pop(dropped.address, None)  # Reported again with its next advertisement
+                self.dropped = self.dropped + 1
+            self.__queue.put_nowait(advertisement)
+        if self.callback is not None:
+            self.callback(advertisement)
+
+    async def as_advertisements(self, timeOut: Union[float, None] = None, count: Union[int, None] = None):
+        """! @brief Asynchronous generator of the reported advertisements, scanning while the generator runs
+            Scanning stops after 'timeOut' seconds, after 'count' different devices are reported, if all devices of
+            'addresses' are reported, or if the caller stops the iteration.
+            @param timeOut Maximum scanning time in seconds. 'None' scans continuously.
+            @param count Number of different devices after which scanning stops. 'None' for no limit.
+            Up to 'queueSize' advertisements wait for the consumer, further ones discard the oldest (see 'dropped').
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeOut is None else loop.time() + timeOut
+        reported = set()
+        self.found.clear()
+        self.__contents.clear()
+        self.__queue = asyncio.Queue(self.queueSize)
         await self.start()
-        await asyncio.sleep(5)
-        await self.stop()
-        #async with self as _:
-        #   await asyncio.sleep(5)
-        
-    def scan(self):
-        print("Scanning BLE for 5 s ...")
-        asyncio.run(self.as_scan())
-        print("Discovered devices:")
-        for d in self.discovered_devices:
-            print(d)
-        print("Scanning BLE finished")
-       
+        try:
+            while not self.__complete__(reported, count):
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0.0:
+                    break
+                try:
+                    advertisement = await asyncio.wait_for(self.__queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                reported.add(advertisement.address)
+                yield advertisement
+        finally:
+            self.__queue = None
+            await self.stop()
+
+    def __complete__(self, reported: set, count: Union[int, None]) -> bool:
+        return (count is not None and len(reported) >= count) or (self.addresses is not None and self.addresses.issubset(reported))
+
+    async def as_readings(self, timeOut: Union[float, None] = None, count: Union[int, None] = None):
+        """! @brief Asynchronous generator of the \ref Reading objects decoded from the reported advertisements, see \ref as_advertisements """
+        async for advertisement in self.as_advertisements(timeOut, count):
+            for reading in advertisement.readings:
+                yield reading
+
+    def advertisements(self, timeOut: Union[float, None] = None, count: Union[int, None] = None):
+        """! @brief Synchronous generator of the reported advertisements, see \ref as_advertisements
+            The scan runs within a local event loop, which is executed while the generator waits for the next advertisement.
+        """
+        loop = asyncio.new_event_loop()
+        generator = self.as_advertisements(timeOut, count)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(generator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(generator.aclose())
+            loop.close()
+
+    def readings(self, timeOut: Union[float, None] = None, count: Union[int, None] = None):
+        """! @brief Synchronous generator of the \ref Reading objects decoded from the reported advertisements, see \ref as_advertisements """
+        for advertisement in self.advertisements(timeOut, count):
+            yield from advertisement.readings
+
+    async def as_scan(self, timeOut: float = 5.0, count: Union[int, None] = None) -> dict:
+        """! @brief Scans until the time out or the wanted devices are found (see \ref as_advertisements)
+            @returns Dictionary of MAC addresses and the latest \ref Advertisement of the found devices
+        """
+        async for advertisement in self.as_advertisements(timeOut, count):
+            pass
+        return dict(self.found)
+
+    def scan(self, timeOut: float = 5.0, count: Union[int, None] = None) -> dict:
+        """! @brief Synchronous version of \ref as_scan """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.as_scan(timeOut, count))
+        finally:
+            loop.close()
+
 
 if __name__ == '__main__':
-    scann = EasyBleakScanner()
-    scanner.scan()
+    scanner = EasyBleakScanner()
+    print("Scanning BLE for 5 s ...")
+    for advertisement in scanner.advertisements(timeOut=5.0):
+        print(advertisement)
+    print("Scanning BLE finished")
@@ -9,6 +9,8 @@ Installation and usage is described at https://bleak.readthedocs.io/en/latest/in
 """
 
 import asyncio
+import inspect
+import time
 import bleak
 
 #from enum import Enum
@@ -17,14 +19,24 @@ from uuid import UUID
 from bleak.backends.characteristic import BleakGATTCharacteristic
 from bleak import BleakClient
 
-try: # Necessary, to run this file directly
-    from gatt import versionEasyBleak, BaseService, CharacteristicType, ClassServices
-    from gatt_services import GenericAccessService, GenericAttributeProfileService, GenericDescriptors, DeviceInformationService, BatteryService
-    from gatt import versionEasyBleak, BaseService, CharacteristicType, ClassServices
-except:
+if __package__:
     from me2grid.easybleak.gatt import versionEasyBleak, BaseService, CharacteristicType, ClassServices
     from me2grid.easybleak.gatt_services import GenericAccessService, GenericAttributeProfileService, GenericDescriptors, DeviceInformationService, BatteryService
-    from me2grid.easybleak.gatt import versionEasyBleak, BaseService, CharacteristicType, ClassServices
+    from me2grid.easybleak.RequestEngine import RequestEngine, RequestCorrelator
+    from me2grid.easybleak.cache import CharacteristicCache, ServiceCache
+    from me2grid.easybleak.retry import RetryPolicy
+    from me2grid.easybleak.notifications import NotificationBuffer, Overflow
+    from me2grid.easybleak import metrics
+    from me2grid.easybleak import presence
+else: # Necessary, to run this file directly
+    from gatt import versionEasyBleak, BaseService, CharacteristicType, ClassServices
+    from gatt_services import GenericAccessService, GenericAttributeProfileService, GenericDescriptors, DeviceInformationService, BatteryService
+    from RequestEngine import RequestEngine, RequestCorrelator
+    from cache import CharacteristicCache, ServiceCache
+    from retry import RetryPolicy
+    from notifications import NotificationBuffer, Overflow
+    import metrics
+    import presence
 
 class GATT_Dict():
     """! @brief This class holds the predifined GATT characteristic of an BLE device
@@ -48,27 +60,60 @@ class GATT_Dict():
         """! @brief \b static Returns a new 'ClassService' instance containing the GATT_Dict objects dictionary updated by the passed serviceDict
         """
         ret = ClassServices(cls.__services__)
-        ret.update(serviceDict)
+        ret.update(serviceDict)     # Refreshes the UUID index of the new dictionary
         return ret
     
         cls.__services__ .update(serviceDict)
 
     @classmethod
-    def fromUUID(cls, uuid:str):
-        """! @brief Deliveres the enumeration entity or the enumeration itself of a given UUID string """
-        for t in cls.__services__.items():
-            value = t[1]
-            if value.uuidService() == uuid:
-                return value
-            for char in value:
-                if char.uuid == uuid:
-                    return char
-        return None
+    def fromUUID(cls, uuid: Union[str, int, UUID]):
+        """! @brief Deliveres the enumeration entity or the enumeration itself of a given UUID
+            The UUID may be given as 16 bit, 32 bit or 128 bit form in any capitalization, see \ref ClassServices.fromUUID.
+        """
+        return cls.__services__.fromUUID(uuid)
     
     @classmethod
     def version(cls):
         return versionEasyBleak
 
+class NotificationSettleTime():
+    """! @brief Per device model of the delay required between stopping and restarting a notification
+        Some devices, e.g. the EQ3 CC_RT_BLE, do not accept a new start_notify immediately after a stop_notify. In case of
+        'fixed' the passed value is used as a device profile value. Otherwise the minimum working delay is learned by
+        bisection between the largest delay known to fail and the smallest delay known to work, starting from 'value'.
+        @param value Delay in seconds known (or assumed) to work
+        @param fixed If 'True' the value is not changed by learning
+        @param resolution Learning stops as soon as the working and the failing delay differ less than this value in seconds
+    """
+    def __init__(self, value: float = 1.0, fixed: bool = False, resolution: float = 0.05):
+        self.value = value
+        self.fixed = fixed
+        self.resolution = resolution
+        self.__failed = 0.0
+
+    def __str__(self):
+        return "NotificationSettleTime(value={0}, fixed={1})".format(self.value, self.fixed)
+
+    @property
+    def trial(self) -> float:
+        """! @brief The delay to be used for the next restart """
+        if self.fixed or self.value - self.__failed <= self.resolution:
+            return self.value
+        return (self.value + self.__failed) / 2
+
+    def succeeded(self, delay: float):
+        """! @brief To be called after the notification restarted with the passed delay has delivered data """
+        if not self.fixed and delay < self.value:
+            self.value = delay
+
+    def failed(self, delay: float):
+        """! @brief To be called after the notification restarted with the passed delay failed """
+        if self.fixed:
+            return
+        self.__failed = max(self.__failed, delay)
+        if self.__failed >= self.value:     # The device has changed its behavior
+            self.value = max(2 * self.__failed, self.resolution)
+
 class ExtBleakClient(BleakClient, GATT_Dict):
     """! @brief Extends the BleakClient from the 'bleak' library
          
@@ -117,10 +162,15 @@ class ExtBleakClient(BleakClient, GATT_Dict):
 
         @ section SEC_READWRITE Disconnection safe methods 'read', 'write', 'request' and 'disconnect'
 
-        The methods \ref read and \ref write provide an error free access to characteristics. A (single) reconnection will be executed,
+        The methods \ref read and \ref write provide an error free access to characteristics. A reconnection will be executed,
         in case the external device disconnected without notice in the meantime.The methods are functional identical to
         'read_gatt_char' and 'write_gatt_char' of the 'BleakClient' base class. In case the reconnection fails an EOFError
-        is raised.
+        is raised. \n
+        Characteristics declaring 'response=False' (see \ref gatt.CharacteristicType) are written without response, which saves
+        the acknowledgement round trip on hot actuator paths. Those declaring 'coalesce=True' send only the latest value, if
+        writes arrive faster than the link transmits them. \n
+        The member 'retryPolicy' (see \ref retry.RetryPolicy) decides which errors are retried, how often and with which
+        delay. It is used by \ref read, \ref write, \ref request and \ref start_notify. By default a single retry is done.
 
         @ section TYPE_READWRITE The methods 'read' and 'write' use characteristic specific types ('str', 'int') instead of just 'bytearray'.
 
@@ -144,6 +194,49 @@ class ExtBleakClient(BleakClient, GATT_Dict):
         asyncio.run(main())
         @ endcode
         
+        @ section SEC_CACHE Characteristic value cache
+
+        After calling \ref useCache values of characteristics declaring a 'cache' time (see \ref gatt.CharacteristicType) are
+        delivered from the cache instead of a radio transaction, e.g. DeviceInformationService.MODEL. Writes invalidate and
+        notifications refresh the cached value. Hits and misses are counted by the 'cache' member. \n
+        After calling \ref useServiceCache the service table of the device is stored on disk. Reconnecting to a known device
+        then skips waiting for the service discovery, if the bleak backend allows it (BlueZ 'dangerous_use_bleak_cache').
+        The services skipping the discovery are kept by bleak within the running process only, thus the first connect of
+        a process always discovers them. The stored table only spares reading the firmware revision and rewriting the file
+        while the services are unchanged.
+
+        @ section SEC_BUFFER Buffered notifications
+
+        Instead of calling a handler for each notification, \ref bufferNotifications memorizes the notifications of a
+        characteristic within a bounded \ref notifications.NotificationBuffer. \ref drainNotifications returns them in
+        batches of (timestamp, data) tuples. The overflow policy of a full buffer is configurable and dropped
+        notifications are counted, thus a slow consumer neither grows the memory nor stalls the loop. \n
+        \ref notifications deliveres the buffered notifications as asynchronous stream of decoded values:
+
+        @ code{.py}
+        async for timestamp, value in client.notifications(BatteryService.LEVEL):
+            print(timestamp, value)
+        @ endcode
+
+        @ section SEC_ADAPTERS Several Bluetooth adapters
+
+        A client created by a \ref DeviceManager.DeviceManager connects through the adapter the manager assigns by RSSI
+        and load. If connecting fails, the next best adapter is tried. The member 'adapter' holds the adapter used.
+
+        @ section SEC_PRESENCE Presence
+
+        A client using a \ref presence.PresenceRegistry (see \ref usePresence), filled by a running \ref EasyBleakScanner, raises
+        a BleakError at once on its first connect to a device not advertising recently, instead of waiting for the connect time out.
+        Reconnects, e.g. by retries, keep alive or connect per call, are not checked, as a connected device usually stops
+        advertising. The connects and disconnects of the client are recorded as presence instead. The fast failures are
+        counted as 'connect_unreachable', not as connect latency. \ref isReachable asks the registry without connecting.
+
+        @ section SEC_METRICS Metrics
+
+        Each client records the durations of connect, service discovery, read, write and request operations, the number of
+        retries, notifications and disconnects within the \ref metrics.DeviceMetrics of its device (member 'metrics').
+        \ref stats returns them as dictionary, 'metrics.prometheusText()' exports those of all devices.
+
         @ section SEC_REQUEST Method 'request'
 
         The 'ExtBleakClient' deliveres a 'request' method. This method simplifies the communication technique
@@ -158,160 +251,596 @@ class ExtBleakClient(BleakClient, GATT_Dict):
         await myExtBleakClient.connect()
         print( await myExtBleakClient.read(myExtBleakClient.gatt['DeviceInformation'].MODEL.uuid )
     """
-    def __init__(self, mac: str):
+    def __init__(self, mac: str, **kwargs):
         """! @brief Initialization
         @param mac String representing the bluetooth mac address (e.g. '00:1A:22:12:0F:87')of the device this instance is representing 
+        @param kwargs Further arguments of 'BleakClient', e.g. 'backend=simulation.SimulatedBleakClient' or 'timeout'
         """
-        super().__init__(mac)
+        super().__init__(mac, self.__onDisconnected__, **kwargs)
+        self.metrics = metrics.registry.device(mac)     #!> Latency and event metrics of the device, see \ref metrics.DeviceMetrics
+        self.__timeServiceDiscovery__()
+        self.__backendArguments = {key: value for key, value in kwargs.items() if key != "backend"}    # see _useAdapter_
+        self.adapter = kwargs.get("adapter")    #!> Name of the Bluetooth adapter used, 'None' for the default adapter
+        self.deviceManager = None   #!> The \ref DeviceManager.DeviceManager assigning the adapter on connecting, if managed
         self.requestCommandUUID = None
         self.requestResponseUUID = None
         self.requestNotificationStarted = None
         self.requestNotifycationResult = None
         self.requestTimeOut = 1.0
         self.requestResponseTime = 0.0
+        self.requestEngine = RequestEngine(self.__writeCommand__)
+        self.notificationSettleTime = NotificationSettleTime()  #!> Delay between stopping and restarting the response notification
+        self.__notifyingUUID = None
+        self.__notificationStopTime = None
+        self.__settleTrial = None
+        self.cache = None   #!> The characteristic value cache, see \ref useCache
+        self.__characteristics = {}     # Index of the connected device: uuid -> BleakGATTCharacteristic, None for ambiguous uuids
+        self.serviceCache = None        #!> The persistent service table cache, see \ref useServiceCache
+        self.retryPolicy = RetryPolicy()    #!> Retry policy of transient errors, see \ref retry.RetryPolicy
+        self.__connectLock = None
+        self.__buffers = {}     # uuid -> NotificationBuffer, see bufferNotifications
+        self.__connectLoop = None
+        self.__connectionLost = False
+        self.__disconnecting = False
+        self.__disconnectedCallback = None
+        self.__pendingWrites = {}       # uuid -> [latest value, future], see __coalescedWrite__
+        self.presence = None            #!> The \ref presence.PresenceRegistry checked before connecting, see \ref usePresence
+        self.presenceMaxAge = None      #!> Time in seconds without advertisement after which connecting fails, 'None' for the registry estimate
+        self.__connectedOnce = False    # Only the first connect is checked against the presence registry
 
     def __destroy__(self):
         if self.is_connected:
             raise BleakError(f"Recource leak because {self.__class__} BLE 'bleak' client has not been disconnected before object destruction!") 
         super().__destroy__()
     
+    async def connect(self, **kwargs) -> bool:
+        """! @brief Connects to the device and indexes its characteristics by UUID
+            In case the service cache is used and the device is known, the backend is asked to use its cached services.
+        """
+        record = None
+        if self.serviceCache is not None:
+            record = self.serviceCache.load(self.address)
+            if record is not None and "dangerous_use_bleak_cache" in inspect.signature(self._backend.connect).parameters:
+                kwargs.setdefault("dangerous_use_bleak_cache", True)
+        if self.presence is not None and not self.__connectedOnce:
+            reason = self.presence.reason(self.address, self.presenceMaxAge)
+            if reason is not None:
+                self.metrics.count("connect_unreachable")
+                raise bleak.exc.BleakError(f"Device {self.address} is not reachable ({reason}), connecting is not attempted.")
+        with self.metrics.timer("connect"):
+            result = await self.__connect__(**kwargs)
+        self.__connectedOnce = True
+        if self.presence is not None:
+            self.presence.connected(self.address)
+        self.__indexCharacteristics__()
+        if self.serviceCache is not None:
+            if not await self.__updateServiceCache__(record, kwargs.get("dangerous_use_bleak_cache", False)):
+                # The services of the backend cache differ from the stored ones, e.g. updated by another process
+                await super().disconnect()
+                kwargs["dangerous_use_bleak_cache"] = False
+                result = await self.__connect__(**kwargs)     # The disconnect has freed the connection of the device manager
+                self.__indexCharacteristics__()
+                await self.__updateServiceCache__(None, False)
+        return result
+
+    async def __connect__(self, **kwargs) -> bool:
+        """! @brief \b private Connects through the adapter the device manager assigns, trying the next best adapter on failures """
+        manager = self.deviceManager
+        if manager is None:
+            return await super().connect(**kwargs)
+        tried = []
+        while True:
+            adapter = manager._assign_(self.address, tried)
+            if adapter != self.adapter:
+                self._useAdapter_(adapter)
+            tried.append(adapter)
+            try:
+                result = await super().connect(**kwargs)
+            except Exception as e:
+                if not manager._failed_(self.address, adapter, tried):
+                    raise e
+                continue
+            manager._connected_(self.address, adapter)
+            return result
+
+    def _useAdapter_(self, adapter: str):
+        """! @brief \b protected Moves the disconnected client to another Bluetooth adapter, e.g. 'hci1'
+            The backend is recreated with the arguments the client was created with.
+        """
+        if self.is_connected:
+            raise bleak.exc.BleakError(f"The client of {self.address} must be disconnected before changing the adapter!")
+        arguments = dict(self.__backendArguments, adapter=adapter)
+        arguments.setdefault("timeout", 10.0)
+        arguments.setdefault("winrt", {})
+        self._backend = type(self._backend)(self.address, disconnected_callback=self.__onDisconnected__, **arguments)
+        self.__timeServiceDiscovery__()
+        self.adapter = adapter
+
+    def __timeServiceDiscovery__(self):
+        """! @brief \b private Records each service discovery of the backend as 'services' latency
+            The backend discovers the services within its connect, which does not pass 'get_services' of this client.
+            Therefore the method of the backend instance is wrapped.
+        """
+        discover = self._backend.get_services
+        async def get_services(**kwargs):
+            with self.metrics.timer("services"):
+                return await discover(**kwargs)
+        self._backend.get_services = get_services
+
+    async def __updateServiceCache__(self, record: Union[dict, None], servicesFromCache: bool) -> bool:
+        """! @brief \b private Stores the service table of the connected device with its firmware revision, if it differs from the passed stored record
+            An unchanged table costs neither a GATT read nor a file write.
+            @returns 'False' if the services have been taken from the backend cache but differ from the stored record
+        """
+        table = ServiceCache.table(self.services)
+        if record is not None and record.get("services") == table:
+            return True
+        if servicesFromCache:
+            return False
+        firmware = None
+        char = self.__characteristics.get(DeviceInformationService.FIRMWARE.uuid)
+        if char is not None and "read" in char.properties:
+            firmware = DeviceInformationService.FIRMWARE.value.from_bytearray(await self.read_gatt_char(char))
+        self.serviceCache.store(self.address, table, firmware)
+        return True
+
     async def disconnect(self):        
+        self.requestEngine.cancelAll()
         await self.__stopResponseNotification__()
+        self.__characteristics = {}
+        self.__disconnecting = True
+        connected = self.is_connected
         try:
             await super().disconnect()
         except EOFError:    # Needed, in case the external device has already disconnected without notice.
             pass
+        finally:
+            self.__disconnecting = False
+            if self.presence is not None and connected:
+                self.presence.connected(self.address)
+            if self.deviceManager is not None:
+                self.deviceManager._disconnected_(self.address)
+
+    def set_disconnected_callback(self, callback, **kwargs):
+        """! @brief Sets the callback called with this client on disconnection, see 'BleakClient.set_disconnected_callback' """
+        self.__disconnectedCallback = callback
+
+    def __onDisconnected__(self, client):
+        """! @brief \b private Counts the disconnect by its reason and calls the application callback """
+        self.metrics.disconnected("requested" if self.__disconnecting else "remote")
+        if self.presence is not None:
+            self.presence.connected(self.address)
+        if self.deviceManager is not None:
+            self.deviceManager._disconnected_(self.address)
+        if self.__disconnectedCallback is not None:
+            self.__disconnectedCallback(self)
+
+    def __onRetry__(self, attempt: int, error: BaseException):
+        """! @brief \b private Called by the retry policy before each repetition """
+        self.metrics.count("retries")
+        if isinstance(error, EOFError):
+            self.__connectionLost = True    # The device disconnected without notice, see __reconnect__
+
+    def stats(self) -> dict:
+        """! @brief Returns the metrics of the device as dictionary, see \ref metrics.DeviceMetrics.stats """
+        return self.metrics.stats()
+
+    async def get_services(self, **kwargs) -> bleak.backends.service.BleakGATTServiceCollection:
+        """! @brief Receives services, characteristics and descriptors from the remote device and renews the characteristic index """
+        services = await super().get_services(**kwargs)     # Timed by the backend, see __timeServiceDiscovery__
+        self.__indexCharacteristics__()
+        return services
+
+    def __indexCharacteristics__(self):
+        """! @brief \b private Builds the UUID to characteristic object index from the services of the connected device
+            Passing characteristic objects to bleak avoids searching the service collection at each access.
+        """
+        index = {}
+        services = self.services
+        if services is not None:
+            for char in services.characteristics.values():
+                key = char.uuid.lower()
+                index[key] = None if key in index else char     # Ambiguous UUIDs are left to bleak
+        self.__characteristics = index
+
+    def _characteristic_(self, uid: Union[BleakGATTCharacteristic, int, str, UUID]) -> Union[BleakGATTCharacteristic, int, str, UUID]:
+        """! @brief \b protected Returns the characteristic object of a UUID, or the passed specifier if it is not indexed """
+        if isinstance(uid, (str, UUID)):
+            char = self.__characteristics.get(str(uid).lower())
+            if char is not None:
+                return char
+        return uid
         
     async def read(self, uuid: Union[BaseService, BleakGATTCharacteristic, int, str, UUID] = DeviceInformationService.MODEL) -> Union[bytearray, str, int]:
         """! @brief Reading a GATT characteristic value"""
         # Some devices desconnect without notice to the client. In such cases the next access fails and one try to reconnect is executed.
         uid = uuid
+        timeToLive = None
         if isinstance(uuid, BaseService):
             uid = uuid.value.uuid
-        done = 2
-        #print("-> read: uid = " + str(uid))
-        while done > 0:
-            try:
-                res = await self.read_gatt_char(uid)
-                done = 0
-            except EOFError as e:
-                if done < 2:
-                    raise e
-                else:
-                    #print("-> Read failure, trying to connect and repeat writing")
-                    done = 1
-                    await self.connect()
-                    await self.__startResponseNotification__(self.requestResponseID, True)            
+            timeToLive = uuid.value.cache
+        res = None
+        if self.cache is not None:
+            res = self.cache.get(uid, timeToLive)
+        if res is None:
+            #print("-> read: uid = " + str(uid))
+            with self.metrics.timer("read"):
+                res = await self.retryPolicy.run(lambda: self.read_gatt_char(self._characteristic_(uid)), self.__recover__, self.__onRetry__)
+            if self.cache is not None:
+                self.cache.put(uid, res, timeToLive)
         if isinstance(uuid, BaseService):
             return uuid.value.from_bytearray(res)
         return res
 
-    async def write(self, uuid: Union[BaseService, BleakGATTCharacteristic, int, str, UUID], data: Union[bytearray, str, int]):
-        """! @brief Writing to a GATT characteristic value"""
+    async def read_many(self, uuids: [Union[BaseService, BleakGATTCharacteristic, int, str, UUID]]) -> dict:
+        """! @brief Reading several GATT characteristic values concurrently on the current connection
+            The reads are issued together, each being converted like \ref read does.
+            @code{.py}
+            values = await client.read_many([DeviceInformationService.MODEL, DeviceInformationService.FIRMWARE])
+            print(values[DeviceInformationService.MODEL])
+            @endcode
+            @returns A dictionary of the passed characteristics as keys and their values
+        """
+        uuids = list(dict.fromkeys(uuids))   # removes duplicates, keeping the order
+        values = await asyncio.gather(*[self.read(uuid) for uuid in uuids])
+        return dict(zip(uuids, values))
+
+    async def write(self, uuid: Union[BaseService, BleakGATTCharacteristic, int, str, UUID], data: Union[bytearray, str, int], response: Union[bool, None] = None, idempotent: bool = False):
+        """! @brief Writing to a GATT characteristic value
+            @param response 'False' writes without response (ATT write command), if the properties of the connected characteristic
+            include 'write-without-response', otherwise acknowledged. 'None' uses the declaration of the characteristic (see
+            \ref gatt.CharacteristicType), acknowledged writes for characteristics without type.
+            @param idempotent 'True' allows the retry policy to repeat the write after a time-out, see \ref retry.RetryPolicy
+        """
         # Some devices desconnect without notice to the client. In such cases the next access fails and one try to reconnect is executed.
         uid = uuid
+        coalesce = False
         if isinstance(uuid, BaseService):
             uid = uuid.value.uuid
             data = uuid.value.to_bytearray(data)
-        done = 2
-        while done > 0:
-            try:
-                await self.write_gatt_char(uid, data)
-                done = 0
-            except EOFError as e:
-                if done < 2:
-                    raise e
-                else:
-                    #print("-> Write failure, trying to connect and repeat writing")
-                    done = 1
-                    await self.connect()
-                    await self.__startResponseNotification__(self.requestResponseUUID, True)            
+            if response is None:
+                response = uuid.value.response
+            coalesce = uuid.value.coalesce
+        if response is None:
+            response = True
+        if self.cache is not None:
+            self.cache.invalidate(uid)
+        if coalesce:
+            await self.__coalescedWrite__(uid, data, response, idempotent)
+        else:
+            await self.__write__(uid, data, response, idempotent)
         return
 
+    async def __write__(self, uid: Union[BleakGATTCharacteristic, int, str, UUID], data: bytearray, response: bool, idempotent: bool = False):
+        """! @brief \b private A single write including the retries of the retry policy """
+        char = self._characteristic_(uid)
+        if not response and (not isinstance(char, BleakGATTCharacteristic) or "write-without-response" not in char.properties):
+            response = True     # Unacknowledged writes only to characteristics declaring write-without-response
+        with self.metrics.timer("write" if response else "write_command"):
+            await self.retryPolicy.run(lambda: self.write_gatt_char(self._characteristic_(uid), data, response), self.__recover__, self.__onRetry__, idempotent)
+
+    async def __coalescedWrite__(self, uid: Union[BleakGATTCharacteristic, int, str, UUID], data: bytearray, response: bool, idempotent: bool = False):
+        """! @brief \b private Writes only the latest value, if values of the characteristic arrive while a write is in progress
+            A caller whose value is replaced by a later one returns as soon as the later value has been written.
+        """
+        key = str(uid).lower()
+        pending = self.__pendingWrites.get(key)
+        if pending is not None:     # [latest value not yet written, future of the writer in progress]
+            if pending[0] is not None:
+                self.metrics.count("writes_coalesced")
+            pending[0] = data
+            await asyncio.shield(pending[1])
+            return
+        done = asyncio.get_running_loop().create_future()
+        done.add_done_callback(lambda future: future.cancelled() or future.exception())    # Retrieved, even without waiting callers
+        pending = self.__pendingWrites[key] = [None, done]
+        try:
+            await self.__write__(uid, data, response, idempotent)
+            while pending[0] is not None:
+                data = pending[0]
+                pending[0] = None
+                await self.__write__(uid, data, response, idempotent)
+            done.set_result(None)
+        except Exception as e:
+            done.set_exception(e)
+            raise
+        finally:
+            if not done.done():
+                done.cancel()
+            del self.__pendingWrites[key]
+
+    async def __reconnect__(self):
+        """! @brief \b private Reconnects, if the device has disconnected with or without notice. Concurrent callers share a single connect. """
+        loop = asyncio.get_running_loop()
+        if self.__connectLoop is not loop:
+            self.__connectLoop = loop
+            self.__connectLock = asyncio.Lock()
+        async with self.__connectLock:
+            if not self.is_connected or self.__connectionLost:
+                #print("-> Access failure, trying to connect and repeat the access")
+                self.__connectionLost = False
+                if self.is_connected:
+                    try:
+                        await super().disconnect()
+                    except Exception:
+                        pass
+                await self.connect()
+                return True
+        return False
+
+    async def __recover__(self):
+        """! @brief \b private Recovers from a transient error before a retry: reconnects and restarts a started response notification """
+        started = self.requestNotificationStarted
+        if await self.__reconnect__() and started:
+            await self.__startResponseNotification__(self.requestResponseUUID, True)
+
     async def start_notify(self, uuid: Union[BaseService, BleakGATTCharacteristic, int, str, UUID], notificationHandler):
         """! brief Starts notifications on a characteristic """
         uid = uuid
+        timeToLive = None
         if isinstance(uuid, BaseService):
             uid = uuid.value.uuid
-        await super().start_notify(uid, notificationHandler)
+            timeToLive = uuid.value.cache
+        handler = self.__wrapNotificationHandler__(uid, timeToLive, notificationHandler)
+        # Only reconnecting, as the response notification may be the one to be started
+        await self.retryPolicy.run(lambda: super(ExtBleakClient, self).start_notify(self._characteristic_(uid), handler), self.__reconnect__, self.__onRetry__)
+
+    def __wrapNotificationHandler__(self, uid, timeToLive, notificationHandler):
+        """! @brief \b private Returns a notification handler updating the client state before calling the passed handler """
+        key = str(getattr(uid, "uuid", uid)).lower()
+        def onNotification(data):
+            self.metrics.notified(key)
+            if self.cache is not None:
+                self.cache.refresh(uid, data, timeToLive)
+
+        if inspect.iscoroutinefunction(notificationHandler):
+            async def asyncHandler(sender, data):
+                onNotification(data)
+                await notificationHandler(sender, data)
+            return asyncHandler
+
+        def handler(sender, data):
+            onNotification(data)
+            notificationHandler(sender, data)
+        return handler
         
     async def stop_notify(self, uuid: Union[BaseService, BleakGATTCharacteristic, int, str, UUID]):
         """! brief Stops notifications on a characteristic """
         uid = uuid
         if isinstance(uuid, BaseService):
             uid = uuid.value.uuid
-        await super().stop_notify(uid)
+        await super().stop_notify(self._characteristic_(uid))
+
+    @staticmethod
+    def __bufferKey__(uuid: Union[BaseService, BleakGATTCharacteristic, str, UUID]) -> str:
+        if isinstance(uuid, BaseService):
+            uuid = uuid.value.uuid
+        return str(getattr(uuid, "uuid", uuid)).lower()
+
+    async def bufferNotifications(self, uuid: Union[BaseService, BleakGATTCharacteristic, str, UUID], capacity: int = 256, overflow: Overflow = Overflow.DROP_OLDEST) -> NotificationBuffer:
+        """! @brief Starts notifications on a characteristic, memorizing them within a bounded buffer instead of calling a handler
+            @param capacity Maximum number of memorized notifications
+            @param overflow The \ref notifications.Overflow policy for notifications arriving at a full buffer, DROP_OLDEST or DROP_NEWEST.
+            BLOCK raises a ValueError, as notifications can not wait for free space.
+            @returns The \ref notifications.NotificationBuffer providing the counters of received and dropped notifications
+        """
+        buffer = NotificationBuffer(capacity, overflow)
+        await self.start_notify(uuid, buffer.handler())
+        self.__buffers[self.__bufferKey__(uuid)] = buffer
+        return buffer
+
+    def notificationBuffer(self, uuid: Union[BaseService, BleakGATTCharacteristic, str, UUID]) -> Union[NotificationBuffer, None]:
+        """! @brief Returns the buffer of a characteristic started by \ref bufferNotifications or 'None' """
+        return self.__buffers.get(self.__bufferKey__(uuid))
+
+    async def drainNotifications(self, uuid: Union[BaseService, BleakGATTCharacteristic, str, UUID], maxItems: Union[int, None] = None, timeOut: float = 0.0) -> [tuple]:
+        """! @brief Removes and returns the buffered notifications of a characteristic as list of (timestamp, data) tuples, oldest first
+            The buffer is kept after stopping the notifications, thus remaining notifications can still be drained.
+            @param maxItems Maximum number of notifications returned. 'None' returns all.
+            @param timeOut Time in seconds to wait for a notification, if the buffer is empty
+        """
+        buffer = self.notificationBuffer(uuid)
+        if buffer is None:
+            raise bleak.exc.BleakError(f"Method 'drainNotifications' called for {uuid}, but 'bufferNotifications' has not been called in advance.")
+        return await buffer.drain(maxItems, timeOut)
+
+    @staticmethod
+    def _decoder_(uuid: Union[BaseService, BleakGATTCharacteristic, str, UUID], decoder = None):
+        """! @brief \b protected Returns the decoder of notification data: the passed one, the conversion of the characteristic type or none """
+        if decoder is not None:
+            return decoder
+        if isinstance(uuid, BaseService):
+            return uuid.value.from_bytearray
+        return lambda data: data
+
+    async def notifications(self, uuid: Union[BaseService, BleakGATTCharacteristic, str, UUID], decoder = None, capacity: int = 256, overflow: Overflow = Overflow.DROP_OLDEST):
+        """! @brief Asynchronous generator of the notifications of a characteristic as (timestamp, value) tuples
+            The notifications are buffered (see \ref bufferNotifications), thus the consumer may process them at its own pace.
+            The stream ends on disconnection. Closing the generator, e.g. by 'contextlib.aclosing', stops the notifications.
+            @param decoder Function converting the notification bytearray into the value. 'None' uses the type of a characteristic passed as \ref BaseService.
+        """
+        decode = self._decoder_(uuid, decoder)
+        buffer = await self.bufferNotifications(uuid, capacity, overflow)
+        try:
+            while self.is_connected or len(buffer) > 0:
+                for timestamp, data in await buffer.drain(timeOut=1.0):
+                    yield timestamp, decode(data)
+        finally:
+            if self.is_connected:
+                await self.stop_notify(uuid)
         
     def __response_notification_handler__(self, sender, data):
-        """Simple notification handler which stores the data received."""
+        """Simple notification handler which stores the data received and resolves the matching pending request."""
         self.requestNotifycationResult = data
+        if self.__settleTrial is not None:
+            self.notificationSettleTime.succeeded(self.__settleTrial)
+            self.__settleTrial = None
+        self.requestEngine.onResponse(data)
         #print("-> __response_notification_handler__ from {0}: {1}".format(sender, data))
     
     async def __startResponseNotification__(self, requestResponseUUID, force = False):
         """ Does nothing in case the 'requestResponseUUID' has already started notifying earlier. """
-        if not force and self.requestResponseUUID == requestResponseUUID and self.requestNotificationStarted:
+        if not force and self.__notifyingUUID == requestResponseUUID and self.requestNotificationStarted:
             return
         if not force:
             await self.__stopResponseNotification__() 
         uid = requestResponseUUID
         if isinstance(uid, BaseService):
             uid = uid.value.uuid
-        await self.start_notify(uid, self.__response_notification_handler__)
+        delay = await self.__settle__()
+        try:
+            await self.start_notify(uid, self.__response_notification_handler__)
+        except bleak.exc.BleakError as e:
+            if delay is None:
+                raise e
+            self.notificationSettleTime.failed(delay)
+            await asyncio.sleep(self.notificationSettleTime.value - delay)
+            await self.start_notify(uid, self.__response_notification_handler__)
+            delay = None
+        self.__settleTrial = delay
         self.requestNotificationStarted = True
         self.requestResponseUUID = requestResponseUUID
+        self.__notifyingUUID = requestResponseUUID
 
     async def __stopResponseNotification__(self):
         if self.requestNotificationStarted is None:
             return
         #print("-> stop notify")
-        uid = self.requestResponseUUID
+        uid = self.__notifyingUUID
         if isinstance(uid, BaseService):
             uid = uid.value.uuid
         await self.stop_notify(uid)
         self.requestNotificationStarted = None
-        await asyncio.sleep(self.requestTimeOut)  # This is necessary as e.g. the EQ3 CC_RT_BLE requires time to accept a new start_notify. Might be the case for other devices also.
+        self.__notifyingUUID = None
+        self.__settleTrial = None
+        # The settle time is awaited not before a start_notify actually follows (see __settle__)
+        self.__notificationStopTime = time.monotonic()
+
+    async def __settle__(self) -> Union[float, None]:
+        """! @brief \b private Waits for the remaining settle time since the last stop of the response notification
+            E.g. the EQ3 CC_RT_BLE requires time to accept a new start_notify. Might be the case for other devices also.
+            @returns The delay to be verified by the first response in case of learning, 'None' otherwise
+        """
+        if self.__notificationStopTime is None:
+            return None
+        model = self.notificationSettleTime
+        delay = model.trial
+        remaining = delay - (time.monotonic() - self.__notificationStopTime)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        self.__notificationStopTime = None
+        if model.fixed:
+            return None
+        return delay
             
-    def requestUsing(self, requestResponseUUID: Union[BaseService, BleakGATTCharacteristic, int, str, UUID], requestCommandUUID: Union[BaseService, BleakGATTCharacteristic, int, str, UUID, None], timeOut: float = 1.0) -> Union[bytearray, None]:
+    def useCache(self, enable: bool = True, defaultTimeToLive: Union[float, None] = None):
+        """! @brief Enables or disables the characteristic value cache
+            @param defaultTimeToLive Time in seconds values are cached, if the characteristic declares no 'cache' time, e.g. when read by UUID string. 'None' does not cache them.
+        """
+        self.cache = CharacteristicCache(defaultTimeToLive) if enable else None
+
+    def useServiceCache(self, enable: bool = True, directory: Union[str, None] = None):
+        """! @brief Enables or disables the persistent service table cache used on connecting
+            @param directory Directory of the stored tables. 'None' uses the user cache directory (see cache.ServiceCache).
+        """
+        self.serviceCache = ServiceCache(directory) if enable else None
+
+    def usePresence(self, enable: bool = True, presenceRegistry: Union[presence.PresenceRegistry, None] = None, maxAge: Union[float, None] = None):
+        """! @brief Enables or disables failing fast on the first connect to a device the scanners have not seen recently
+            Connects and disconnects are recorded in the registry, see section \ref SEC_PRESENCE.
+            @param presenceRegistry The registry filled by the scanners. 'None' uses the module wide presence.registry.
+            @param maxAge Time in seconds without advertisement, connect or disconnect after which connecting fails. 'None' uses the estimate of the registry.
+        """
+        self.presence = (presenceRegistry if presenceRegistry is not None else presence.registry) if enable else None
+        self.presenceMaxAge = maxAge
+
+    def isReachable(self, maxAge: Union[float, None] = None) -> bool:
+        """! @brief Returns 'True' if the device advertised recently, according to the registry of \ref usePresence or the module wide one """
+        return (self.presence if self.presence is not None else presence.registry).isReachable(self.address, maxAge)
+
+    def requestUsing(self, requestResponseUUID: Union[BaseService, BleakGATTCharacteristic, int, str, UUID], requestCommandUUID: Union[BaseService, BleakGATTCharacteristic, int, str, UUID, None], timeOut: float = 1.0, correlator: Union[RequestCorrelator, None] = None, maxInFlight: int = 1, settleTime: Union[NotificationSettleTime, None] = None) -> Union[bytearray, None]:
         """! @brief Configures the command and notification response procedure
              Some BLE devices use a command characeristic. Writing e.g. a read request command coded
              within the data bytearry, specific to the vendor of the device, will force a notification
              response containing the answer with the requested information content, also specifically coded
              by the vendor.
              To execute a response procedure call the method 'request'.
+             @param correlator A \ref RequestCorrelator matching responses to commands, e.g. by an opcode. 'None' matches in the order of sending.
+             @param maxInFlight Maximum number of commands waiting for their response at the same time (see \ref submit)
+             @param settleTime A \ref NotificationSettleTime as device profile. 'None' keeps the current, by default learning, model.
         """
         if requestCommandUUID is None or requestResponseUUID is None:
             raise bleak.exc.BleakError("Method 'requestUsing' called but requestResponse of requestCommand are passed with None.")
         self.requestCommandUUID = requestCommandUUID
         self.requestResponseUUID = requestResponseUUID
         self.requestTimeOut = timeOut
+        self.requestEngine.configure(correlator, maxInFlight)
+        if settleTime is not None:
+            self.notificationSettleTime = settleTime
         return
 
-    async def request(self, data: Union[bytearray, None] = None, timeOut: float = 1.0) -> Union[bytearray, None]:
-        """! @brief Requesting a read or write operation of a GATT characteristic using a GATT command characteristic
-            This method uses a notification answer (response) of the BLE device for reading initiated by the write to the command characteristic.
-            The method 'requestUsing' must be called at least once in order to set the request command and response characteristic
-            Fore derived classes the COMMAND and RESONSE characteristics should be defined within the 'RequestService' enumeration.
+    async def __writeCommand__(self, data: bytearray):
+        """! @brief \b private Writes a request command to the command characteristic, used by the request engine """
+        uid = self.requestCommandUUID
+        if isinstance(uid, BaseService):
+            uid = uid.value.uuid
+        await self.write(uid, data)
+
+    async def submit(self, data: Union[bytearray, None] = None, timeOut: float = 1.0) -> asyncio.Future:
+        """! @brief Sends a request command without waiting for its response and returns the future of the response
+            Commands are queued and written in the order of submission. Up to 'maxInFlight' commands (see \ref requestUsing)
+            may wait for their responses at the same time. Each response is matched to its command by the configured correlator.
+            @code{.py}
+            futures = [await client.submit(command) for command in commands]
+            responses = await asyncio.gather(*futures)
+            @endcode
+            @param timeOut Deadline in seconds for writing the command and receiving the response
         """
         if self.requestCommandUUID is None or self.requestResponseUUID is None:
             await self.__stopResponseNotification__()
             raise bleak.exc.BleakError("Method 'request' called but requestCommandUUID or requestResponseUUID are undefined. Use method 'requestUsing' once in advance.")
         if data is None:
             raise bleak.exc.BleakError("Method 'request' called but no command data is passed.")
-        self.requestNotifycationResult = None
         await self.__startResponseNotification__(self.requestResponseUUID)
-        uid = self.requestCommandUUID
-        if isinstance(uid, BaseService):
-            uid = uid.value.uuid
-        await self.write(uid, data)
-        timeOutCnt = timeOut*100
-        while timeOutCnt>0 and self.requestNotifycationResult==None:
-            timeOutCnt = timeOutCnt - 1
-            await asyncio.sleep(0.01)
-        self.requestResponseTime = (timeOut*100-timeOutCnt)*0.01
+        return await self.requestEngine.submit(data, timeOut)
+
+    async def request(self, data: Union[bytearray, None] = None, timeOut: float = 1.0, idempotent: bool = False) -> Union[bytearray, None]:
+        """! @brief Requesting a read or write operation of a GATT characteristic using a GATT command characteristic
+            This method uses a notification answer (response) of the BLE device for reading initiated by the write to the command characteristic.
+            The method 'requestUsing' must be called at least once in order to set the request command and response characteristic
+            Fore derived classes the COMMAND and RESONSE characteristics should be defined within the 'RequestService' enumeration.
+            The notification handler resolves the waiting request directly. The time between sending the command and receiving the
+            response, measured by the monotonic clock, is memorized in the member 'requestResponseTime'.
+            @param timeOut Deadline in seconds for writing the command and receiving the response
+            @param idempotent 'True' allows the retry policy to repeat the command after a time-out, e.g. for pure read commands
+        """
+        self.requestNotifycationResult = None
+        with self.metrics.timer("request"):
+            result = await self.retryPolicy.run(lambda: self.__request__(data, timeOut), self.__recover__, self.__onRetry__, idempotent)
+        self.requestResponseTime = self.requestEngine.responseTime
         #print("-> response time {}s".format(self.requestResponseTime))
-        if (timeOutCnt==0):
-            raise bleak.exc.BleakError("Request procedure failed with time out of {}s while waiting for the notification response!".format(timeOut))
-        return self.requestNotifycationResult
+        return result
+
+    async def __request__(self, data: bytearray, timeOut: float) -> bytearray:
+        """! @brief \b private A single attempt of \ref request """
+        future = await self.submit(data, timeOut)
+        try:
+            return await future
+        except bleak.exc.BleakError as e:
+            if self.__settleTrial is not None:
+                # The notification restarted with a learning delay does not respond. Restart it at the next request.
+                self.notificationSettleTime.failed(self.__settleTrial)
+                self.__settleTrial = None
+                self.requestNotificationStarted = False
+            raise e
+
+    async def request_many(self, commands: [bytearray], timeOut: float = 1.0, returnExceptions: bool = False) -> [Union[bytearray, Exception]]:
+        """! @brief Sends several request commands back to back and returns the list of responses in the order of the commands
+            See \ref submit for the number of commands in flight and the correlation of responses.
+            @param returnExceptions If 'True' a failed command delivers its exception within the list instead of raising it
+        """
+        futures = [await self.submit(command, timeOut) for command in commands]
+        return await asyncio.gather(*futures, return_exceptions=returnExceptions)
 
     def printServices(self, readValues: bool = False):
         """! @brief Prints all content provided from the GATT server device
@@ -0,0 +1,180 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  RequestEngine.py
+
+@brief Provides a pipelined command queue for devices using a command and a response characteristic
+
+Commands are written to the command characteristic in the order they are submitted. Several commands may be
+outstanding at once. Each notification received from the response characteristic is matched to a pending command
+by a \ref RequestCorrelator and resolves the future returned for that command.
+
+@code{.py}
+futures = [await engine.submit(command) for command in commands]
+responses = await asyncio.gather(*futures)
+@endcode
+"""
+
+import asyncio
+import time
+import bleak
+
+from collections import deque
+from typing import Hashable, Union
+
+class RequestCorrelator():
+    """! @brief Matches notification responses to pending request commands
+        The standard implementation returns the same key for all commands and responses. Responses are thus matched
+        to the commands in the order the commands have been sent (first in, first out). Derived classes override
+        \ref commandKey and \ref responseKey to match by the content, e.g. an opcode byte, instead. Commands with equal
+        keys are matched in the order they have been sent.
+    """
+    def commandKey(self, command: bytearray) -> Hashable:
+        """! @brief Returns the key of the response expected for the passed command """
+        return None
+
+    def responseKey(self, response: bytearray) -> Hashable:
+        """! @brief Returns the key of the passed response, to be compared with the keys from \ref commandKey """
+        return None
+
+class PendingRequest():
+    """! @brief A submitted command waiting for its response """
+    def __init__(self, command: bytearray, key: Hashable, future: asyncio.Future):
+        self.command = command
+        self.key = key
+        self.future = future
+        self.sent = time.monotonic()
+        self.timer = None
+        self.slots = None
+
+class RequestEngine():
+    """! @brief Queues commands, keeps several of them in flight and resolves per command futures by response correlation
+        @param write Coroutine function writing a command bytearray to the command characteristic
+        @param correlator The \ref RequestCorrelator matching responses to commands. 'None' uses first in, first out matching.
+        @param maxInFlight Maximum number of commands waiting for their response at the same time
+    """
+    def __init__(self, write, correlator: Union[RequestCorrelator, None] = None, maxInFlight: int = 1):
+        self.__write = write
+        self.correlator = correlator if correlator is not None else RequestCorrelator()
+        self.maxInFlight = maxInFlight
+        self.responseTime = 0.0     #!> Time in seconds between sending the last answered command and receiving its response
+        self.unmatched = 0          #!> Number of responses not matching any pending command
+        self.__pending = {}         # key -> deque of PendingRequest
+        self.__loop = None
+        self.__slots = None
+        self.__writeLock = None
+
+    @property
+    def inFlight(self) -> int:
+        """! @brief Number of commands waiting for their response """
+        return sum(len(queue) for queue in self.__pending.values())
+
+    def configure(self, correlator: Union[RequestCorrelator, None] = None, maxInFlight: int = 1):
+        """! @brief Sets a new correlator and limit of commands in flight. Only to be called while no command is pending. """
+        self.correlator = correlator if correlator is not None else RequestCorrelator()
+        self.maxInFlight = maxInFlight
+        self.__loop = None
+
+    def __checkLoop__(self):
+        """! @brief \b private Creates the synchronization primitives within the running loop """
+        loop = asyncio.get_running_loop()
+        if self.__loop is not loop:
+            self.__loop = loop
+            self.__slots = asyncio.Semaphore(self.maxInFlight)
+            self.__writeLock = asyncio.Lock()
+        return loop
+
+    async def submit(self, command: bytearray, timeOut: float = 1.0) -> asyncio.Future:
+        """! @brief Queues the command, writes it as soon as less than 'maxInFlight' commands are pending and returns the future of its response
+            The method returns after the command has been written, thus several commands can be submitted back to back
+            before awaiting their responses.
+            @param timeOut Deadline in seconds for writing the command and receiving the response. The future raises a BleakError on expiry.
+        """
+        loop = self.__checkLoop__()
+        await self.__slots.acquire()
+        request = PendingRequest(command, self.correlator.commandKey(command), loop.create_future())
+        request.slots = self.__slots
+        self.__pending.setdefault(request.key, deque()).append(request)
+        request.future.add_done_callback(lambda future: self.__release__(request))
+        request.timer = loop.call_later(timeOut, self.__timeOut__, request, timeOut)
+        try:
+            async with self.__writeLock:
+                request.sent = time.monotonic()
+                await self.__write(command)
+        except BaseException:
+            request.future.cancel()
+            raise
+        return request.future
+
+    def onResponse(self, data: bytearray) -> bool:
+        """! @brief Resolves the oldest pending command matching the response. To be called from the response notification handler.
+            @returns 'True' if a pending command has been resolved
+        """
+        queue = self.__pending.get(self.correlator.responseKey(data))
+        while queue:
+            request = queue.popleft()
+            if not request.future.done():
+                self.responseTime = time.monotonic() - request.sent
+                request.future.set_result(data)
+                return True
+        self.unmatched = self.unmatched + 1
+        return False
+
+    def cancelAll(self):
+        """! @brief Cancels all pending commands, e.g. on disconnect """
+        for queue in list(self.__pending.values()):
+            for request in list(queue):
+                request.future.cancel()
+        self.__pending.clear()
+
+    def __timeOut__(self, request: PendingRequest, timeOut: float):
+        if not request.future.done():
+            request.future.set_exception(bleak.exc.BleakError("Request procedure failed with time out of {}s while waiting for the notification response!".format(timeOut)))
+
+    def __release__(self, request: PendingRequest):
+        """! @brief \b private Removes a resolved, failed or cancelled command from the pending commands and frees its slot """
+        if request.timer is not None:
+            request.timer.cancel()
+        queue = self.__pending.get(request.key)
+        if queue is not None:
+            try:
+                queue.remove(request)
+            except ValueError:
+                pass
+            if not queue:
+                del self.__pending[request.key]
+        request.slots.release()
+
+if __name__ == "__main__":
+    class OpcodeCorrelator(RequestCorrelator):
+        def commandKey(self, command: bytearray) -> Hashable:
+            return command[0]
+
+        def responseKey(self, response: bytearray) -> Hashable:
+            return response[0]
+
+    async def check():
+        written = []
+        async def write(command: bytearray):
+            written.append(bytes(command))
+        engine = RequestEngine(write, OpcodeCorrelator(), maxInFlight=2)
+        first = await engine.submit(bytearray(b"\x01a"))
+        second = await engine.submit(bytearray(b"\x02b"))
+        assert engine.inFlight == 2
+        third = asyncio.ensure_future(engine.submit(bytearray(b"\x03c")))
+        await asyncio.sleep(0.01)
+        assert len(written) == 2     # The third command waits for a free slot
+        assert engine.onResponse(bytearray(b"\x02B")) and await second == b"\x02B"
+        third = await third
+        assert engine.onResponse(bytearray(b"\x01A")) and await first == b"\x01A"
+        assert not engine.onResponse(bytearray(b"\x04D")) and engine.unmatched == 1
+        try:
+            await third
+            raise AssertionError("time out expected")
+        except bleak.exc.BleakError:
+            pass
+        assert engine.inFlight == 0 and written == [b"\x01a", b"\x02b", b"\x03c"]
+
+    print("Testing RequestEngine: correlation by opcode, in flight limit, time out")
+    asyncio.run(check())
+    print("Ready")
@@ -0,0 +1,55 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  __init__.py
+
+@brief The easybleak package loading its modules on first use
+
+The modules are imported when first accessed as attribute of the package (PEP 562). The GATT declarations, caches,
+metrics, notification buffers, presence registries and retry policies are exported by the package and do not load the
+Bluetooth stack:
+
+@code{.py}
+from me2grid.easybleak import BaseService, CharacteristicType     # bleak is not loaded
+from me2grid.easybleak.EasyBleakClient import EasyBleakClient      # loads bleak
+@endcode
+
+Classes named like their module, e.g. \ref EasyBleakClient, \ref ExtBleakClient, \ref EasyBleakScanner,
+\ref RequestEngine and \ref DeviceManager, are imported from their module. The package attribute of that name is the
+module.
+"""
+
+import importlib
+
+__exports__ = {
+    "gatt":          ("versionEasyBleak", "BLE_UUID", "normalizeUUID", "lookupUUID", "decodeSFLOAT", "encodeSFLOAT", "decodeFLOAT", "encodeFLOAT",
+                      "CharacteristicType", "BaseService", "ClassServices"),
+    "gatt_services": ("GenericAccessService", "GenericAttributeProfileService", "DeviceInformationService", "GenericDescriptors", "BatteryService"),
+    "cache":         ("CharacteristicCache", "ServiceCache"),
+    "metrics":       ("Histogram", "DeviceMetrics", "OperationTimer", "MetricsRegistry", "prometheusText"),
+    "notifications": ("NotificationBuffer", "Overflow"),
+    "presence":      ("DevicePresence", "PresenceRegistry"),
+    "retry":         ("RetryPolicy",),
+}
+"""! Module name -> names exported by the package """
+
+__modules__ = ("DeviceManager", "EasyBleakClient", "EasyBleakScanner", "ExtBleakClient", "RequestEngine", "benchmark", "cache",
+               "dbusFunction", "gatt", "gatt_services", "metrics", "notifications", "presence", "retry", "simulation")
+"""! Modules imported on first attribute access """
+
+__origin__ = {name: module for module, names in __exports__.items() for name in names}
+
+__all__ = sorted(__origin__)
+
+def __getattr__(name: str):
+    """! @brief Imports the module of the name on first access and memorizes the name in the package (PEP 562) """
+    if name in __origin__:
+        value = getattr(importlib.import_module(f"{__name__}.{__origin__[name]}"), name)
+        globals()[name] = value
+        return value
+    if name in __modules__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__origin__) | set(__modules__))
@@ -0,0 +1,483 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  benchmark.py
+
+@brief Reproducible benchmarks of the easybleak clients against the simulated backend
+
+The benchmarks measure the overhead of the library itself. The simulated link therefore has no latency unless stated
+otherwise, and the results do not depend on Bluetooth hardware. The results are written as JSON for the comparison
+between releases.
+
+@code{.sh}
+python -m me2grid.easybleak.benchmark --output benchmark.json
+python benchmark.py --repeat 2000 --only read_sync request_rtt
+python -m me2grid.easybleak.benchmark --only import_time --check     # fails if an import exceeds its budget
+@endcode
+
+Benchmarks:
+- 'read_async': ExtBleakClient.read on a connected client, the baseline of the sync wrapper \n
+- 'read_sync' and 'read_sync_background': EasyBleakClient.read on a connected client with local and background loop \n
+- 'read_sync_keepalive': EasyBleakClient.read with the keep alive connection policy \n
+- 'read_sync_per_call': EasyBleakClient.read connecting and disconnecting at each call \n
+- 'codec': CharacteristicType conversions of an int, an SFLOAT and an array of 100 scaled (x, y, z) records \n
+- 'gatt_from_uuid': GATT_Dict.fromUUID of a characteristic by the 128 bit form received from bleak and by its 16 bit form \n
+- 'uuid_lookup': lookup of a characteristic object by the client index compared to the service collection \n
+- 'request_rtt': ExtBleakClient.request round trip on a link with 'linkLatency' \n
+- 'request_pipelined': ExtBleakClient.request_many with several commands in flight on the same link \n
+- 'write_ack' and 'write_command': ExtBleakClient.write with and without response on a link with 'linkLatency' \n
+- 'write_coalesced': concurrent writes of an actuator value, of which only the latest are sent \n
+- 'notification_ingest': notifications buffered per second and the number dropped by a full buffer \n
+- 'connect': connect and disconnect cost of ExtBleakClient \n
+- 'connect_absent': failing connect to an absent device, waiting for the connect time out or failing fast by the presence registry \n
+- 'scan_early_stop': EasyBleakScanner.scan for one of several advertising devices, stopping when it is found instead of after the time out \n
+- 'advertisement_decode': decoding of advertised manufacturer data per advertisement and the readings per second received from many devices \n
+- 'memory': memory per connected ExtBleakClient \n
+- 'import_time': import of the packages in fresh interpreters, checked against \ref importBudgets
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+if __package__:
+    from me2grid.easybleak.gatt import versionEasyBleak, BLE_UUID, BaseService, CharacteristicType
+    from me2grid.easybleak.gatt_services import DeviceInformationService
+    from me2grid.easybleak.ExtBleakClient import ExtBleakClient
+    from me2grid.easybleak.EasyBleakClient import EasyBleakClient
+    from me2grid.easybleak.EasyBleakScanner import EasyBleakScanner
+    from me2grid.easybleak.notifications import Overflow
+    from me2grid.easybleak import presence
+    from me2grid.easybleak.simulation import SimulatedPeripheral, SimulatedBleakClient, SimulatedBleakScanner, register, unregister
+else: # Necessary, to run this file directly
+    from gatt import versionEasyBleak, BLE_UUID, BaseService, CharacteristicType
+    from gatt_services import DeviceInformationService
+    from ExtBleakClient import ExtBleakClient
+    from EasyBleakClient import EasyBleakClient
+    from EasyBleakScanner import EasyBleakScanner
+    from notifications import Overflow
+    import presence
+    from simulation import SimulatedPeripheral, SimulatedBleakClient, SimulatedBleakScanner, register, unregister
+
+COMMAND  = "0000fff1-0000-1000-8000-00805f9b34fb"
+RESPONSE = "0000fff2-0000-1000-8000-00805f9b34fb"
+STREAM   = "0000fff3-0000-1000-8000-00805f9b34fb"
+CONTROL  = "0000fff4-0000-1000-8000-00805f9b34fb"
+
+class ActuatorService(BaseService):
+    """! @brief Service enumeration of the benchmark peripheral declaring the coalescing actuator characteristic """
+    CONTROL = CharacteristicType(CONTROL, int, 1, signed=False, coalesce=True)
+
+    @classmethod
+    def uuidService(cls) -> str:
+        return BLE_UUID(0xfff0)
+
+def benchmarkPeripheral(address: str, latency: float = 0.0) -> SimulatedPeripheral:
+    """! @brief Registers a peripheral with device information, a command echoed by a response notification and a notifying characteristic """
+    peripheral = SimulatedPeripheral(address, latency=latency, seed=0)
+    service = peripheral.addService(DeviceInformationService.uuidService())
+    peripheral.addCharacteristic(service, DeviceInformationService.MODEL.uuid, ["read"], b"Benchmark")
+    peripheral.addCharacteristic(service, DeviceInformationService.FIRMWARE.uuid, ["read"], b"1.0")
+    service = peripheral.addService(BLE_UUID(0xfff0))
+    peripheral.addCharacteristic(service, COMMAND, ["write"], onWrite=lambda p, c, data: p.notify(RESPONSE, data))
+    peripheral.addCharacteristic(service, RESPONSE, ["notify"])
+    peripheral.addCharacteristic(service, STREAM, ["notify"])
+    peripheral.addCharacteristic(service, CONTROL, ["write", "write-without-response"], b"\x00")
+    return register(peripheral)
+
+def summary(durations: [float]) -> dict:
+    """! @brief Returns the statistics of durations in seconds, with the exact median and 99th percentile in microseconds """
+    ordered = sorted(durations)
+    count = len(ordered)
+    return {"count": count,
+            "mean_us": sum(ordered) / count * 1e6,
+            "p50_us": ordered[count // 2] * 1e6,
+            "p99_us": ordered[min(int(count * 0.99), count - 1)] * 1e6,
+            "max_us": ordered[-1] * 1e6}
+
+def timeCalls(call, repeat: int) -> dict:
+    durations = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - start)
+    return summary(durations)
+
+async def timeCoroutines(factory, repeat: int) -> dict:
+    durations = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        await factory()
+        durations.append(time.perf_counter() - start)
+    return summary(durations)
+
+def benchReadAsync(repeat: int, **options) -> dict:
+    peripheral = benchmarkPeripheral("BE:00:00:00:00:01")
+    async def run():
+        client = ExtBleakClient(peripheral.address, backend=SimulatedBleakClient)
+        try:
+            await client.connect()
+            return await timeCoroutines(lambda: client.read(DeviceInformationService.MODEL), repeat)
+        finally:
+            await client.disconnect()
+    try:
+        return asyncio.run(run())
+    finally:
+        unregister(peripheral.address)
+
+def benchReadSync(repeat: int, backgroundLoop: bool = False, policy: str = "connected", **options) -> dict:
+    peripheral = benchmarkPeripheral("BE:00:00:00:00:02")
+    client = EasyBleakClient(peripheral.address, backgroundLoop=backgroundLoop, backend=SimulatedBleakClient)
+    try:
+        if policy == "connected":
+            client.connect()
+        elif policy == "keepalive":
+            client.keepAlive(idleTimeOut=60.0)
+        return timeCalls(lambda: client.read(DeviceInformationService.MODEL), repeat)
+    finally:
+        client.disconnect()
+        unregister(peripheral.address)
+
+def benchCodec(repeat: int, **options) -> dict:
+    integer = CharacteristicType(COMMAND, int, 2)
+    sfloat = CharacteristicType(COMMAND, format="<S")
+    records = CharacteristicType(COMMAND, format="<hhh", scale=0.01, array=True)
+    data = records.to_bytearray([(i * 0.01, -i * 0.01, 1.0) for i in range(100)])
+    return {"int": timeCalls(lambda: integer.from_bytearray(b"\x01\x02"), repeat),
+            "sfloat": timeCalls(lambda: sfloat.from_bytearray(b"\x6f\xf1"), repeat),
+            "array_100_records": timeCalls(lambda: records.from_bytearray(data), repeat)}
+
+def benchGattFromUuid(repeat: int, **options) -> dict:
+    return {"full": timeCalls(lambda: ExtBleakClient.fromUUID("00002a26-0000-1000-8000-00805f9b34fb"), repeat),
+            "short": timeCalls(lambda: ExtBleakClient.fromUUID(0x2a26), repeat)}
+
+def benchUuidLookup(repeat: int, **options) -> dict:
+    """! @brief Compares the client characteristic index with the search of the bleak service collection (see ExtBleakClient._characteristic_) """
+    peripheral = benchmarkPeripheral("BE:00:00:00:00:03")
+    async def run():
+        client = ExtBleakClient(peripheral.address, backend=SimulatedBleakClient)
+        try:
+            await client.connect()
+            uuid = DeviceInformationService.FIRMWARE.uuid
+            indexed = timeCalls(lambda: client._characteristic_(uuid), repeat)
+            searched = timeCalls(lambda: client.services.get_characteristic(uuid), repeat)
+            return {"index": indexed, "service_collection": searched}
+        finally:
+            await client.disconnect()
+    try:
+        return asyncio.run(run())
+    finally:
+        unregister(peripheral.address)
+
+def benchRequest(repeat: int, linkLatency: float = 0.005, inFlight: int = 1, **options) -> dict:
+    peripheral = benchmarkPeripheral("BE:00:00:00:00:04", latency=linkLatency)
+    async def run():
+        client = ExtBleakClient(peripheral.address, backend=SimulatedBleakClient)
+        client.requestUsing(RESPONSE, COMMAND, maxInFlight=inFlight)
+        try:
+            await client.connect()
+            command = bytearray(b"\x01")
+            await client.request(command)     # starts the response notification
+            if inFlight == 1:
+                result = await timeCoroutines(lambda: client.request(command), repeat)
+            else:
+                start = time.perf_counter()
+                await client.request_many([command] * repeat)
+                elapsed = time.perf_counter() - start
+                result = {"count": repeat, "requests_per_s": repeat / elapsed, "mean_us": elapsed / repeat * 1e6}
+            result["link_latency_us"] = linkLatency * 1e6
+            return result
+        finally:
+            await client.disconnect()
+    try:
+        return asyncio.run(run())
+    finally:
+        unregister(peripheral.address)
+
+def benchWrite(repeat: int, response: bool = True, linkLatency: float = 0.005, **options) -> dict:
+    peripheral = benchmarkPeripheral("BE:00:00:00:00:07", latency=linkLatency)
+    async def run():
+        client = ExtBleakClient(peripheral.address, backend=SimulatedBleakClient)
+        try:
+            await client.connect()
+            data = bytearray(b"\x01")
+            result = await timeCoroutines(lambda: client.write(CONTROL, data, response), repeat)
+            result["link_latency_us"] = linkLatency * 1e6
+            return result
+        finally:
+            await client.disconnect()
+    try:
+        return asyncio.run(run())
+    finally:
+        unregister(peripheral.address)
+
+def benchWriteCoalesced(repeat: int, linkLatency: float = 0.005, **options) -> dict:
+    """! @brief Issues 'repeat' writes of an acknowledged, coalescing characteristic at once and counts the writes actually sent """
+    peripheral = benchmarkPeripheral("BE:00:00:00:00:08", latency=linkLatency)
+    sent = []
+    peripheral.characteristic(CONTROL).onWrite = lambda p, c, data: sent.append(bytes(data))
+    async def run():
+        client = ExtBleakClient(peripheral.address, backend=SimulatedBleakClient)
+        try:
+            await client.connect()
+            start = time.perf_counter()
+            await asyncio.gather(*[client.write(ActuatorService.CONTROL, i % 256) for i in range(repeat)])
+            elapsed = time.perf_counter() - start
+        finally:
+            await client.disconnect()
+        return {"count": repeat, "sent": len(sent), "elapsed_us": elapsed * 1e6,
+                "latest_sent": sent[-1] == bytes([(repeat - 1) % 256]), "link_latency_us": linkLatency * 1e6}
+    try:
+        return asyncio.run(run())
+    finally:
+        unregister(peripheral.address)
+
+def benchNotificationIngest(repeat: int, capacity: int = 256, **options) -> dict:
+    """! @brief Delivers 'repeat' notifications back to back without draining and measures the ingest rate and the drops of a full buffer """
+    peripheral = benchmarkPeripheral("BE:00:00:00:00:05")
+    async def run():
+        client = ExtBleakClient(peripheral.address, backend=SimulatedBleakClient)
+        try:
+            await client.connect()
+            buffer = await client.bufferNotifications(STREAM, capacity, Overflow.DROP_OLDEST)
+            payload = bytes(20)
+            start = time.perf_counter()
+            for i in range(repeat):
+                peripheral.notify(STREAM, payload)
+            while buffer.received < repeat:
+                await asyncio.sleep(0)
+            elapsed = time.perf_counter() - start
+            batch = await buffer.drain()
+        finally:
+            await client.disconnect()
+        return {"count": repeat, "notifications_per_s": repeat / elapsed, "capacity": capacity,
+                "dropped": buffer.dropped, "drained": len(batch)}
+    try:
+        return asyncio.run(run())
+    finally:
+        unregister(peripheral.address)
+
+def benchConnect(repeat: int, **options) -> dict:
+    peripheral = benchmarkPeripheral("BE:00:00:00:00:06")
+    async def run():
+        client = ExtBleakClient(peripheral.address, backend=SimulatedBleakClient)
+        durations = ([], [])
+        try:
+            for i in range(repeat):
+                start = time.perf_counter()
+                await client.connect()
+                middle = time.perf_counter()
+                await client.disconnect()
+                durations[0].append(middle - start)
+                durations[1].append(time.perf_counter() - middle)
+        finally:
+            await client.disconnect()
+        discoveries = client.stats()["latencies"].get("services", {}).get("count", 0)     # Discoveries within connect, expected 'repeat'
+        return {"connect": summary(durations[0]), "disconnect": summary(durations[1]), "service_discoveries": discoveries}
+    try:
+        return asyncio.run(run())
+    finally:
+        unregister(peripheral.address)
+
+def benchConnectAbsent(repeat: int, timeOut: float = 0.2, **options) -> dict:
+    address = "BE:00:00:04:00:00"   # Registered by no other benchmark
+    unregister(address)
+    registry = presence.PresenceRegistry()
+    async def run():
+        durations = ([], [])
+        for usePresence, measured in ((False, durations[0]), (True, durations[1])):
+            client = ExtBleakClient(address, backend=SimulatedBleakClient, timeout=timeOut)
+            client.usePresence(usePresence, registry)
+            try:
+                for i in range(repeat):
+                    start = time.perf_counter()
+                    try:
+                        await client.connect()
+                    except Exception:
+                        pass
+                    measured.append(time.perf_counter() - start)
+            finally:
+                await client.disconnect()
+        return {"time_out": summary(durations[0]), "presence": summary(durations[1]), "connect_time_out_us": timeOut * 1e6}
+    return asyncio.run(run())
+
+def benchScan(repeat: int, devices: int = 20, advertisingInterval: float = 0.1, timeOut: float = 5.0, **options) -> dict:
+    addresses = ["BE:00:00:02:00:%02X" % i for i in range(devices)]
+    for address in addresses:
+        register(SimulatedPeripheral(address, name="Benchmark", advertisingInterval=advertisingInterval))
+    try:
+        durations, found = [], 0
+        for i in range(repeat):
+            scanner = EasyBleakScanner(addresses=[addresses[i % devices]], backend=SimulatedBleakScanner)
+            start = time.perf_counter()
+            found = found + len(scanner.scan(timeOut))
+            durations.append(time.perf_counter() - start)
+        result = summary(durations)
+        result.update({"time_out_us": timeOut * 1e6, "advertising_interval_us": advertisingInterval * 1e6, "found": found})
+        return result
+    finally:
+        for address in addresses:
+            unregister(address)
+
+def benchAdvertisementDecode(repeat: int, devices: int = 200, advertisingInterval: float = 0.1, scanTime: float = 1.0, **options) -> dict:
+    decoder = CharacteristicType(None, format="<BhH", scale=(1, 0.01, 0.01))    # (frame, temperature, humidity)
+    addresses = ["BE:00:00:03:%02X:%02X" % (i // 256, i % 256) for i in range(devices)]
+    for i, address in enumerate(addresses):
+        peripheral = register(SimulatedPeripheral(address, advertisingInterval=advertisingInterval, seed=i))
+        peripheral.manufacturerData = {0xffff: decoder.to_bytearray((1, 20.0 + i * 0.01, 45.0))}
+    try:
+        scanner = EasyBleakScanner(deduplicate=False, manufacturerDecoders={0xffff: decoder}, backend=SimulatedBleakScanner)
+        start = time.perf_counter()
+        readings = sum(1 for reading in scanner.readings(timeOut=scanTime))
+        elapsed = time.perf_counter() - start
+        advertisement = scanner.found[addresses[0]]
+        result = timeCalls(lambda: scanner.detection_callback(advertisement.device, advertisement.advertisementData), repeat)
+        result.update({"devices": devices, "readings": readings, "readings_per_second": readings / elapsed, "found": len(scanner.found),
+                       "dropped": scanner.dropped})
+        return result
+    finally:
+        for address in addresses:
+            unregister(address)
+
+def benchMemory(repeat: int, clients: int = 100, **options) -> dict:
+    addresses = ["BE:00:00:01:%02X:%02X" % (i // 256, i % 256) for i in range(clients)]
+    for address in addresses:
+        benchmarkPeripheral(address)
+    async def run():
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        connected = [ExtBleakClient(address, backend=SimulatedBleakClient) for address in addresses]
+        for client in connected:
+            await client.connect()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        for client in connected:
+            await client.disconnect()
+        return {"clients": clients, "bytes_per_client": (after - before) / clients}
+    try:
+        return asyncio.run(run())
+    finally:
+        for address in addresses:
+            unregister(address)
+
+HEAVY_MODULES = ("bleak", "dbus", "numpy", "PySide2")
+
+importBudgets = {
+    "me2grid":                           (0.02, HEAVY_MODULES),
+    "me2grid.easybleak.gatt":            (0.05, HEAVY_MODULES),
+    "me2grid.easybleak.gatt_services":   (0.05, HEAVY_MODULES),
+    "me2grid.easybleak.cache":           (0.05, HEAVY_MODULES),
+    "me2grid.easybleak.metrics":         (0.05, HEAVY_MODULES),
+    "me2grid.easybleak.notifications":   (0.15, HEAVY_MODULES),   # asyncio alone takes about 60 ms
+    "me2grid.easybleak.presence":        (0.05, HEAVY_MODULES),
+    "me2grid.easybleak.retry":           (0.15, HEAVY_MODULES),   # asyncio alone takes about 60 ms
+    "me2grid.BibPy.canopen":             (0.05, HEAVY_MODULES),
+    "me2grid.BibPy.pyXmlParameterFile":  (0.05, HEAVY_MODULES),
+    "me2grid.devices.eq3":               (0.05, HEAVY_MODULES),
+    "me2grid.devices.texas_instruments": (0.05, HEAVY_MODULES),
+}
+"""! Module -> (median import time in seconds, modules it must not load). Configuration and CANopen tools, the modules exported by the easybleak package and the device services do not load the Bluetooth stack. """
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start
+print(json.dumps({{"seconds": duration, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+def benchImportTime(repeat: int, **options) -> dict:
+    """! @brief Imports each module of \ref importBudgets in 'repeat' fresh interpreters after one uncounted run compiling the sources """
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(entry for entry in sys.path if entry))
+    results = {}
+    for module, (budget, forbidden) in importBudgets.items():
+        probe = IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+        durations, loaded = [], set()
+        for i in range(repeat + 1):
+            process = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, env=environment)
+            if process.returncode != 0:
+                results[module] = {"error": (process.stderr.strip().splitlines() or ["exit code %d" % process.returncode])[-1]}
+                break
+            measurement = json.loads(process.stdout)
+            durations.append(measurement["seconds"])
+            loaded.update(measurement["loaded"])
+        else:
+            result = summary(durations[1:])
+            result.update({"budget_us": budget * 1e6, "loaded": sorted(loaded),
+                           "within_budget": result["p50_us"] <= budget * 1e6 and not loaded.intersection(forbidden)})
+            results[module] = result
+    return results
+
+benchmarks = {
+    "read_async":           (benchReadAsync, {}),
+    "read_sync":            (benchReadSync, {}),
+    "read_sync_background": (benchReadSync, {"backgroundLoop": True}),
+    "read_sync_keepalive":  (benchReadSync, {"policy": "keepalive"}),
+    "read_sync_per_call":   (benchReadSync, {"policy": "per_call"}),
+    "codec":                (benchCodec, {}),
+    "gatt_from_uuid":       (benchGattFromUuid, {}),
+    "uuid_lookup":          (benchUuidLookup, {}),
+    "request_rtt":          (benchRequest, {}),
+    "request_pipelined":    (benchRequest, {"inFlight": 8}),
+    "write_ack":            (benchWrite, {}),
+    "write_command":        (benchWrite, {"response": False}),
+    "write_coalesced":      (benchWriteCoalesced, {}),
+    "notification_ingest":  (benchNotificationIngest, {}),
+    "connect":              (benchConnect, {}),
+    "memory":               (benchMemory, {}),
+    "connect_absent":       (benchConnectAbsent, {}),
+    "scan_early_stop":      (benchScan, {}),
+    "advertisement_decode": (benchAdvertisementDecode, {}),
+    "import_time":          (benchImportTime, {}),
+}
+"""! Benchmark names with their function and options """
+
+def run(names: [str] = None, repeat: int = 1000) -> dict:
+    """! @brief Runs the benchmarks and returns the results together with a description of the environment
+        @param names Names out of \ref benchmarks. 'None' runs all.
+        @param repeat Number of repetitions of each benchmark
+    """
+    results = {}
+    for name in names if names else benchmarks:
+        function, options = benchmarks[name]
+        # Fewer repetitions for the slow ones, which connect at each call or wait for the link
+        count = repeat if name not in ("read_sync_per_call", "request_rtt", "write_ack", "write_command", "connect") else max(repeat // 10, 1)
+        count = count if name not in ("import_time", "scan_early_stop", "connect_absent") else max(repeat // 100, 1)     # A fresh interpreter or a scan per repetition
+        results[name] = function(count, **options)
+    return {"library": versionEasyBleak,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+            "results": results}
+
+def main(arguments: [str] = None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the easybleak clients against the simulated backend")
+    parser.add_argument("--output", help="JSON file for the results, default is the standard output")
+    parser.add_argument("--repeat", type=int, default=1000, help="Number of repetitions of each benchmark")
+    parser.add_argument("--only", nargs="*", choices=list(benchmarks), help="Benchmarks to be run, default are all")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if an import exceeds its budget (see importBudgets)")
+    options = parser.parse_args(arguments)
+    results = run(options.only, options.repeat)
+    report = json.dumps(results, indent=2)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as file:
+            file.write(report)
+    else:
+        print(report)
+    exceeded = [module for module, result in results["results"].get("import_time", {}).items() if not result.get("within_budget")]
+    if options.check and exceeded:
+        print("Import budget exceeded: " + ", ".join(exceeded), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  cache.py
+
+@brief Provides caches avoiding radio transactions for values already known
+
+The \ref CharacteristicCache memorizes characteristic values read from a device. The time a value is kept depends on
+the 'cache' parameter of its \ref gatt.CharacteristicType, e.g. static values like DeviceInformationService.MODEL
+are kept forever.
+
+@code{.py}
+client.useCache()
+model = client.read(DeviceInformationService.MODEL)    # radio transaction
+model = client.read(DeviceInformationService.MODEL)    # from cache
+print(client.cache.statistics())
+@endcode
+
+The \ref ServiceCache stores the GATT service table of devices on disk. It allows a client to skip waiting for the
+service discovery on reconnection, as far as the bleak backend supports it. bleak (0.19) cannot be fed with a stored
+table, its cached services live within the running process only. Nothing but the record itself carries over between
+processes.
+"""
+
+import json
+import os
+import time
+
+from typing import Union
+
+class CharacteristicCache():
+    """! @brief Cache of characteristic values keyed by the characteristic UUID
+        Each entry expires after its time to live in seconds. Characteristics without a time to live are not cached.
+        @param defaultTimeToLive Time to live for characteristics not declaring one, e.g. when read by UUID string. 'None' does not cache them.
+    """
+    def __init__(self, defaultTimeToLive: Union[float, None] = None):
+        self.defaultTimeToLive = defaultTimeToLive
+        self.hits = 0       #!> Number of values delivered from the cache
+        self.misses = 0     #!> Number of cacheable values not found in the cache
+        self.__entries = {} # uuid -> (expiry time, bytearray)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @staticmethod
+    def key(uuid) -> Union[str, None]:
+        """! @brief Returns the normalized cache key of a UUID string, UUID object or characteristic object """
+        uuid = getattr(uuid, "uuid", uuid)
+        if uuid is None or isinstance(uuid, int):
+            return None
+        return str(uuid).lower()
+
+    def get(self, uuid, timeToLive: Union[float, None] = None) -> Union[bytearray, None]:
+        """! @brief Returns the cached value or 'None' in case of a miss or a not cacheable characteristic """
+        if timeToLive is None and self.defaultTimeToLive is None:
+            return None
+        key = self.key(uuid)
+        entry = self.__entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.hits = self.hits + 1
+                return bytearray(entry[1])
+            del self.__entries[key]
+        self.misses = self.misses + 1
+        return None
+
+    def put(self, uuid, data: bytearray, timeToLive: Union[float, None] = None):
+        """! @brief Memorizes a value, if the characteristic is cacheable """
+        if timeToLive is None:
+            timeToLive = self.defaultTimeToLive
+        key = self.key(uuid)
+        if timeToLive is None or key is None:
+            return
+        self.__entries[key] = (time.monotonic() + timeToLive, bytes(data))
+
+    def refresh(self, uuid, data: bytearray, timeToLive: Union[float, None] = None):
+        """! @brief Updates the value from a notification, if the characteristic is cacheable or already cached """
+        if timeToLive is None and self.defaultTimeToLive is None:
+            key = self.key(uuid)
+            entry = self.__entries.get(key)
+            if entry is not None:
+                self.__entries[key] = (entry[0], bytes(data))
+            return
+        self.put(uuid, data, timeToLive)
+
+    def invalidate(self, uuid = None):
+        """! @brief Removes the value of the characteristic or all values if 'None' is passed """
+        if uuid is None:
+            self.__entries.clear()
+        else:
+            self.__entries.pop(self.key(uuid), None)
+
+    def statistics(self) -> dict:
+        """! @brief Returns a dictionary with the number of 'hits', 'misses' and cached 'entries' """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.__entries)}
+
+class ServiceCache():
+    """! @brief Persistent table of the GATT services of devices, stored as one JSON file per device
+        The table of a device is keyed by its MAC address and recorded with its firmware revision string. A changed
+        service table (e.g. after a firmware update or a 'Service Changed' indication) replaces the stored record.
+        @param directory Directory of the JSON files. 'None' uses \ref defaultDirectory.
+    """
+    def __init__(self, directory: Union[str, None] = None):
+        self.directory = directory if directory is not None else self.defaultDirectory()
+
+    @staticmethod
+    def defaultDirectory() -> str:
+        """! @brief Returns the user cache directory, e.g. '~/.cache/me2grid/easybleak/services' """
+        base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(base, "me2grid", "easybleak", "services")
+
+    def path(self, mac: str) -> str:
+        """! @brief Returns the file name of the table of the passed device """
+        return os.path.join(self.directory, mac.replace(":", "").replace("-", "").lower() + ".json")
+
+    @staticmethod
+    def table(services) -> list:
+        """! @brief Returns a JSON compatible table of a bleak service collection, ordered by handles """
+        table = []
+        for service in sorted(services, key=lambda s: s.handle):
+            chars = []
+            for char in sorted(service.characteristics, key=lambda c: c.handle):
+                descriptors = [{"uuid": d.uuid, "handle": d.handle} for d in sorted(char.descriptors, key=lambda d: d.handle)]
+                chars.append({"uuid": char.uuid, "handle": char.handle, "properties": list(char.properties), "descriptors": descriptors})
+            table.append({"uuid": service.uuid, "handle": service.handle, "characteristics": chars})
+        return table
+
+    def load(self, mac: str) -> Union[dict, None]:
+        """! @brief Returns the stored record with the members 'mac', 'firmware' and 'services' or 'None' """
+        try:
+            with open(self.path(mac), "r", encoding="utf-8") as file:
+                record = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(record, dict) or record.get("mac", "").lower() != mac.lower():
+            return None
+        return record
+
+    def store(self, mac: str, table: list, firmware: Union[str, None] = None):
+        """! @brief Stores the service table of the device, replacing a previous one """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(mac)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({"mac": mac, "firmware": firmware, "services": table}, file)
+        os.replace(path + ".tmp", path)
+
+    def invalidate(self, mac: str):
+        """! @brief Removes the stored table of the device """
+        try:
+            os.remove(self.path(mac))
+        except OSError:
+            pass
+
+if __name__ == "__main__":
+    import asyncio
+    import tempfile
+    from me2grid.easybleak.ExtBleakClient import ExtBleakClient
+    from me2grid.easybleak.gatt_services import DeviceInformationService
+    from me2grid.easybleak.simulation import SimulatedBleakClient, SimulatedPeripheral, register, unregister
+
+    print("Testing ServiceCache: an unchanged service table costs neither a firmware read nor a file write")
+    reads = []
+    peripheral = SimulatedPeripheral("BE:00:00:05:00:01")
+    service = peripheral.addService(DeviceInformationService.uuidService())
+    peripheral.addCharacteristic(service, DeviceInformationService.FIRMWARE.uuid, ["read"], onRead=lambda p, c: reads.append(1) or b"1.0")
+    register(peripheral)
+    async def check(directory: str):
+        client = ExtBleakClient(peripheral.address, backend=SimulatedBleakClient)
+        client.useServiceCache(True, directory)
+        try:
+            await client.connect()
+            await client.disconnect()
+            record = client.serviceCache.load(peripheral.address)
+            assert record is not None and record["firmware"] == "1.0" and len(reads) == 1
+            modified = os.stat(client.serviceCache.path(peripheral.address)).st_mtime_ns
+            await client.connect()
+            assert len(reads) == 1 and os.stat(client.serviceCache.path(peripheral.address)).st_mtime_ns == modified
+        finally:
+            await client.disconnect()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(check(directory))
+    finally:
+        unregister(peripheral.address)
+    print("Ready")
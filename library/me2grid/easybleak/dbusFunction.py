@@ -1,6 +1,17 @@
-""" Code extracted from library 'bluepi' """
+""" Code extracted from library 'bluepi'
 
+The BlueZ object tree is read once and cached by an ObjectTree, kept current by the signals of the BlueZ object manager.
+get_dbus_path resolves paths by dictionary lookups within the shared tree of the system bus (see get_object_tree).
+"""
+
+import threading
+import time
 import dbus
+import bleak
+
+from typing import Union
+from uuid import UUID
+from bleak.backends.characteristic import BleakGATTCharacteristic
 
 class constants:
     DBUS_OM_IFACE = 'org.freedesktop.DBus.ObjectManager'
@@ -23,36 +34,190 @@ def generic_error_cb(error):
     """Generic Error Callback function."""
     print('generic_error_cb: D-Bus call failed: %s', str(error))
 
-def _get_dbus_path2(objects, parent_path, iface_in, prop, value):
+class ObjectTree:
     """
-    Find DBus path for given DBus interface with property of a given value.
-
-    :param objects: Dictionary of objects to search
-    :param parent_path: Parent path to include in search
-    :param iface_in: The interface of interest
-    :param prop: The property to search for
-    :param value: The value of the property being searched for
-    :return: Path of object searched for
+    Cache of the BlueZ object tree, indexed by adapter, device address and GATT UUID.
+
+    The tree is read once by GetManagedObjects and kept current by the InterfacesAdded and InterfacesRemoved signals of
+    the object manager, thus path resolution is a dictionary lookup. The signals are received only while a D-Bus main
+    loop runs, e.g. after 'dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)'. Without main loop a failing lookup
+    reads the tree again (see 'refresh_on_miss').
+
+    Tests connect to a stand-in service on the session bus, implementing org.freedesktop.DBus.ObjectManager, as the
+    check of this module does (python -m me2grid.easybleak.dbusFunction):
+
+        tree = ObjectTree(dbus.SessionBus(), service_name='org.example.FakeBluez')
+        get_dbus_path(device='54:6C:0E:52:C7:84', tree=tree)
+
+    :param bus: The bus of the BlueZ service, None for the system bus
+    :param service_name: Bus name of the BlueZ service
+    :param root: Object path of the object manager
+    :param refresh_on_miss: Read the tree again if a lookup fails, at most once within 'refresh_interval' seconds
+    :param refresh_interval: Minimum time in seconds between two reads of the tree caused by failing lookups
     """
-    if parent_path is None:
+    GATT_INTERFACES = (constants.GATT_SERVICE_IFACE, constants.GATT_CHRC_IFACE, constants.GATT_DESC_IFACE)
+
+    def __init__(self, bus=None, service_name=constants.BLUEZ_SERVICE_NAME, root='/', refresh_on_miss=True, refresh_interval=1.0):
+        self.bus = dbus.SystemBus() if bus is None else bus
+        self.service_name = service_name
+        self.root = root
+        self.refresh_on_miss = refresh_on_miss
+        self.refresh_interval = refresh_interval
+        self.objects = {}       # path -> {interface: properties}
+        self._index = self._new_index()
+        self._last_refresh = None
+        self._lock = threading.RLock()     # The signal handlers run within the thread of the main loop
+        # Subscribed before reading the tree, so no change gets lost in between
+        self._matches = [self.bus.add_signal_receiver(handler, signal_name=signal, dbus_interface=constants.DBUS_OM_IFACE,
+                                                      bus_name=service_name, path=root)
+                         for handler, signal in ((self.interfaces_added, 'InterfacesAdded'), (self.interfaces_removed, 'InterfacesRemoved'))]
+        self.refresh()
+
+    @staticmethod
+    def _new_index():
+        return {'adapters': {},     # adapter address (lower case) or name, e.g. 'hci0' -> path
+                'devices': {},      # (adapter path, device address (lower case)) -> path
+                'attributes': {}}   # (parent path, GATT interface, UUID (lower case)) -> path
+
+    def _keys(self, path, interface, props):
+        """
+        Return the index entries of an interface of an object.
+
+        :return: List of (index name, key) tuples
+        """
+        parent, name = path.rsplit('/', 1)
+        if interface == constants.ADAPTER_INTERFACE:
+            keys = [('adapters', name)]
+            if 'Address' in props:
+                keys.append(('adapters', str(props['Address']).lower()))
+            return keys
+        if interface == constants.DEVICE_INTERFACE and 'Address' in props:
+            return [('devices', (parent, str(props['Address']).lower()))]
+        if interface in self.GATT_INTERFACES and 'UUID' in props:
+            return [('attributes', (parent, interface, str(props['UUID']).lower()))]
+        return []
+
+    def _add(self, index, path, interfaces):
+        entry = self.objects.setdefault(path, {})
+        for interface, props in interfaces.items():
+            entry[str(interface)] = props
+            for name, key in self._keys(path, str(interface), props):
+                index[name].setdefault(key, path)   # The first of equal UUIDs is found, as by a search
+
+    def refresh(self):
+        """
+        Read the whole tree by GetManagedObjects and rebuild the indices.
+        """
+        manager = dbus.Interface(self.bus.get_object(self.service_name, self.root), constants.DBUS_OM_IFACE)
+        managed = manager.GetManagedObjects()
+        with self._lock:
+            self.objects = {}
+            index = self._new_index()
+            for path, interfaces in managed.items():
+                self._add(index, str(path), interfaces)
+            self._index = index     # Lookups of other threads see either the old or the new index
+            self._last_refresh = time.monotonic()
+
+    def interfaces_added(self, path, interfaces):
+        """
+        Handler of the InterfacesAdded signal.
+        """
+        with self._lock:
+            self._add(self._index, str(path), interfaces)
+
+    def interfaces_removed(self, path, interfaces):
+        """
+        Handler of the InterfacesRemoved signal.
+        """
+        path = str(path)
+        with self._lock:
+            entry = self.objects.get(path)
+            if entry is None:
+                return
+            for interface in interfaces:
+                props = entry.pop(str(interface), None)
+                if props is None:
+                    continue
+                for name, key in self._keys(path, str(interface), props):
+                    if self._index[name].get(key) == path:
+                        other = self._find(name, key)
+                        if other is None:
+                            del self._index[name][key]
+                        else:
+                            self._index[name][key] = other
+            if not entry:
+                del self.objects[path]
+
+    def _find(self, name, key):
+        """
+        Return the path of an object providing the index entry, None if there is none.
+
+        Used if the indexed object of several with equal entries is removed, e.g. one of two services of the same UUID.
+        """
+        for path, interfaces in self.objects.items():
+            for interface, props in interfaces.items():
+                if (name, key) in self._keys(path, interface, props):
+                    return path
         return None
-    for path, iface in objects.items():
-        props = iface.get(iface_in)
-        if props is None:
-            continue
-        dev_name = "dev_" + value.lower().replace(":", "_")
-        if (props[prop].lower() == value.lower() or
-            path.lower().endswith(dev_name)) \
-                and path.startswith(parent_path):
-            return path
-    return None
 
+    def _resolve(self, adapter, device, service, characteristic, descriptor):
+        index = self._index
+        path = index['adapters'].get(adapter.lower()) if adapter is not None else '/org/bluez/hci0'
+        if device is not None and path is not None:
+            path = index['devices'].get((path, device.lower()))
+        for interface, uuid in zip(self.GATT_INTERFACES, (service, characteristic, descriptor)):
+            if uuid is not None and path is not None:
+                path = index['attributes'].get((path, interface, str(uuid).lower()))
+        return path
+
+    def path(self, adapter=None, device=None, service=None, characteristic=None, descriptor=None):
+        """
+        Return the DBus path for the given properties, None if there is no such object.
+
+        :param adapter: Adapter address or name, e.g. 'hci1'. None for '/org/bluez/hci0'.
+        :param device: Device address
+        :param service: GATT Service UUID
+        :param characteristic: GATT Characteristic UUID
+        :param descriptor: GATT Descriptor UUID
+        :return: DBus path
+        """
+        path = self._resolve(adapter, device, service, characteristic, descriptor)
+        if path is None and self.refresh_on_miss and time.monotonic() - self._last_refresh >= self.refresh_interval:
+            self.refresh()
+            path = self._resolve(adapter, device, service, characteristic, descriptor)
+        return path
+
+    def close(self):
+        """
+        Stop receiving the signals of the object manager.
+        """
+        for match in self._matches:
+            match.remove()
+        self._matches = []
+
+object_tree = None
+"""The ObjectTree shared by the module functions, see get_object_tree"""
+
+_object_tree_lock = threading.Lock()
+
+def get_object_tree():
+    """
+    Return the shared ObjectTree of the system bus, created on first use.
+
+    Assign an ObjectTree to 'object_tree' to share another one, e.g. of a stand-in service.
+    """
+    global object_tree
+    with _object_tree_lock:
+        if object_tree is None:
+            object_tree = ObjectTree()
+        return object_tree
 
 def get_dbus_path(adapter=None,
                   device=None,
                   service=None,
                   characteristic=None,
-                  descriptor=None):
+                  descriptor=None,
+                  tree=None):
     """
     Return a DBus path for the given properties
     :param adapter: Adapter address
@@ -60,53 +225,12 @@ def get_dbus_path(adapter=None,
     :param service: GATT Service UUID
     :param characteristic: GATT Characteristic UUID
     :param descriptor: GATT Descriptor UUID
+    :param tree: The ObjectTree to be searched, None for the shared tree of the system bus
     :return: DBus path
     """
-    bus = dbus.SystemBus()
-    manager = dbus.Interface(
-        bus.get_object(constants.BLUEZ_SERVICE_NAME, '/'),
-        constants.DBUS_OM_IFACE)
-    mngd_objs = manager.GetManagedObjects()
-
-    _dbus_obj_path = None
-
-    if adapter is not None:
-        _dbus_obj_path = _get_dbus_path2(mngd_objs,
-                                         '/org/bluez',
-                                         constants.ADAPTER_INTERFACE,
-                                         'Address',
-                                         adapter)
-    else:
-        _dbus_obj_path='/org/bluez/hci0'
-
-    if device is not None:
-        _dbus_obj_path = _get_dbus_path2(mngd_objs,
-                                         _dbus_obj_path,
-                                         constants.DEVICE_INTERFACE,
-                                         'Address',
-                                         device)
-
-    if service is not None:
-        _dbus_obj_path = _get_dbus_path2(mngd_objs,
-                                         _dbus_obj_path,
-                                         constants.GATT_SERVICE_IFACE,
-                                         'UUID',
-                                         service)
-
-    if characteristic is not None:
-        _dbus_obj_path = _get_dbus_path2(mngd_objs,
-                                         _dbus_obj_path,
-                                         constants.GATT_CHRC_IFACE,
-                                         'UUID',
-                                         characteristic)
-
-    if descriptor is not None:
-        _dbus_obj_path = _get_dbus_path2(mngd_objs,
-                                         _dbus_obj_path,
-                                         constants.GATT_DESC_IFACE,
-                                         'UUID',
-                                         descriptor)
-    return _dbus_obj_path
+    if tree is None:
+        tree = get_object_tree()
+    return tree.path(adapter, device, service, characteristic, descriptor)
 
 def get_iface(adapter=None,
               device=None,
@@ -139,14 +263,16 @@ def get_iface(adapter=None,
 
     return _iface
 
-def get_dbus_obj(dbus_path):
+def get_dbus_obj(dbus_path, tree=None):
     """
     Get the the DBus object for the given path
     :param dbus_path:
+    :param tree: The ObjectTree whose bus and service are used, None for the shared tree of the system bus
     :return:
     """
-    bus = dbus.SystemBus()
-    return bus.get_object(constants.BLUEZ_SERVICE_NAME, dbus_path)
+    if tree is None:
+        tree = get_object_tree()
+    return tree.bus.get_object(tree.service_name, dbus_path)
 
 def get_dbus_iface(iface, dbus_obj):
     """
@@ -161,7 +287,8 @@ def get_methods(adapter=None,
                 device=None,
                 service=None,
                 characteristic=None,
-                descriptor=None):
+                descriptor=None,
+                tree=None):
     """
     Get methods available for the specified
     :param adapter: Adapter Address
@@ -169,20 +296,22 @@ def get_methods(adapter=None,
     :param service: GATT Service UUID
     :param characteristic: GATT Characteristic UUID
     :param descriptor: GATT Descriptor UUID
+    :param tree: The ObjectTree to be searched, None for the shared tree of the system bus
     :return: Object of the DBus methods available
     """
     path_obj = get_dbus_path(adapter,
                              device,
                              service,
                              characteristic,
-                             descriptor)
+                             descriptor,
+                             tree)
     iface = get_iface(adapter,
                       device,
                       service,
                       characteristic,
                       descriptor)
     if path_obj is not None:
-        return get_dbus_iface(iface, get_dbus_obj(path_obj))
+        return get_dbus_iface(iface, get_dbus_obj(path_obj, tree))
     else:
         return None
 
@@ -193,11 +322,116 @@ def enableNotification(self, characteristicUUID: Union[BleakGATTCharacteristic,
     """
     char = self.services.get_characteristic(characteristicUUID)
     srv_uuid = char.service_uuid
-    characteristic_methods = dbusFunction.get_methods(None, self.address, srv_uuid, characteristicUUID)
+    characteristic_methods = get_methods(None, self.address, srv_uuid, characteristicUUID)
     try:
         characteristic_methods.StartNotify(
-            reply_handler  = dbusFunction.generic_start_notify_cb,
-            error_handler  = dbusFunction.generic_error_cb,
-            dbus_interface = dbusFunction.constants.GATT_CHRC_IFACE)
+            reply_handler  = generic_start_notify_cb,
+            error_handler  = generic_error_cb,
+            dbus_interface = constants.GATT_CHRC_IFACE)
     except:
         raise bleak.exc.BleakError('Characteristic %s cannot execute StartNotify' % characteristicUUID)       
+
+if __name__ == '__main__':
+    import multiprocessing
+    import os
+    import sys
+
+    STAND_IN_NAME = 'org.example.FakeBluez'
+    CONTROL_IFACE = 'org.example.FakeBluez.Control'
+    ADDRESS = '54:6C:0E:52:C7:84'
+    DEVICE = '/org/bluez/hci0/dev_54_6C_0E_52_C7_84'
+    SERVICE_UUID = '0000180a-0000-1000-8000-00805f9b34fb'
+
+    try:
+        import dbus.mainloop.glib
+        import dbus.service
+        from gi.repository import GLib
+    except ImportError as e:
+        print('Skipping the ObjectTree check, %s' % e)
+        sys.exit(0)
+    if not os.environ.get('DBUS_SESSION_BUS_ADDRESS'):
+        print('Skipping the ObjectTree check, no session bus')
+        sys.exit(0)
+
+    class StandIn(dbus.service.Object):
+        """
+        ObjectManager stand-in of BlueZ on the session bus, its objects added and removed through a control interface.
+        """
+        def __init__(self, bus):
+            super().__init__(bus, '/')
+            self.objects = {'/org/bluez/hci0': {constants.ADAPTER_INTERFACE: {'Address': 'AA:BB:CC:DD:EE:FF'}}}
+
+        @dbus.service.method(constants.DBUS_OM_IFACE, out_signature='a{oa{sa{sv}}}')
+        def GetManagedObjects(self):
+            return self.objects
+
+        @dbus.service.signal(constants.DBUS_OM_IFACE, signature='oa{sa{sv}}')
+        def InterfacesAdded(self, path, interfaces):
+            pass
+
+        @dbus.service.signal(constants.DBUS_OM_IFACE, signature='oas')
+        def InterfacesRemoved(self, path, interfaces):
+            pass
+
+        @dbus.service.method(CONTROL_IFACE, in_signature='osa{sv}')
+        def Add(self, path, interface, props):
+            self.objects.setdefault(path, {})[interface] = props
+            self.InterfacesAdded(path, {interface: props})
+
+        @dbus.service.method(CONTROL_IFACE, in_signature='os')
+        def Remove(self, path, interface):
+            del self.objects[path][interface]
+            if not self.objects[path]:
+                del self.objects[path]
+            self.InterfacesRemoved(path, [interface])
+
+    def serve(ready):
+        dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
+        bus = dbus.SessionBus()
+        name = dbus.service.BusName(STAND_IN_NAME, bus)
+        stand_in = StandIn(bus)
+        ready.set()
+        GLib.MainLoop().run()
+
+    def wait_for(condition, timeout=2.0):
+        """
+        Dispatch received signals until the condition is fulfilled or the time out expires.
+        """
+        context = GLib.MainContext.default()
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            if not context.iteration(False):
+                time.sleep(0.01)
+        return condition()
+
+    print('Testing ObjectTree with an ObjectManager stand-in on the session bus')
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(ready,), daemon=True)    # Started before this process connects to the bus
+    server.start()
+    try:
+        if not ready.wait(5.0):
+            raise RuntimeError('The stand-in service did not start')
+        dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
+        bus = dbus.SessionBus()
+        control = dbus.Interface(bus.get_object(STAND_IN_NAME, '/'), CONTROL_IFACE)
+        tree = ObjectTree(bus, service_name=STAND_IN_NAME, refresh_on_miss=False)
+        assert tree.path() == '/org/bluez/hci0'
+        assert tree.path(device=ADDRESS) is None
+
+        control.Add(DEVICE, constants.DEVICE_INTERFACE, {'Address': ADDRESS})
+        assert wait_for(lambda: tree.path(device=ADDRESS) == DEVICE), 'InterfacesAdded of the device'
+        for service in ('service0001', 'service0010'):     # Two services of the same UUID
+            control.Add(DEVICE + '/' + service, constants.GATT_SERVICE_IFACE, {'UUID': SERVICE_UUID})
+        assert wait_for(lambda: get_dbus_path(device=ADDRESS, service=SERVICE_UUID, tree=tree) == DEVICE + '/service0001')
+
+        control.Remove(DEVICE + '/service0001', constants.GATT_SERVICE_IFACE)
+        assert wait_for(lambda: tree.path(device=ADDRESS, service=SERVICE_UUID) == DEVICE + '/service0010'), 'InterfacesRemoved of a duplicate'
+        control.Remove(DEVICE + '/service0010', constants.GATT_SERVICE_IFACE)
+        assert wait_for(lambda: tree.path(device=ADDRESS, service=SERVICE_UUID) is None)
+        control.Remove(DEVICE, constants.DEVICE_INTERFACE)
+        assert wait_for(lambda: tree.path(device=ADDRESS) is None), 'InterfacesRemoved of the device'
+        tree.close()
+    finally:
+        server.terminate()
+        server.join()
+    print('Ready')
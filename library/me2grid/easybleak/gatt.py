@@ -19,27 +19,137 @@ print(EasyBleakClient.gatt())
 
 versionEasyBleak = "Library EasyBleak 1.0"
 
+import functools
+import itertools
+import math
+import operator
+import re
+import struct
+
 from enum import Enum
 from typing import Union
+from uuid import UUID
 
 def BLE_UUID(val: int) -> str:
     """ @brief Transforms a 16bit BLE specific uuid integer value to a full uuid string """
     return ("0000%04x-0000-1000-8000-00805f9b34fb" % val)
 
+def normalizeUUID(uuid) -> str:
+    """! @brief Returns the lower case 128 bit UUID string of a 16 bit, 32 bit or 128 bit UUID
+        Accepted are an 'int' (16 or 32 bit), a 'UUID', an object providing a 'uuid' member (e.g. a characteristic) or a string
+        in any capitalization, with or without '0x' prefix or dashes, e.g. '2A24', '0x2a24', '00002a24' or the full form.
+        Raises a ValueError for other strings.
+    """
+    if isinstance(uuid, str):
+        return __normalizeString__(uuid)
+    if isinstance(uuid, int):
+        return "%08x-0000-1000-8000-00805f9b34fb" % uuid
+    if isinstance(uuid, UUID):
+        return str(uuid)
+    return normalizeUUID(uuid.uuid)
+
+@functools.lru_cache(maxsize=1024)
+def __normalizeString__(uuid: str) -> str:
+    digits = uuid.strip().lower().replace("-", "")
+    if digits.startswith("0x"):
+        digits = digits[2:]
+    try:
+        if len(digits) in (4, 8):
+            return "%08x-0000-1000-8000-00805f9b34fb" % int(digits, 16)
+        if len(digits) == 32:
+            return str(UUID(digits))
+    except ValueError:
+        pass
+    raise ValueError(f"'{uuid}' is not a 16 bit, 32 bit or 128 bit UUID!")
+
+SFLOAT_SPECIAL = {0x07FF: math.nan, 0x0800: math.nan, 0x0801: math.nan, 0x07FE: math.inf, 0x0802: -math.inf}
+"""! Reserved IEEE-11073 16 bit SFLOAT values: NaN, NRes, reserved, +INFINITY and -INFINITY """
+FLOAT_SPECIAL = {0x007FFFFF: math.nan, 0x00800000: math.nan, 0x00800001: math.nan, 0x007FFFFE: math.inf, 0x00800002: -math.inf}
+"""! Reserved IEEE-11073 32 bit FLOAT values: NaN, NRes, reserved, +INFINITY and -INFINITY """
+
+def decodeSFLOAT(raw: int) -> float:
+    """! @brief Converts an IEEE-11073 16 bit SFLOAT (4 bit exponent, 12 bit mantissa, base 10) to a float """
+    special = SFLOAT_SPECIAL.get(raw)
+    if special is not None:
+        return special
+    return __decodeIEEE11073__(raw, 12, 4)
+
+def encodeSFLOAT(value: float) -> int:
+    """! @brief Converts a float to an IEEE-11073 16 bit SFLOAT with the highest precision possible """
+    return __encodeIEEE11073__(value, 12, 4, 0x07FF, 0x07FE, 0x0802)
+
+def decodeFLOAT(raw: int) -> float:
+    """! @brief Converts an IEEE-11073 32 bit FLOAT (8 bit exponent, 24 bit mantissa, base 10) to a float """
+    special = FLOAT_SPECIAL.get(raw)
+    if special is not None:
+        return special
+    return __decodeIEEE11073__(raw, 24, 8)
+
+def encodeFLOAT(value: float) -> int:
+    """! @brief Converts a float to an IEEE-11073 32 bit FLOAT with the highest precision possible """
+    return __encodeIEEE11073__(value, 24, 8, 0x007FFFFF, 0x007FFFFE, 0x00800002)
+
+def __decodeIEEE11073__(raw: int, mantissaBits: int, exponentBits: int) -> float:
+    mantissa = raw & ((1 << mantissaBits) - 1)
+    if mantissa >> (mantissaBits - 1):
+        mantissa = mantissa - (1 << mantissaBits)
+    exponent = raw >> mantissaBits
+    if exponent >> (exponentBits - 1):
+        exponent = exponent - (1 << exponentBits)
+    if exponent < 0:
+        return mantissa / 10 ** -exponent   # Division by the exact power keeps e.g. 2345e-2 at 23.45
+    return float(mantissa * 10 ** exponent)
+
+def __encodeIEEE11073__(value: float, mantissaBits: int, exponentBits: int, nan: int, inf: int, negativeInf: int) -> int:
+    if math.isnan(value):
+        return nan
+    if math.isinf(value):
+        return inf if value > 0 else negativeInf
+    mantissaMax = (1 << (mantissaBits - 1)) - 3     # The largest magnitudes are reserved for the special values
+    exponentMin = -(1 << (exponentBits - 1))
+    exponentMax = (1 << (exponentBits - 1)) - 1
+    exponent = 0
+    if value != 0:
+        exponent = max(math.ceil(math.log10(abs(value) / mantissaMax)), exponentMin)
+    while True:
+        mantissa = round(value * 10 ** -exponent if exponent < 0 else value / 10 ** exponent)
+        if abs(mantissa) <= mantissaMax:
+            break
+        exponent = exponent + 1     # Rounding exceeded the mantissa range
+    if exponent > exponentMax:
+        raise ValueError(f"The value {value} exceeds the range of the IEEE-11073 {mantissaBits + exponentBits} bit float!")
+    return ((exponent & ((1 << exponentBits) - 1)) << mantissaBits) | (mantissa & ((1 << mantissaBits) - 1))
+
 class CharacteristicType:
     """! @brief Holds the type and size information of a characterisitc
         Using this type as uuid input of methods leads to returning or input of the characteristic value in the form of
-        its intended tye (bytearray, str, int) instead of the difficult to interprete bytearray. \n
+        its intended tye (bytearray, str, int, float, tuple, list) instead of the difficult to interprete bytearray. \n
         The excample returns a string:
         @code
         >>> device.read(device.DeviceInformation.MODEL)
         @endcode
+        The conversion functions are compiled once on construction. The members 'from_bytearray' and 'to_bytearray' are
+        thus a single call without branching on the type. \n
+        Structured values are declared by a 'format' of the 'struct' module, extended by 'S' for an IEEE-11073 16 bit SFLOAT
+        and 'F' for an IEEE-11073 32 bit FLOAT. A single field is converted to a scalar, several fields to a tuple:
+        @code
+        TEMPERATURE  = CharacteristicType(BLE_UUID(0x2a6e), format="<h", scale=0.01)       # 0.01 °C resolution -> float
+        MEASUREMENT  = CharacteristicType(uuid, format="<BF")                               # (flags, FLOAT) -> tuple
+        SAMPLES      = CharacteristicType(uuid, format="<hhh", scale=(0.1, 0.1, 1), array=True)  # list of (x, y, z) records
+        @endcode
         @param uuid String representation of the characteristics UUID
-        @param type Type information of the characteristic value (e.g. str).
-        @param size Size of the characteristic value in bytes (needed to create the bytearry from e.g. the str input). The standard value zero declares a read only characteristic.
+        @param type Type information of the characteristic value (e.g. str). 'float' without 'format' declares a 4 byte IEEE-754 float, an 8 byte one by 'size=8'.
+        @param size Size of the characteristic value in bytes (needed to create the bytearry from e.g. the str input). The standard value zero declares a read only characteristic. A 'format' defines the size of its record.
         @param **kargs signed: bool - Indicating signed (True) or unsigned (False) interger values used for the characteristic (used for type 'int' only).
-        @param **kargs order: str - Byte order of the bytearray representing an inter value. State standard order 'little' or 'big' (used for type 'int' only).
+        Without the parameter values are decoded signed and encoded unsigned. A value out of the range of 'size' bytes raises a ValueError.
+        @param **kargs order: str - Byte order of the bytearray representing an inter value. State standard order 'little' or 'big' (used for type 'int' and formats without byte order character).
         @param **kargs encoding: str - The encoding for string conversion. Standard value is 'utf-8' (used for type 'str' only).
+        @param **kargs cache: float - Time in seconds a read value may be delivered from a client cache. Use 'math.inf' for static values. Standard value 'None' disables caching.
+        @param **kargs response: bool - 'False' declares a characteristic written without response (ATT write command) if the device supports it. Standard value is 'True' (acknowledged write).
+        @param **kargs coalesce: bool - 'True' sends only the latest value, if writes arrive faster than the link transmits them, e.g. for actuator states. Standard value is 'False'.
+        @param **kargs format: str - 'struct' format of a record, extended by 'S' (SFLOAT) and 'F' (FLOAT). Overrides 'type'. A bytearray not matching the record size raises a ValueError on conversion.
+        @param **kargs scale: float or tuple - Fixed point resolution the raw numbers are multiplied with, a single one for all fields or one per field (used with 'format' only).
+        @param **kargs array: bool - 'True' declares a characteristic of consecutive records converted to a list (used with 'format' only). A bytearray with an incomplete last record, e.g. a truncated notification, raises a ValueError.
     """
     def __init__(self, uuid:str, type = bytearray, size: int = 0, **kargs):
         self.uuid = uuid
@@ -48,13 +158,21 @@ class CharacteristicType:
         self.signed = True
         self.order = 'little'
         self.encoding = 'utf-8'
+        self.cache = None
+        self.response = True
+        self.coalesce = False
+        self.format = None
+        self.scale = None
+        self.array = False
         
+        self.__signedEncoding = False   # Integers are encoded signed only if declared so
         if "signed" in kargs:
             val = kargs["signed"]
             if isinstance(val, bool):
                 self.signed = val
+                self.__signedEncoding = val
             else:
-                raise ValueError("Key parameter 'signed' requires type {repr(bool)} !")
+                raise ValueError(f"Key parameter 'signed' requires type {repr(bool)} !")
         if "order" in kargs:
             val = kargs["order"]
             if val=='little' or val=='big':
@@ -66,9 +184,54 @@ class CharacteristicType:
             if isinstance(val, str):
                 self.encoding = val
             else:
-                raise ValueError("Key parameter 'order' requires type {repr(str)} !")
+                raise ValueError(f"Key parameter 'encoding' requires type {repr(str)} !")
+        if "cache" in kargs:
+            val = kargs["cache"]
+            if val is None or (isinstance(val, (int, float)) and val >= 0):
+                self.cache = val
+            else:
+                raise ValueError("Key parameter 'cache' requires a time in seconds greater or equal to zero or 'None'!")
+        if "response" in kargs:
+            val = kargs["response"]
+            if isinstance(val, bool):
+                self.response = val
+            else:
+                raise ValueError(f"Key parameter 'response' requires type {repr(bool)} !")
+        if "coalesce" in kargs:
+            val = kargs["coalesce"]
+            if isinstance(val, bool):
+                self.coalesce = val
+            else:
+                raise ValueError(f"Key parameter 'coalesce' requires type {repr(bool)} !")
+        if "format" in kargs:
+            val = kargs["format"]
+            if isinstance(val, str):
+                self.format = val
+            else:
+                raise ValueError(f"Key parameter 'format' requires type {repr(str)} !")
+        if "scale" in kargs:
+            val = kargs["scale"]
+            if val is None or isinstance(val, (int, float, tuple)):
+                self.scale = val
+            else:
+                raise ValueError(f"Key parameter 'scale' requires type {repr(float)} or {repr(tuple)} !")
+        if "array" in kargs:
+            val = kargs["array"]
+            if isinstance(val, bool):
+                self.array = val
+            else:
+                raise ValueError(f"Key parameter 'array' requires type {repr(bool)} !")
+        if self.format is None and self.type == float:
+            self.format = {2: "e", 8: "d"}.get(size, "f")
+
+        # Compiled conversions, see __compile__
+        self.from_bytearray = None  #!> Function(data: bytearray) converting a value received from the device to the type this instance specifies
+        self.to_bytearray = None    #!> Function(value) converting a value of the type this instance specifies to the bytearray to be written
+        self.from_bytearray, self.to_bytearray = self.__compile__()
 
     def __str__(self):
+        if self.format is not None:
+            return "CharacteristicType(uuid={0}, format={1}, size={2})".format(self.uuid, self.format, self.size)
         return "CharacteristicType(uuid={0}, type={1}, size={2})".format(self.uuid, self.type, self.size)
     
     @staticmethod
@@ -79,34 +242,170 @@ class CharacteristicType:
         else:
             res = array + bytearray(length-len(array))
         return res
-        
-    def from_bytearray(self, data: bytearray) -> Union[bytearray, str, int]:
-        """! @brief Converts a bytearry to the type specified within this instance """
-        if self.type == bytearray:
-            return data
-        if self.type == str:
-            return data.decode("utf-8")
-        if self.type == int:
-            return int.from_bytes(data, self.order, signed = self.signed)
-        
-    def to_bytearray(self, value: Union[bytearray, str, int]) -> bytearray:
-        """! @brief Converts a value of the type this instance specifies to the according bytearry """
-        if isinstance(value, bytes):
-            value = bytearray(value)
-        if not isinstance(value, self.type):
-            raise ValueError(f"Parameter 'value' requires type {repr(self.type)} !")
-        if self.type is not bytearray and self.size <= 0:
-            raise ValueError("The instance specifies a read only characteristc (size=0)! Conversion is not possible.")
-        res = None
+
+    def __compile__(self) -> tuple:
+        """! @brief \b private Returns the functions converting from and to the bytearray of the characteristic """
+        if self.format is not None:
+            return self.__compileFormat__()
         if self.type == bytearray:
-            res = value
+            def decode(data: bytearray) -> bytearray:
+                return data
+            def encode(value: Union[bytearray, bytes]) -> bytearray:
+                if isinstance(value, bytearray):
+                    return value
+                if isinstance(value, bytes):
+                    return bytearray(value)
+                raise ValueError(f"Parameter 'value' requires type {repr(bytearray)} !")
+            return decode, encode
         if self.type == str:
-            res = bytearray("test", encoding="utf-8")
+            encoding = self.encoding
+            size = self.size
+            def decode(data: bytearray) -> str:
+                return data.decode(encoding)
+            def encode(value: str) -> bytearray:
+                if not isinstance(value, str):
+                    raise ValueError(f"Parameter 'value' requires type {repr(str)} !")
+                if size <= 0:
+                    raise ValueError("The instance specifies a read only characteristc (size=0)! Conversion is not possible.")
+                return CharacteristicType.bytearrayToLen(bytearray(value, encoding), size)
+            return decode, encode
         if self.type == int:
-            res = bytearray(value.to_bytes(self.size,'little'))
-        if res is None:
-             raise ValueError(f"The instance defines a not supported type {type(value)} !")
-        return res
+            order = self.order
+            signed = self.signed
+            signedEncoding = self.__signedEncoding
+            size = self.size
+            fromBytes = int.from_bytes
+            def decode(data: bytearray) -> int:
+                return fromBytes(data, order, signed=signed)
+            def encode(value: int) -> bytearray:
+                if not isinstance(value, int):
+                    raise ValueError(f"Parameter 'value' requires type {repr(int)} !")
+                if size <= 0:
+                    raise ValueError("The instance specifies a read only characteristc (size=0)! Conversion is not possible.")
+                try:
+                    return bytearray(value.to_bytes(size, order, signed=signedEncoding))
+                except OverflowError:
+                    raise ValueError(f"Parameter 'value' {value} does not fit into {size} {'signed' if signedEncoding else 'unsigned'} byte(s) !") from None
+            return decode, encode
+        raise ValueError(f"The instance defines a not supported type {self.type} !")
+
+    def __compileFormat__(self) -> tuple:
+        """! @brief \b private Compiles the 'format' into 'struct' conversions with per field converters
+            Arrays are unpacked by a single 'struct' call for all records. Each field is converted as a whole column by 'map'
+            and the records are rebuilt by 'zip', thus no Python loop runs per record.
+        """
+        fmt = self.format.replace(" ", "")
+        order = fmt[0] if fmt and fmt[0] in "@=<>!" else ("<" if self.order == 'little' else ">")
+        body = fmt[1:] if fmt and fmt[0] in "@=<>!" else fmt
+        codes = []      # one struct code per field, 'S' and 'F' for the IEEE-11073 floats
+        compiled = ""
+        for count, code in re.findall(r"(\d*)([a-zA-Z?])", body):
+            if code in "sp":
+                codes.append(code)
+                compiled = compiled + count + code
+            elif code == "x":
+                compiled = compiled + count + code
+            else:
+                codes.extend([code] * int(count or 1))
+                compiled = compiled + count + {"S": "H", "F": "I"}.get(code, code)
+        if re.sub(r"\d*[a-zA-Z?]", "", body) or not codes:
+            raise ValueError(f"Key parameter 'format' '{self.format}' is not a valid record format!")
+        record = struct.Struct(order + compiled)
+        fields = len(codes)
+        scales = self.scale if isinstance(self.scale, tuple) else (self.scale,) * fields
+        if len(scales) != fields:
+            raise ValueError(f"Key parameter 'scale' requires {fields} factors for the format '{self.format}'!")
+        self.size = record.size
+        self.type = list if self.array else (tuple if fields > 1 else None)
+
+        decoders = []   # per field function(raw value) -> value, 'None' for unchanged fields
+        encoders = []   # per field function(value) -> raw value, 'None' for unchanged fields
+        for code, scale in zip(codes, scales):
+            decoder = {"S": decodeSFLOAT, "F": decodeFLOAT}.get(code)
+            encoder = {"S": encodeSFLOAT, "F": encodeFLOAT}.get(code)
+            if scale is not None and scale != 1:
+                divisor = 1 / scale
+                if abs(divisor - round(divisor)) < 1e-9:
+                    multiply = float(round(divisor)).__rtruediv__    # Division by e.g. 100 avoids results like 0.30000000000000004
+                else:
+                    multiply = functools.partial(operator.mul, scale)
+                divide = float(divisor).__mul__
+                decoder = multiply if decoder is None else (lambda raw, decoder=decoder, multiply=multiply: multiply(decoder(raw)))
+                toRaw = divide if code in "SFefd" else (lambda value, divide=divide: round(divide(value)))
+                encoder = toRaw if encoder is None else (lambda value, encoder=encoder, toRaw=toRaw: encoder(toRaw(value)))
+            if self.type is None:   # A single field declares the type of the scalar value
+                self.type = float if decoder is not None or code in "efd" else (bytes if code in "sp" else (bool if code == "?" else int))
+            decoders.append(decoder)
+            encoders.append(encoder)
+        decoders = decoders if any(decoders) else None
+        encoders = encoders if any(encoders) else None
+
+        def columns(values: tuple, converters: list) -> list:
+            # Converts the flat values of consecutive records column by column
+            flat = list(values)
+            for column, converter in enumerate(converters):
+                if converter is not None:
+                    flat[column::fields] = map(converter, values[column::fields])
+            return flat
+
+        unpack = record.unpack
+        pack = record.pack
+        size = record.size
+        invalid = "Parameter 'value' {0!r} does not fit the format '" + self.format + "': {1}"
+        malformed = "Parameter 'data' {0!r} does not fit the format '" + self.format + "': {1}"
+        if self.array:
+            def decode(data: bytearray) -> list:
+                try:
+                    values = struct.unpack(order + compiled * (len(data) // size), data)
+                except struct.error as e:   # An incomplete last record is not silently dropped
+                    raise ValueError(malformed.format(data, e)) from None
+                if decoders is not None:
+                    values = columns(values, decoders)
+                if fields == 1:
+                    return list(values)
+                return list(zip(*[iter(values)] * fields))      # groups the flat values into records
+            def encode(value: list) -> bytearray:
+                try:
+                    values = tuple(value) if fields == 1 else tuple(itertools.chain.from_iterable(value))
+                    if encoders is not None:
+                        values = columns(values, encoders)
+                    return bytearray(struct.pack(order + compiled * len(value), *values))
+                except (struct.error, TypeError) as e:
+                    raise ValueError(invalid.format(value, e)) from None
+        elif fields > 1:
+            def decode(data: bytearray) -> tuple:
+                try:
+                    values = unpack(data)
+                except struct.error as e:
+                    raise ValueError(malformed.format(data, e)) from None
+                return tuple(columns(values, decoders)) if decoders is not None else values
+            def encode(value: tuple) -> bytearray:
+                try:
+                    return bytearray(pack(*(columns(tuple(value), encoders) if encoders is not None else value)))
+                except (struct.error, TypeError) as e:
+                    raise ValueError(invalid.format(value, e)) from None
+        else:
+            convert = decoders[0] if decoders is not None else None
+            convertRaw = encoders[0] if encoders is not None else None
+            if convert is None:
+                def decode(data: bytearray):
+                    try:
+                        return unpack(data)[0]
+                    except struct.error as e:
+                        raise ValueError(malformed.format(data, e)) from None
+            else:
+                def decode(data: bytearray):
+                    try:
+                        raw = unpack(data)[0]
+                    except struct.error as e:
+                        raise ValueError(malformed.format(data, e)) from None
+                    return convert(raw)
+            def encode(value) -> bytearray:
+                try:
+                    return bytearray(pack(value if convertRaw is None else convertRaw(value)))
+                except (struct.error, TypeError) as e:
+                    raise ValueError(invalid.format(value, e)) from None
+        return decode, encode
 
 class BaseService(Enum):
     """! @brief Base class for characteristic enumerations
@@ -147,23 +446,92 @@ class BaseService(Enum):
         return "<enum '{0}.{1}' {2}>".format(cls.__module__, cls.__name__, cls.characteristics())
 
     @classmethod
-    def fromUUID(cls, uuid:str):
-        """! @brief Deliveres the enumeration entity or the enumeration itself of a given UUID string """
-        for c in cls:
-            if c.uuidService == uuid:
-                return cls
-            if c.uuid == uuid:
-                return c
-        return None
- 
+    def fromUUID(cls, uuid: Union[str, int, UUID]):
+        """! @brief Deliveres the enumeration entity or the enumeration itself of a given UUID
+            The UUID may be given in any form accepted by \ref normalizeUUID. The lookup uses an index built on first use.
+        """
+        index = cls.__dict__.get("_BaseService__index")
+        if index is None:
+            index = {}
+            service = cls.uuidService()
+            if service is not None:
+                index[normalizeUUID(service)] = cls
+            for c in cls:
+                index.setdefault(normalizeUUID(c.uuid), c)
+            cls._BaseService__index = index
+        return lookupUUID(index, uuid)
+
+def lookupUUID(index: dict, uuid):
+    """! @brief Returns the value of the UUID within an index keyed by normalized UUIDs, 'None' if not found
+        Lower case 128 bit UUID strings, as received from bleak, are found by a single dictionary lookup.
+    """
+    found = index.get(uuid) if isinstance(uuid, str) else None
+    if found is None:
+        try:
+            found = index.get(normalizeUUID(uuid))
+        except (ValueError, AttributeError):
+            return None
+    return found
+
 class ClassServices(dict):
-    # Hint for future changes: the __new__ constructor might be an option for avoiding the class GATT_Dict
-    # proposed class GattServices
-    
-    #     def __new__(cls, *args, **kwargs):
-    #         obj = super(MyList, cls).__new__(cls, *args, **kwargs)
-    #         obj.append('FirstMen')
-    #         return obj
+    """! @brief Dictionary of service names and their enumeration classes with a UUID index of services and characteristics
+        The index is built on the first \ref fromUUID call and rebuilt after the dictionary has changed.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__index = None
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.__index = None
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.__index = None
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.__index = None
+
+    def setdefault(self, key, default = None):
+        self.__index = None
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self.__index = None
+        return super().pop(*args)
+
+    def popitem(self):
+        self.__index = None
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self.__index = None
+
+    def __buildIndex__(self) -> dict:
+        """! @brief \b private Indexes the services and characteristics by their normalized UUIDs
+            A UUID declared several times resolves to its first occurrence, services before their characteristics.
+        """
+        index = {}
+        for service in self.values():
+            uuidService = service.uuidService()
+            if uuidService is not None:
+                index.setdefault(normalizeUUID(uuidService), service)
+            for char in service:
+                index.setdefault(normalizeUUID(char.uuid), char)
+        self.__index = index
+        return index
+
+    def fromUUID(self, uuid: Union[str, int, UUID]):
+        """! @brief Deliveres the service enumeration class or characteristic enumeration entity of a UUID in constant time
+            @param uuid A UUID in any form accepted by \ref normalizeUUID, e.g. 0x2a24, '2A24' or a bleak characteristic
+            @returns 'None' if the UUID is unknown
+        """
+        index = self.__index
+        if index is None:
+            index = self.__buildIndex__()
+        return lookupUUID(index, uuid)
 
     def __str__(self):
         ret = "<dict '"+__class__.__module__+"."+__class__.__name__+"' {\n"
@@ -171,3 +539,18 @@ class ClassServices(dict):
             ret = ret + " '{0}':{1}\n".format(key, value.toString())
         ret = ret + "}>"
         return ret
+
+if __name__ == "__main__":
+    print("Testing CharacteristicType conversions")
+    level = CharacteristicType(BLE_UUID(0x2a19), int, 1)
+    assert level.to_bytearray(200) == bytearray(b"\xc8")     # Encoded unsigned by default
+    offset = CharacteristicType(BLE_UUID(0x2a19), int, 2, signed=True)
+    assert offset.to_bytearray(-2) == bytearray(b"\xfe\xff") and offset.from_bytearray(bytearray(b"\xfe\xff")) == -2
+    record = CharacteristicType(BLE_UUID(0x2a6e), format="<hH")
+    for convert, value in ((level.to_bytearray, 256), (level.to_bytearray, -1), (record.from_bytearray, bytearray(3))):
+        try:
+            convert(value)
+            raise AssertionError(f"{value!r} accepted")
+        except ValueError as e:
+            print(f"Rejected as expected: {e}")
+    print("Ready")
@@ -5,12 +5,13 @@
 
 @brief Provides predifined service enumerations containing their characteristics
 """
+from math import inf
 from typing import Union
 
-try: # Necessary, to run this file directly
-    from gatt import BaseService, CharacteristicType
-except:
+if __package__:
     from me2grid.easybleak.gatt import BaseService, CharacteristicType
+else: # Necessary, to run this file directly
+    from gatt import BaseService, CharacteristicType
 
 class GenericAccessService(BaseService):
     """! @brief Enumeration of characteristics within the 'Generic Access' service """
@@ -30,16 +31,18 @@ class GenericAttributeProfileService(BaseService):
         return "00001801-0000-1000-8000-00805f9b34fb"
     
 class DeviceInformationService(BaseService):
-    """! @brief Enumeration of characteristics within the 'Device Information' service """
-    SYSTEM_ID               = CharacteristicType("00002a23-0000-1000-8000-00805f9b34fb")           #!> System ID
-    MODEL                   = CharacteristicType("00002a24-0000-1000-8000-00805f9b34fb", str)      #!> Model Number String
-    SERIAL                  = CharacteristicType("00002a25-0000-1000-8000-00805f9b34fb", str)      #!> Serial Number String
-    FIRMWARE                = CharacteristicType("00002a26-0000-1000-8000-00805f9b34fb", str)      #!> Hardware Revision String
-    HARDWARE                = CharacteristicType("00002a27-0000-1000-8000-00805f9b34fb", str)      #!> Hardware Revision String
-    SOFTWARE                = CharacteristicType("00002a28-0000-1000-8000-00805f9b34fb", str)      #!> Software Revision String
-    MANUFACTURER            = CharacteristicType("00002a29-0000-1000-8000-00805f9b34fb", str)      #!> Manufacturer Name String
-    IEEE_CERT               = CharacteristicType("00002a2a-0000-1000-8000-00805f9b34fb")           #!> IEEE 11073-20601 Regulatory Cert. Data List
-    PNP_ID                  = CharacteristicType("00002a50-0000-1000-8000-00805f9b34fb")           #!> PnP ID
+    """! @brief Enumeration of characteristics within the 'Device Information' service
+        All values are static and therefore cached forever, if the client cache is used.
+    """
+    SYSTEM_ID               = CharacteristicType("00002a23-0000-1000-8000-00805f9b34fb", cache=inf)            #!> System ID
+    MODEL                   = CharacteristicType("00002a24-0000-1000-8000-00805f9b34fb", str, cache=inf)       #!> Model Number String
+    SERIAL                  = CharacteristicType("00002a25-0000-1000-8000-00805f9b34fb", str, cache=inf)       #!> Serial Number String
+    FIRMWARE                = CharacteristicType("00002a26-0000-1000-8000-00805f9b34fb", str, cache=inf)       #!> Hardware Revision String
+    HARDWARE                = CharacteristicType("00002a27-0000-1000-8000-00805f9b34fb", str, cache=inf)       #!> Hardware Revision String
+    SOFTWARE                = CharacteristicType("00002a28-0000-1000-8000-00805f9b34fb", str, cache=inf)       #!> Software Revision String
+    MANUFACTURER            = CharacteristicType("00002a29-0000-1000-8000-00805f9b34fb", str, cache=inf)       #!> Manufacturer Name String
+    IEEE_CERT               = CharacteristicType("00002a2a-0000-1000-8000-00805f9b34fb", cache=inf)            #!> IEEE 11073-20601 Regulatory Cert. Data List
+    PNP_ID                  = CharacteristicType("00002a50-0000-1000-8000-00805f9b34fb", cache=inf)            #!> PnP ID
 
     @classmethod
     def uuidService(cls) -> str:
@@ -0,0 +1,232 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  metrics.py
+
+@brief Provides latency and throughput metrics of BLE operations per device
+
+Each \ref ExtBleakClient records its operations within the \ref DeviceMetrics of its device address, held by the
+module wide \ref registry. Latencies are collected by \ref Histogram objects, events like retries, notifications and
+disconnects by counters.
+
+@code{.py}
+print(client.stats())                  # metrics of a single device
+print(metrics.registry.stats())        # metrics of all devices
+with open("easybleak.prom", "w") as file:
+    file.write(metrics.prometheusText())
+@endcode
+"""
+
+import bisect
+import threading
+import time
+
+from typing import Union
+
+class Histogram():
+    """! @brief Distribution of durations in seconds counted within buckets of upper bounds
+        @param bounds Ascending upper bounds of the buckets in seconds. A final bucket without bound is added.
+    """
+    defaultBounds = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)    #!> Standard bucket bounds
+
+    def __init__(self, bounds: Union[tuple, None] = None):
+        self.bounds = tuple(bounds) if bounds is not None else self.defaultBounds
+        self.buckets = [0] * (len(self.bounds) + 1)     #!> Number of values per bucket (not cumulative)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        """! @brief Adds a value to the distribution """
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count = self.count + 1
+        self.sum = self.sum + value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> Union[float, None]:
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q: float) -> Union[float, None]:
+        """! @brief Returns the upper bound of the bucket containing the quantile 'q' (0.0 ... 1.0), the maximum for the last bucket """
+        if not self.count:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, number in zip(self.bounds, self.buckets):
+            total = total + number
+            if total >= rank:
+                return bound
+        return self.max
+
+    def stats(self) -> dict:
+        """! @brief Returns a dictionary with 'count', 'mean', 'min', 'max', 'p50' and 'p99' """
+        return {"count": self.count, "mean": self.mean, "min": self.min, "max": self.max,
+                "p50": self.quantile(0.5), "p99": self.quantile(0.99)}
+
+class DeviceMetrics():
+    """! @brief Metrics of the operations on a single device
+        Latencies are kept per operation name (e.g. 'connect', 'read', 'write', 'request'), notifications per characteristic
+        and disconnects per reason ('requested' by the client or 'remote').
+        @param address The MAC address of the device
+    """
+    def __init__(self, address: str):
+        self.address = address
+        self.created = time.monotonic()
+        self.latencies = {}         #!> operation -> Histogram
+        self.counters = {}          #!> event -> number, e.g. 'retries', 'errors'
+        self.notifications = {}     #!> characteristic uuid -> number of notifications received
+        self.disconnects = {}       #!> reason -> number of disconnects
+        self.__lock = threading.Lock()
+
+    def observe(self, operation: str, seconds: float):
+        """! @brief Records the duration of an operation """
+        with self.__lock:
+            histogram = self.latencies.get(operation)
+            if histogram is None:
+                histogram = self.latencies[operation] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, event: str, number: int = 1):
+        """! @brief Increments the counter of an event """
+        with self.__lock:
+            self.counters[event] = self.counters.get(event, 0) + number
+
+    def notified(self, uuid: str):
+        """! @brief Counts a notification of the characteristic """
+        with self.__lock:
+            self.notifications[uuid] = self.notifications.get(uuid, 0) + 1
+
+    def disconnected(self, reason: str):
+        """! @brief Counts a disconnect of the passed reason """
+        with self.__lock:
+            self.disconnects[reason] = self.disconnects.get(reason, 0) + 1
+
+    def timer(self, operation: str) -> 'OperationTimer':
+        """! @brief Returns a context manager recording the duration of the enclosed operation
+            @code{.py}
+            with self.metrics.timer("read"):
+                data = await self.read_gatt_char(char)
+            @endcode
+        """
+        return OperationTimer(self, operation)
+
+    def stats(self) -> dict:
+        """! @brief Returns a dictionary of all metrics, including the notification rates per second since creation """
+        elapsed = max(time.monotonic() - self.created, 1e-9)
+        with self.__lock:
+            return {"latencies": {operation: histogram.stats() for operation, histogram in self.latencies.items()},
+                    "counters": dict(self.counters),
+                    "notifications": {uuid: {"count": number, "rate": number / elapsed} for uuid, number in self.notifications.items()},
+                    "disconnects": dict(self.disconnects)}
+
+class OperationTimer():
+    """! @brief Context manager recording the duration of an operation, see \ref DeviceMetrics.timer
+        Failed operations are counted as '<operation>_errors' and not recorded as latency.
+    """
+    def __init__(self, metrics: DeviceMetrics, operation: str):
+        self.metrics = metrics
+        self.operation = operation
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.metrics.observe(self.operation, time.monotonic() - self.start)
+        else:
+            self.metrics.count(self.operation + "_errors")
+        return False
+
+class MetricsRegistry():
+    """! @brief Collection of the \ref DeviceMetrics of all devices, keyed by the MAC address """
+    def __init__(self):
+        self.devices = {}
+        self.__lock = threading.Lock()
+
+    def device(self, address: str) -> DeviceMetrics:
+        """! @brief Returns the metrics of the device, creating them on first use """
+        key = address.upper()
+        with self.__lock:
+            metrics = self.devices.get(key)
+            if metrics is None:
+                metrics = self.devices[key] = DeviceMetrics(key)
+            return metrics
+
+    def stats(self) -> dict:
+        """! @brief Returns a dictionary of the device addresses and their metrics (see \ref DeviceMetrics.stats) """
+        return {address: metrics.stats() for address, metrics in list(self.devices.items())}
+
+    def clear(self):
+        """! @brief Removes the metrics of all devices """
+        with self.__lock:
+            self.devices.clear()
+
+registry = MetricsRegistry()
+"""! The registry used by all clients """
+
+def prometheusText(metricsRegistry: Union[MetricsRegistry, None] = None, prefix: str = "easybleak") -> str:
+    """! @brief Returns the metrics in the Prometheus text exposition format, e.g. to be written to a file of the node exporter textfile collector
+        @param metricsRegistry The registry to be exported. 'None' uses the module wide \ref registry.
+        @param prefix Prefix of all metric names
+    """
+    if metricsRegistry is None:
+        metricsRegistry = registry
+    latencies = []
+    counters = []
+    notifications = []
+    disconnects = []
+    for address, device in sorted(metricsRegistry.devices.items()):
+        for operation, histogram in sorted(device.latencies.items()):
+            labels = f'device="{address}",operation="{operation}"'
+            total = 0
+            for bound, number in zip(histogram.bounds, histogram.buckets):
+                total = total + number
+                latencies.append(f'{prefix}_operation_seconds_bucket{{{labels},le="{bound}"}} {total}')
+            latencies.append(f'{prefix}_operation_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            latencies.append(f'{prefix}_operation_seconds_sum{{{labels}}} {histogram.sum}')
+            latencies.append(f'{prefix}_operation_seconds_count{{{labels}}} {histogram.count}')
+        for event, number in sorted(device.counters.items()):
+            counters.append(f'{prefix}_events_total{{device="{address}",event="{event}"}} {number}')
+        for uuid, number in sorted(device.notifications.items()):
+            notifications.append(f'{prefix}_notifications_total{{device="{address}",characteristic="{uuid}"}} {number}')
+        for reason, number in sorted(device.disconnects.items()):
+            disconnects.append(f'{prefix}_disconnects_total{{device="{address}",reason="{reason}"}} {number}')
+    lines = []
+    for name, kind, description, samples in ((f"{prefix}_operation_seconds", "histogram", "Duration of BLE operations", latencies),
+                                             (f"{prefix}_events_total", "counter", "BLE events like retries and errors", counters),
+                                             (f"{prefix}_notifications_total", "counter", "Notifications received", notifications),
+                                             (f"{prefix}_disconnects_total", "counter", "Disconnects by reason", disconnects)):
+        if samples:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+    return "\n".join(lines) + "\n" if lines else ""
+
+if __name__ == "__main__":
+    print("Testing DeviceMetrics: bucketed latencies, failed operations, Prometheus export")
+    metricsRegistry = MetricsRegistry()
+    device = metricsRegistry.device("54:6c:0e:00:00:01")
+    assert metricsRegistry.device("54:6C:0E:00:00:01") is device
+    for seconds in (0.001, 0.002, 0.02, 0.3):
+        device.observe("read", seconds)
+    assert device.latencies["read"].quantile(0.5) == 0.005 and device.latencies["read"].quantile(1.0) == 0.5
+    try:
+        with device.timer("write"):
+            raise TimeoutError()
+    except TimeoutError:
+        pass
+    assert "write" not in device.latencies and device.counters == {"write_errors": 1}
+    device.notified("0000aa01-0000-1000-8000-00805f9b34fb")
+    device.disconnected("remote")
+    text = prometheusText(metricsRegistry)
+    assert 'easybleak_operation_seconds_bucket{device="54:6C:0E:00:00:01",operation="read",le="+Inf"} 4' in text
+    assert 'easybleak_events_total{device="54:6C:0E:00:00:01",event="write_errors"} 1' in text
+    assert 'easybleak_disconnects_total{device="54:6C:0E:00:00:01",reason="remote"} 1' in text
+    print("Ready")
@@ -0,0 +1,167 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  notifications.py
+
+@brief Provides a bounded buffer of timestamped notifications to be consumed in batches
+
+A \ref NotificationBuffer memorizes notifications of one characteristic together with their time of reception. The
+consumer drains them in batches instead of being called for each notification. The capacity is limited; the
+\ref Overflow policy decides what happens to notifications arriving at a full buffer. Dropped notifications are counted.
+
+@code{.py}
+await client.bufferNotifications(OpticalSensor.DATA, capacity=100, overflow=Overflow.DROP_OLDEST)
+...
+for timestamp, data in await client.drainNotifications(OpticalSensor.DATA):
+    print(timestamp, data)
+@endcode
+
+All methods are to be called within the asyncio loop of the client.
+"""
+
+import asyncio
+import time
+
+from collections import deque
+from enum import Enum
+from typing import Union
+
+class Overflow(Enum):
+    """! @brief Policies for notifications arriving at a full \ref NotificationBuffer """
+    DROP_OLDEST = 0     #!> The oldest memorized notification is discarded
+    DROP_NEWEST = 1     #!> The arriving notification is discarded
+    BLOCK       = 2     #!> The arriving notification waits for free space up to 'blockTimeOut' and is discarded afterwards. For 'put' only, see \ref NotificationBuffer.handler
+
+class NotificationBuffer():
+    """! @brief Bounded buffer of (timestamp, data) tuples of a notifying characteristic
+        Timestamps are taken from the monotonic clock ('time.monotonic') at reception.
+        @param capacity Maximum number of memorized notifications
+        @param overflow The \ref Overflow policy of a full buffer
+        @param blockTimeOut Maximum time in seconds a notification waits for free space with the BLOCK policy
+    """
+    def __init__(self, capacity: int = 256, overflow: Overflow = Overflow.DROP_OLDEST, blockTimeOut: float = 1.0):
+        if capacity < 1:
+            raise ValueError("The capacity of a notification buffer must be at least 1!")
+        self.capacity = capacity
+        self.overflow = overflow
+        self.blockTimeOut = blockTimeOut
+        self.received = 0   #!> Number of notifications received
+        self.dropped = 0    #!> Number of notifications discarded due to overflow
+        self.blocked = 0    #!> Number of notifications which had to wait for free space (BLOCK policy)
+        self.__items = deque()
+        self.__waiters = []     # futures of producers and consumers waiting for a change
+
+    def __len__(self):
+        return len(self.__items)
+
+    async def __wait__(self, predicate, timeOut: float) -> bool:
+        """! @brief \b private Waits until the predicate is fulfilled or the time out expires
+            @returns The final value of the predicate
+        """
+        deadline = time.monotonic() + timeOut
+        while not predicate():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            waiter = asyncio.get_running_loop().create_future()
+            self.__waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                return predicate()
+            finally:
+                if waiter in self.__waiters:
+                    self.__waiters.remove(waiter)
+        return True
+
+    def statistics(self) -> dict:
+        """! @brief Returns a dictionary with the counters 'received', 'dropped', 'blocked' and the number of 'buffered' notifications """
+        return {"received": self.received, "dropped": self.dropped, "blocked": self.blocked, "buffered": len(self.__items)}
+
+    def handler(self):
+        """! @brief Returns the notification handler appending to this buffer, to be passed to 'start_notify'
+            A notification handler can not hold back the device, waiting handlers would only pile up as tasks.
+            Therefore the BLOCK policy is rejected here; it applies to producers awaiting \ref put.
+        """
+        if self.overflow == Overflow.BLOCK:
+            raise ValueError("The BLOCK policy requires producers awaiting 'put', notifications can only be dropped!")
+
+        def handler(sender, data: bytearray):
+            self.append(data)
+        return handler
+
+    def append(self, data: bytearray, timestamp: Union[float, None] = None) -> bool:
+        """! @brief Appends a notification without waiting. A full buffer is handled by DROP_OLDEST or else drops the passed notification.
+            @returns 'False' if the passed notification has been dropped
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self.received = self.received + 1
+        if len(self.__items) >= self.capacity:
+            self.dropped = self.dropped + 1
+            if self.overflow != Overflow.DROP_OLDEST:
+                return False
+            self.__items.popleft()
+        self.__items.append((timestamp, data))
+        self.__notify__()
+        return True
+
+    async def put(self, data: bytearray) -> bool:
+        """! @brief Appends a notification, waiting for free space in case of the BLOCK policy
+            @returns 'False' if the notification has been dropped
+        """
+        timestamp = time.monotonic()
+        if self.overflow != Overflow.BLOCK or len(self.__items) < self.capacity:
+            return self.append(data, timestamp)
+        self.blocked = self.blocked + 1
+        await self.__wait__(lambda: len(self.__items) < self.capacity, self.blockTimeOut)
+        return self.append(data, timestamp)
+
+    async def drain(self, maxItems: Union[int, None] = None, timeOut: float = 0.0) -> [tuple]:
+        """! @brief Removes and returns the memorized notifications as list of (timestamp, data) tuples, oldest first
+            @param maxItems Maximum number of notifications returned. 'None' returns all.
+            @param timeOut Time in seconds to wait for a notification, if the buffer is empty
+        """
+        if not self.__items and timeOut > 0:
+            await self.__wait__(lambda: len(self.__items) > 0, timeOut)
+        count = len(self.__items) if maxItems is None else min(maxItems, len(self.__items))
+        batch = [self.__items.popleft() for i in range(count)]
+        if batch:
+            self.__notify__()
+        return batch
+
+    def clear(self):
+        """! @brief Discards all memorized notifications """
+        self.__items.clear()
+        self.__notify__()
+
+    def __notify__(self):
+        """! @brief \b private Wakes up waiting producers and consumers """
+        waiters = self.__waiters
+        self.__waiters = []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+if __name__ == "__main__":
+    print("Testing NotificationBuffer: overflow policies")
+    async def check():
+        for overflow, expected in ((Overflow.DROP_OLDEST, [b"2", b"3"]), (Overflow.DROP_NEWEST, [b"1", b"2"])):
+            buffer = NotificationBuffer(2, overflow)
+            handler = buffer.handler()
+            for data in (b"1", b"2", b"3"):
+                handler(None, data)
+            assert [data for timestamp, data in await buffer.drain()] == expected and buffer.dropped == 1, overflow
+        buffer = NotificationBuffer(1, Overflow.BLOCK, blockTimeOut=1.0)
+        try:
+            buffer.handler()
+            raise AssertionError("BLOCK accepted for a notification handler")
+        except ValueError:
+            pass
+        await buffer.put(b"1")
+        waiting = asyncio.ensure_future(buffer.put(b"2"))
+        await asyncio.sleep(0.01)
+        assert not waiting.done() and buffer.blocked == 1
+        assert await buffer.drain() != [] and await waiting and buffer.dropped == 0
+    asyncio.run(check())
+    print("Ready")
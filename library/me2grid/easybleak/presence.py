@@ -0,0 +1,187 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  presence.py
+
+@brief Registry of the devices seen by the scanners with their smoothed RSSI and advertising interval
+
+Each \ref EasyBleakScanner records every received advertisement, before filtering, within the module wide \ref registry.
+A device is reachable if it advertised within a few of its estimated advertising intervals. A client using the registry
+fails at once on its first connect to an absent device, instead of waiting for the connect time out of bleak. A connected
+device usually stops advertising, thus the connects and disconnects of the clients count as presence as well, and
+reconnects of a client are not checked.
+
+@code{.py}
+EasyBleakScanner().scan(timeOut=2.0)            # or a continuous scan, e.g. within the background loop
+print(presence.registry.isReachable("54:6C:0E:52:C7:84"))
+print(presence.registry.stats())
+
+tag = SensorTag("54:6C:0E:52:C7:84")
+tag.usePresence()                               # the first connect raises a BleakError at once if the tag is absent
+@endcode
+"""
+
+import threading
+import time
+
+from typing import Union
+
+class DevicePresence():
+    """! @brief Presence record of a single device, updated by \ref PresenceRegistry.observe
+        @param address The MAC address of the device
+        @param now Monotonic time of the first advertisement
+    """
+    def __init__(self, address: str, now: float):
+        self.address = address
+        self.name = None            #!> Latest advertised name, 'None' if never advertised
+        self.firstSeen = now        #!> Monotonic time of the first advertisement
+        self.lastSeen = now         #!> Monotonic time of the latest advertisement
+        self.count = 0              #!> Number of received advertisements
+        self.rssi = None            #!> RSSI in dBm of the latest advertisement
+        self.smoothedRssi = None    #!> Exponentially smoothed RSSI in dBm
+        self.interval = None        #!> Smoothed time in seconds between advertisements, 'None' before the second advertisement
+        self.connectable = None     #!> 'False' for non-connectable advertisements, 'None' if the backend does not report it
+        self.lastConnected = None   #!> Monotonic time of the latest connect or disconnect of a client, 'None' if never connected
+
+    def age(self, now: Union[float, None] = None) -> float:
+        """! @brief Returns the time in seconds since the latest advertisement """
+        return (time.monotonic() if now is None else now) - self.lastSeen
+
+    def silence(self, now: Union[float, None] = None) -> float:
+        """! @brief Returns the time in seconds since the latest advertisement, connect or disconnect """
+        now = time.monotonic() if now is None else now
+        return now - (self.lastSeen if self.lastConnected is None else max(self.lastSeen, self.lastConnected))
+
+    def stats(self) -> dict:
+        return {"name": self.name, "age": self.age(), "silence": self.silence(), "count": self.count, "rssi": self.rssi, "smoothed_rssi": self.smoothedRssi,
+                "interval": self.interval, "connectable": self.connectable}
+
+class PresenceRegistry():
+    """! @brief Collection of the \ref DevicePresence records of all seen devices, keyed by the MAC address
+        A device is absent after 'absenceFactor' times its advertising interval without advertisement, but not before
+        'minimumAge' seconds. Without interval estimate 'defaultAge' seconds are used.
+        @param alpha Weight (0.0 ... 1.0) of the latest RSSI and interval within the smoothed values
+        @param absenceFactor Number of missed advertising intervals after which a device is absent
+        @param minimumAge Minimum time in seconds without advertisement after which a device is absent, covering scan pauses and backends reporting changed advertisements only
+        @param defaultAge Time in seconds without advertisement after which a device without interval estimate is absent
+    """
+    def __init__(self, alpha: float = 0.25, absenceFactor: float = 3.0, minimumAge: float = 2.0, defaultAge: float = 10.0):
+        self.alpha = alpha
+        self.absenceFactor = absenceFactor
+        self.minimumAge = minimumAge
+        self.defaultAge = defaultAge
+        self.devices = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, address: str, rssi: Union[float, None] = None, name: Union[str, None] = None, connectable: Union[bool, None] = None,
+                now: Union[float, None] = None) -> DevicePresence:
+        """! @brief Records an advertisement of the device and returns its updated presence
+            @param now Monotonic time of the reception. 'None' for the current time.
+        """
+        key = address.upper()
+        now = time.monotonic() if now is None else now
+        with self.__lock:
+            presence = self.devices.get(key)
+            if presence is None:
+                presence = self.devices[key] = DevicePresence(key, now)
+            elif now > presence.lastSeen:
+                gap = now - presence.lastSeen
+                if presence.interval is None:
+                    presence.interval = gap
+                else:   # A gap of several intervals, e.g. after an absence, moves the estimate by a limited step only
+                    presence.interval = presence.interval + self.alpha * (min(gap, 4.0 * presence.interval) - presence.interval)
+                presence.lastSeen = now
+            presence.count = presence.count + 1
+            if rssi is not None:
+                presence.rssi = rssi
+                presence.smoothedRssi = rssi if presence.smoothedRssi is None else presence.smoothedRssi + self.alpha * (rssi - presence.smoothedRssi)
+            if name is not None:
+                presence.name = name
+            if connectable is not None:
+                presence.connectable = connectable
+            return presence
+
+    def connected(self, address: str, now: Union[float, None] = None) -> DevicePresence:
+        """! @brief Records a connect or disconnect of a client, proving the presence of a device not advertising while connected
+            The advertising interval estimate is not changed.
+            @param now Monotonic time of the connect or disconnect. 'None' for the current time.
+        """
+        key = address.upper()
+        now = time.monotonic() if now is None else now
+        with self.__lock:
+            presence = self.devices.get(key)
+            if presence is None:
+                presence = self.devices[key] = DevicePresence(key, now)
+            presence.lastConnected = now
+            return presence
+
+    def get(self, address: str) -> Union[DevicePresence, None]:
+        """! @brief Returns the presence of the device, 'None' if it has never been seen """
+        return self.devices.get(address.upper())
+
+    def maxAge(self, presence: DevicePresence) -> float:
+        """! @brief Returns the time in seconds without advertisement after which the device is absent """
+        if presence.interval is None:
+            return self.defaultAge
+        return max(self.absenceFactor * presence.interval, self.minimumAge)
+
+    def isReachable(self, address: str, maxAge: Union[float, None] = None, now: Union[float, None] = None) -> bool:
+        """! @brief Returns 'True' if the device advertised connectably or a client connected or disconnected recently
+            @param maxAge Time in seconds without advertisement, connect or disconnect after which the device is absent. 'None' uses \ref maxAge.
+        """
+        return self.reason(address, maxAge, now) is None
+
+    def reason(self, address: str, maxAge: Union[float, None] = None, now: Union[float, None] = None) -> Union[str, None]:
+        """! @brief Returns why the device is not reachable, 'None' if it is reachable (see \ref isReachable) """
+        presence = self.get(address)
+        if presence is None:
+            return "never seen"
+        silence = presence.silence(now)
+        if silence > (self.maxAge(presence) if maxAge is None else maxAge):
+            return "not seen for %.1f s" % silence
+        if presence.connectable is False and (presence.lastConnected is None or presence.lastConnected < presence.lastSeen):
+            return "not connectable"
+        return None
+
+    def reachable(self, maxAge: Union[float, None] = None) -> [DevicePresence]:
+        """! @brief Returns the presences of the reachable devices, the strongest smoothed RSSI first """
+        now = time.monotonic()
+        present = [presence for presence in list(self.devices.values()) if self.reason(presence.address, maxAge, now) is None]
+        return sorted(present, key=lambda presence: -presence.smoothedRssi if presence.smoothedRssi is not None else float("inf"))
+
+    def prune(self, age: float) -> int:
+        """! @brief Removes the devices not seen for 'age' seconds and returns their number """
+        now = time.monotonic()
+        with self.__lock:
+            absent = [address for address, presence in self.devices.items() if presence.silence(now) > age]
+            for address in absent:
+                del self.devices[address]
+        return len(absent)
+
+    def stats(self) -> dict:
+        """! @brief Returns a dictionary of the device addresses and their presence (see \ref DevicePresence.stats) """
+        return {address: presence.stats() for address, presence in list(self.devices.items())}
+
+    def clear(self):
+        """! @brief Removes the presences of all devices """
+        with self.__lock:
+            self.devices.clear()
+
+registry = PresenceRegistry()
+"""! The registry used by all scanners and clients unless given another one """
+
+if __name__ == "__main__":
+    print("Testing PresenceRegistry: absence by advertising interval, connects as presence")
+    presences = PresenceRegistry(minimumAge=0.5)
+    assert presences.reason("54:6C:0E:00:00:01", now=0.0) == "never seen"
+    for now in (0.0, 1.0, 2.0, 3.0):    # Advertising once a second
+        presences.observe("54:6c:0e:00:00:01", rssi=-60, connectable=True, now=now)
+    assert presences.isReachable("54:6C:0E:00:00:01", now=5.0)
+    assert not presences.isReachable("54:6C:0E:00:00:01", now=6.5)   # 3 intervals missed
+    presences.connected("54:6C:0E:00:00:01", now=6.5)                # A connected device stops advertising
+    assert presences.isReachable("54:6C:0E:00:00:01", now=7.0)
+    presences.observe("54:6C:0E:00:00:02", connectable=False, now=0.0)
+    assert presences.reason("54:6C:0E:00:00:02", now=0.1) == "not connectable"
+    presences.connected("54:6C:0E:00:00:02", now=0.2)
+    assert presences.isReachable("54:6C:0E:00:00:02", now=0.3)
+    print("Ready")
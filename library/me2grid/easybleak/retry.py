@@ -0,0 +1,140 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  retry.py
+
+@brief Provides the retry policy of the \ref ExtBleakClient for transient errors
+
+A failed operation is repeated, if its exception is classified as transient by the \ref RetryPolicy. Between the
+attempts the policy waits an exponentially growing, randomly shortened delay. Clients of many devices sharing one
+adapter thus spread their retries instead of reconnecting all at the same time.
+
+@code{.py}
+client.retryPolicy = RetryPolicy(maxAttempts=4, baseDelay=0.5, deadline=10.0)
+model = await client.read(DeviceInformationService.MODEL)
+@endcode
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from typing import Union
+
+class RetryPolicy():
+    """! @brief Decides about repeating a failed operation and the delay before the next attempt
+        The delay before attempt n+1 is 'baseDelay * factor**(n-1)', limited by 'maxDelay' and shortened by a random
+        part of up to 'jitter' (0.0 ... 1.0) of it.
+        @param maxAttempts Maximum number of attempts including the first one. '1' disables retrying.
+        @param baseDelay Delay in seconds before the second attempt
+        @param factor Growth of the delay from attempt to attempt
+        @param maxDelay Upper limit of a single delay in seconds
+        @param jitter Part of the delay randomly omitted
+        @param retryable Tuple of exception classes to be retried
+        @param dbusErrors Tuple of BlueZ D-Bus error names to be retried, if raised as 'BleakDBusError'
+        @param deadline Time in seconds for all attempts of a call. 'None' for no limit.
+        Time-outs are retried for idempotent operations only: a write or request that timed out may have reached the device,
+        so repeating it might execute a command twice. Their callers pass 'idempotent=False' unless the caller declares otherwise.
+    """
+    retryable = (EOFError, asyncio.TimeoutError)    #!> Default exception classes retried
+    dbusErrors = ("org.bluez.Error.InProgress", "org.bluez.Error.NotReady", "org.bluez.Error.Failed",
+                  "org.freedesktop.DBus.Error.NoReply")   #!> Default transient BlueZ errors retried
+    timeouts = (asyncio.TimeoutError,)      #!> Exception classes of time-outs, retried for idempotent operations only
+    dbusTimeouts = ("org.freedesktop.DBus.Error.NoReply",)  #!> BlueZ D-Bus errors of time-outs, retried for idempotent operations only
+
+    def __init__(self, maxAttempts: int = 2, baseDelay: float = 0.25, factor: float = 2.0, maxDelay: float = 5.0,
+                 jitter: float = 0.5, retryable: Union[tuple, None] = None, dbusErrors: Union[tuple, None] = None,
+                 deadline: Union[float, None] = None):
+        self.maxAttempts = maxAttempts
+        self.baseDelay = baseDelay
+        self.factor = factor
+        self.maxDelay = maxDelay
+        self.jitter = jitter
+        if retryable is not None:
+            self.retryable = tuple(retryable)
+        if dbusErrors is not None:
+            self.dbusErrors = tuple(dbusErrors)
+        self.deadline = deadline
+
+    def __str__(self):
+        return "{}(maxAttempts={}, baseDelay={}s, factor={}, maxDelay={}s, jitter={}, deadline={})".format(
+            self.__class__.__name__, self.maxAttempts, self.baseDelay, self.factor, self.maxDelay, self.jitter, self.deadline)
+
+    def isRetryable(self, error: BaseException, idempotent: bool = True) -> bool:
+        """! @brief Returns 'True' if the exception is classified as transient
+            @param idempotent 'False' excludes time-outs, as the failed attempt may have taken effect
+        """
+        if not idempotent and self.isTimeout(error):
+            return False
+        if isinstance(error, self.retryable):
+            return True
+        bleakExceptions = sys.modules.get("bleak.exc")    # Not imported here, as a BleakDBusError requires bleak loaded anyway
+        if bleakExceptions is not None and isinstance(error, bleakExceptions.BleakDBusError):
+            return error.dbus_error in self.dbusErrors
+        return False
+
+    def isTimeout(self, error: BaseException) -> bool:
+        """! @brief Returns 'True' if the exception reports a time-out """
+        if isinstance(error, self.timeouts):
+            return True
+        bleakExceptions = sys.modules.get("bleak.exc")
+        return bleakExceptions is not None and isinstance(error, bleakExceptions.BleakDBusError) and error.dbus_error in self.dbusTimeouts
+
+    def delay(self, attempt: int) -> float:
+        """! @brief Returns the delay in seconds after the failed attempt number 'attempt' (starting with 1) """
+        delay = min(self.baseDelay * self.factor ** (attempt - 1), self.maxDelay)
+        return delay - random.uniform(0.0, self.jitter * delay)
+
+    async def run(self, operation, recover = None, onRetry = None, idempotent: bool = True):
+        """! @brief Executes the operation and repeats it on transient errors
+            @param operation Coroutine function without parameters executing one attempt
+            @param recover Coroutine function without parameters, e.g. reconnecting, called before each repetition. Its transient errors count as failed attempt.
+            @param onRetry Function called with the failed attempt number and its exception before each repetition, e.g. for metrics
+            @param idempotent 'False' for operations which must not be repeated after a time-out, e.g. writes and requests
+            @returns The result of the first successful attempt. The exception of the last attempt is raised on failure.
+        """
+        start = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                if attempt > 1 and recover is not None:
+                    await recover()
+                if self.deadline is None:
+                    return await operation()
+                return await asyncio.wait_for(operation(), max(self.deadline - (time.monotonic() - start), 0.0))
+            except Exception as e:
+                if attempt >= self.maxAttempts or not self.isRetryable(e, idempotent):
+                    raise e
+                delay = self.delay(attempt)
+                if self.deadline is not None and time.monotonic() - start + delay >= self.deadline:
+                    raise e
+                if onRetry is not None:
+                    onRetry(attempt, e)
+            await asyncio.sleep(delay)
+            attempt = attempt + 1
+
+if __name__ == "__main__":
+    print("Testing RetryPolicy: time-outs are retried for idempotent operations only")
+    async def check():
+        policy = RetryPolicy(maxAttempts=3, baseDelay=0.0, jitter=0.0)
+        attempts = []
+        async def timingOut():
+            attempts.append(len(attempts))
+            raise asyncio.TimeoutError()
+        for idempotent, expected in ((True, 3), (False, 1)):
+            attempts.clear()
+            try:
+                await policy.run(timingOut, idempotent=idempotent)
+            except asyncio.TimeoutError:
+                pass
+            assert len(attempts) == expected, f"idempotent={idempotent}: {len(attempts)} attempts instead of {expected}"
+        attempts.clear()
+        async def connectionLost():
+            attempts.append(len(attempts))
+            if len(attempts) < 2:
+                raise EOFError()
+            return "done"
+        assert await policy.run(connectionLost, idempotent=False) == "done" and len(attempts) == 2
+    asyncio.run(check())
+    print("Ready")
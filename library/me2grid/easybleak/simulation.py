@@ -0,0 +1,528 @@
+# /usr/bin/env python3
+# -*- coding: utf-8 (ü) -*-
+"""!
+@file  simulation.py
+
+@brief Provides an in-memory bleak backend simulating BLE peripherals without Bluetooth hardware
+
+A \ref SimulatedPeripheral holds a GATT table of services and characteristics with read, write and notify semantics.
+The radio link of each peripheral is tunable by latency, jitter, loss and silent disconnects. Peripherals are
+registered by their MAC address and served by the \ref SimulatedBleakClient backend, which is passed to the client
+by the 'backend' parameter:
+
+@code{.py}
+peripheral = SimulatedPeripheral("00:00:00:00:00:01", latency=0.02, jitter=0.01)
+service = peripheral.addService(BLE_UUID(0x180a))
+peripheral.addCharacteristic(service, DeviceInformationService.MODEL.uuid, ["read"], b"Simulated")
+register(peripheral)
+
+client = EasyBleakClient("00:00:00:00:00:01", backend=SimulatedBleakClient)
+print(client.read(DeviceInformationService.MODEL))
+@endcode
+
+Profiles of the supported devices are provided by \ref devices.simulated, e.g. 'SimulatedSensorTag' or 'SimulatedValve'.
+
+Several virtual Bluetooth adapters with connection limits are simulated by registering \ref SimulatedAdapter objects
+with \ref addAdapter and passing the adapter name to the client, e.g. 'adapter="hci1"'. The RSSI of a peripheral
+per adapter ('rssi' member) limits the adapters it is reachable from.
+
+Registered peripherals advertise every 'advertisingInterval' seconds to the \ref SimulatedBleakScanner backend, which
+is passed to BleakScanner or \ref EasyBleakScanner by the 'backend' parameter.
+
+- Connecting to a peripheral not registered, not advertising or not connectable fails after the 'timeout' argument of
+  the client (10 s by default), as bleak does. \n
+- Lost reads raise an asyncio.TimeoutError after the latency, lost writes and notifications have no effect. \n
+- A silent disconnect is not noticed by the client. The following operations raise an EOFError until reconnecting,
+  as observed with real devices.
+"""
+
+import asyncio
+import random
+
+from typing import Union
+from uuid import UUID
+
+import bleak
+from bleak.backends.client import BaseBleakClient
+from bleak.backends.scanner import AdvertisementData, BaseBleakScanner
+from bleak.backends.characteristic import BleakGATTCharacteristic
+from bleak.backends.descriptor import BleakGATTDescriptor
+from bleak.backends.service import BleakGATTService, BleakGATTServiceCollection
+
+CLIENT_CHARACTERISTIC_CONFIGURATION = "00002902-0000-1000-8000-00805f9b34fb"
+
+class SimulatedService(BleakGATTService):
+    """! @brief GATT service of a \ref SimulatedPeripheral """
+    def __init__(self, uuid: str, handle: int):
+        super().__init__(None)
+        self.__uuid = str(uuid).lower()
+        self.__handle = handle
+        self.__characteristics = []
+
+    @property
+    def handle(self) -> int:
+        return self.__handle
+
+    @property
+    def uuid(self) -> str:
+        return self.__uuid
+
+    @property
+    def characteristics(self) -> [BleakGATTCharacteristic]:
+        return self.__characteristics
+
+    def add_characteristic(self, characteristic: BleakGATTCharacteristic):
+        self.__characteristics.append(characteristic)
+
+class SimulatedCharacteristic(BleakGATTCharacteristic):
+    """! @brief GATT characteristic of a \ref SimulatedPeripheral, holding its value
+        @param onRead Function(peripheral, characteristic) returning the value to be read instead of 'value'
+        @param onWrite Function(peripheral, characteristic, data) called after a write, e.g. to send a notification response
+    """
+    def __init__(self, service: SimulatedService, uuid: str, handle: int, properties: [str], value: bytes = b"", onRead = None, onWrite = None):
+        super().__init__(None, 20)
+        self.__service = service
+        self.__uuid = str(uuid).lower()
+        self.__handle = handle
+        self.__properties = list(properties)
+        self.__descriptors = []
+        self.value = bytearray(value)
+        self.onRead = onRead
+        self.onWrite = onWrite
+
+    @property
+    def service_uuid(self) -> str:
+        return self.__service.uuid
+
+    @property
+    def service_handle(self) -> int:
+        return self.__service.handle
+
+    @property
+    def handle(self) -> int:
+        return self.__handle
+
+    @property
+    def uuid(self) -> str:
+        return self.__uuid
+
+    @property
+    def properties(self) -> [str]:
+        return self.__properties
+
+    @property
+    def descriptors(self) -> [BleakGATTDescriptor]:
+        return self.__descriptors
+
+    def get_descriptor(self, specifier: Union[int, str, UUID]) -> Union[BleakGATTDescriptor, None]:
+        for descriptor in self.__descriptors:
+            if descriptor.handle == specifier or descriptor.uuid == str(specifier).lower():
+                return descriptor
+        return None
+
+    def add_descriptor(self, descriptor: BleakGATTDescriptor):
+        self.__descriptors.append(descriptor)
+
+class SimulatedDescriptor(BleakGATTDescriptor):
+    """! @brief GATT descriptor of a \ref SimulatedCharacteristic, only used as client characteristic configuration (0x2902) """
+    def __init__(self, characteristic: SimulatedCharacteristic, uuid: str, handle: int):
+        super().__init__(None)
+        self.__characteristic = characteristic
+        self.__uuid = uuid
+        self.__handle = handle
+
+    @property
+    def characteristic_uuid(self) -> str:
+        return self.__characteristic.uuid
+
+    @property
+    def characteristic_handle(self) -> int:
+        return self.__characteristic.handle
+
+    @property
+    def uuid(self) -> str:
+        return self.__uuid
+
+    @property
+    def handle(self) -> int:
+        return self.__handle
+
+class SimulatedPeripheral():
+    """! @brief In-memory BLE peripheral serving a GATT table through a simulated radio link
+        @param address The MAC address the peripheral is registered with
+        @param latency Mean duration in seconds of a read, write or notification transfer
+        @param jitter Maximum deviation in seconds added to or subtracted from the latency
+        @param loss Probability (0.0 ... 1.0) of a lost transfer
+        @param disconnectRate Probability (0.0 ... 1.0) of a silent disconnect at a transfer
+        @param connectTime Duration in seconds of establishing a connection. The service discovery following within connect takes a transfer.
+        @param seed Seed of the random generator for reproducible simulations. 'None' for random behavior.
+        @param rssi Dictionary of adapter names and the RSSI in dBm received there. The peripheral is only reachable from
+        these adapters. 'None' makes it reachable from all adapters.
+        @param name The local name sent within the advertisements
+        @param advertisingInterval Time in seconds between two advertisements (> 0.0)
+    """
+    def __init__(self, address: str, latency: float = 0.0, jitter: float = 0.0, loss: float = 0.0, disconnectRate: float = 0.0, connectTime: float = 0.0, seed: Union[int, None] = None, rssi: Union[dict, None] = None,
+                 name: Union[str, None] = None, advertisingInterval: float = 0.1):
+        self.address = address.upper()
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.disconnectRate = disconnectRate
+        self.connectTime = connectTime
+        self.advertising = True     #!> 'False' simulates a device out of reach
+        self.rssi = rssi            #!> adapter name -> RSSI in dBm, 'None' for a peripheral reachable from all adapters
+        self.name = name
+        self.advertisingInterval = advertisingInterval
+        self.advertisedServices = []    #!> Service UUIDs sent within the advertisements
+        self.connectable = True         #!> 'False' for non-connectable advertisements, e.g. of a beacon
+        self.manufacturerData = {}      #!> company identifier -> bytes sent within the advertisements
+        self.serviceData = {}           #!> service UUID -> bytes sent within the advertisements
+        self.onSubscribe = None     #!> Function(peripheral, characteristic, enabled) called on start and stop of notifications
+        self.random = random.Random(seed)
+        self.services = BleakGATTServiceCollection()
+        self.__handle = 0
+        self.__subscriptions = {}   # characteristic handle -> {client: callback}
+
+    def __nextHandle__(self) -> int:
+        self.__handle = self.__handle + 1
+        return self.__handle
+
+    def addService(self, uuid: str) -> SimulatedService:
+        """! @brief Adds a service or returns the existing service of the UUID """
+        for service in self.services:
+            if service.uuid == str(uuid).lower():
+                return service
+        service = SimulatedService(uuid, self.__nextHandle__())
+        self.services.add_service(service)
+        return service
+
+    def addCharacteristic(self, service: SimulatedService, uuid: str, properties: [str], value: bytes = b"", onRead = None, onWrite = None) -> SimulatedCharacteristic:
+        """! @brief Adds a characteristic to the service, including the client characteristic configuration descriptor of notifying ones
+            @param properties List of GATT properties, e.g. ["read", "write", "notify"]
+            @param value Initial value
+        """
+        self.__nextHandle__()   # handle of the characteristic declaration
+        characteristic = SimulatedCharacteristic(service, uuid, self.__nextHandle__(), properties, value, onRead, onWrite)
+        service.add_characteristic(characteristic)
+        self.services.add_characteristic(characteristic)
+        if "notify" in properties or "indicate" in properties:
+            descriptor = SimulatedDescriptor(characteristic, CLIENT_CHARACTERISTIC_CONFIGURATION, self.__nextHandle__())
+            characteristic.add_descriptor(descriptor)
+            self.services.add_descriptor(descriptor)
+        return characteristic
+
+    def characteristic(self, uuid: Union[str, UUID]) -> SimulatedCharacteristic:
+        """! @brief Returns the characteristic of the UUID """
+        characteristic = self.services.get_characteristic(str(uuid).lower())
+        if characteristic is None:
+            raise bleak.exc.BleakError(f"Characteristic {uuid} not found!")
+        return characteristic
+
+    def isSubscribed(self, characteristic: SimulatedCharacteristic) -> bool:
+        """! @brief Returns 'True' if a client has started notifications of the characteristic """
+        return bool(self.__subscriptions.get(characteristic.handle))
+
+    def notify(self, uuid: Union[str, UUID, SimulatedCharacteristic], data: bytes):
+        """! @brief Sets the value of the characteristic and sends it to all subscribed clients through the simulated link """
+        characteristic = uuid if isinstance(uuid, SimulatedCharacteristic) else self.characteristic(uuid)
+        characteristic.value = bytearray(data)
+        for client, callback in list(self.__subscriptions.get(characteristic.handle, {}).items()):
+            if self.random.random() >= self.loss:
+                client._deliver_(callback, bytearray(data), self.delay())
+
+    def delay(self) -> float:
+        """! @brief Returns the duration of a single transfer, randomly varied by the jitter """
+        return max(self.latency + self.random.uniform(-self.jitter, self.jitter), 0.0)
+
+    def advertisementData(self, rssi: int = -60) -> AdvertisementData:
+        """! @brief Returns the current advertisement of the peripheral as received with the RSSI in dBm """
+        return AdvertisementData(local_name=self.name, manufacturer_data=dict(self.manufacturerData), service_data=dict(self.serviceData),
+                                 service_uuids=list(self.advertisedServices), tx_power=None, rssi=rssi,
+                                 platform_data=(self.address, {"connectable": self.connectable}))
+
+    def _subscribe_(self, client, characteristic: SimulatedCharacteristic, callback):
+        self.__subscriptions.setdefault(characteristic.handle, {})[client] = callback
+        if self.onSubscribe is not None:
+            self.onSubscribe(self, characteristic, True)
+
+    def _unsubscribe_(self, client, characteristic: Union[SimulatedCharacteristic, None] = None):
+        """! @brief \b protected Stops notifications of the client for a characteristic or all characteristics """
+        for handle, callbacks in list(self.__subscriptions.items()):
+            if (characteristic is None or handle == characteristic.handle) and callbacks.pop(client, None) is not None:
+                if self.onSubscribe is not None:
+                    self.onSubscribe(self, self.services.get_characteristic(handle), False)
+
+peripherals = {}
+"""! Registered peripherals by MAC address """
+
+def register(peripheral: SimulatedPeripheral) -> SimulatedPeripheral:
+    """! @brief Makes the peripheral reachable by the \ref SimulatedBleakClient backend """
+    peripherals[peripheral.address] = peripheral
+    return peripheral
+
+def unregister(address: str):
+    """! @brief Removes the peripheral of the MAC address """
+    peripherals.pop(address.upper(), None)
+
+class SimulatedAdapter():
+    """! @brief Virtual Bluetooth adapter (controller) limiting the number of simultaneous connections
+        @param name The adapter name passed to the clients, e.g. 'hci0'
+        @param maxConnections Maximum number of simultaneous connections
+    """
+    def __init__(self, name: str, maxConnections: int = 7):
+        self.name = name
+        self.maxConnections = maxConnections
+        self.powered = True         #!> 'False' simulates a failed adapter refusing connections
+        self.connections = set()    #!> The connected \ref SimulatedBleakClient backends
+
+    def powerOff(self):
+        """! @brief Simulates a failing adapter: connecting fails and connected devices are lost without notice """
+        self.powered = False
+        for client in list(self.connections):
+            client._lose_()
+
+    def powerOn(self):
+        self.powered = True
+
+adapters = {}
+"""! Registered virtual adapters by name. Without registered adapters any adapter name connects without limit. """
+
+def addAdapter(adapter: SimulatedAdapter) -> SimulatedAdapter:
+    """! @brief Makes the virtual adapter usable by the \ref SimulatedBleakClient backend """
+    adapters[adapter.name] = adapter
+    return adapter
+
+def removeAdapter(name: str):
+    """! @brief Removes the virtual adapter of the name """
+    adapters.pop(name, None)
+
+class SimulatedBleakClient(BaseBleakClient):
+    """! @brief bleak backend connecting to a registered \ref SimulatedPeripheral instead of a real device
+        To be passed to BleakClient, ExtBleakClient or EasyBleakClient as 'backend' parameter.
+    """
+    def __init__(self, address_or_ble_device, **kwargs):
+        super().__init__(address_or_ble_device, **kwargs)
+        self.__peripheral = None
+        self.__connected = False
+        self.__lostConnection = False   # silently disconnected, not yet noticed by the client
+        self.__loop = None
+        self.__adapterName = kwargs.get("adapter", "hci0")
+        self.__adapter = None
+
+    @property
+    def mtu_size(self) -> int:
+        return 23
+
+    @property
+    def is_connected(self) -> bool:
+        return self.__connected
+
+    async def connect(self, **kwargs) -> bool:
+        peripheral = peripherals.get(self.address.upper())
+        if peripheral is None or not peripheral.advertising or not peripheral.connectable:
+            await asyncio.sleep(self._timeout)     # As bleak, which scans for the device until the time out
+            raise bleak.exc.BleakError(f"Device with address {self.address} was not found.")
+        adapter = None
+        if adapters:
+            adapter = adapters.get(self.__adapterName)
+            if adapter is None or not adapter.powered:
+                raise bleak.exc.BleakError(f"Adapter {self.__adapterName} not found or not powered.")
+            if peripheral.rssi is not None and self.__adapterName not in peripheral.rssi:
+                raise bleak.exc.BleakError(f"Device with address {self.address} was not found by adapter {self.__adapterName}.")
+            if len(adapter.connections) >= adapter.maxConnections:
+                raise bleak.exc.BleakError(f"Adapter {self.__adapterName} reached its limit of {adapter.maxConnections} connections.")
+            adapter.connections.add(self)
+        await asyncio.sleep(peripheral.connectTime)
+        self.__adapter = adapter
+        self.__peripheral = peripheral
+        self.__loop = asyncio.get_running_loop()
+        self.__connected = True
+        self.__lostConnection = False
+        self.services = peripheral.services
+        try:
+            await self.get_services()   # As bleak, which discovers the services within connect
+        except BaseException:
+            if adapter is not None:
+                adapter.connections.discard(self)
+            self.__adapter = None
+            self.__connected = False
+            raise
+        self._services_resolved = True
+        return True
+
+    async def disconnect(self) -> bool:
+        if self.__peripheral is not None:
+            self.__peripheral._unsubscribe_(self)
+        if self.__adapter is not None:
+            self.__adapter.connections.discard(self)
+            self.__adapter = None
+        connected = self.__connected
+        self.__connected = False
+        self.__lostConnection = False
+        self._services_resolved = False
+        if connected and self._disconnected_callback is not None:
+            self._disconnected_callback(self)   # As bleak on BlueZ, also for requested disconnects
+        return True
+
+    async def pair(self, *args, **kwargs) -> bool:
+        return True
+
+    async def unpair(self) -> bool:
+        return True
+
+    async def get_services(self, **kwargs) -> BleakGATTServiceCollection:
+        await self.__transfer__()
+        return self.services
+
+    def __characteristic__(self, specifier) -> SimulatedCharacteristic:
+        characteristic = specifier if isinstance(specifier, BleakGATTCharacteristic) else self.services.get_characteristic(specifier)
+        if characteristic is None:
+            raise bleak.exc.BleakError(f"Characteristic {specifier} was not found!")
+        return characteristic
+
+    async def __transfer__(self, lossRaises: bool = True, wait: bool = True) -> bool:
+        """! @brief \b private Simulates the link of a single transfer
+            @param wait 'False' returns without waiting for the transfer, e.g. for unacknowledged writes
+            @returns 'False' if the transfer is lost and 'lossRaises' is not set
+        """
+        if not self.__connected:
+            raise bleak.exc.BleakError("Not connected")
+        peripheral = self.__peripheral
+        if not self.__lostConnection and peripheral.random.random() < peripheral.disconnectRate:
+            self._lose_()
+        if self.__lostConnection:
+            raise EOFError()
+        await asyncio.sleep(peripheral.delay() if wait else 0)
+        if peripheral.random.random() < peripheral.loss:
+            if lossRaises:
+                raise asyncio.TimeoutError()
+            return False
+        return True
+
+    async def read_gatt_char(self, char_specifier, **kwargs) -> bytearray:
+        characteristic = self.__characteristic__(char_specifier)
+        if "read" not in characteristic.properties:
+            raise bleak.exc.BleakError(f"Characteristic {characteristic.uuid} is not readable!")
+        await self.__transfer__()
+        if characteristic.onRead is not None:
+            return bytearray(characteristic.onRead(self.__peripheral, characteristic))
+        return bytearray(characteristic.value)
+
+    async def read_gatt_descriptor(self, handle: int, **kwargs) -> bytearray:
+        await self.__transfer__()
+        descriptor = self.services.get_descriptor(handle)
+        if descriptor is None:
+            raise bleak.exc.BleakError(f"Descriptor {handle} was not found!")
+        subscribed = self.__peripheral.isSubscribed(self.services.get_characteristic(descriptor.characteristic_handle))
+        return bytearray(b"\x01\x00" if subscribed else b"\x00\x00")
+
+    async def write_gatt_char(self, char_specifier, data: Union[bytes, bytearray, memoryview], response: bool = False) -> None:
+        characteristic = self.__characteristic__(char_specifier)
+        if "write" not in characteristic.properties and "write-without-response" not in characteristic.properties:
+            raise bleak.exc.BleakError(f"Characteristic {characteristic.uuid} is not writable!")
+        if not response and "write-without-response" in characteristic.properties:
+            # A write command is not acknowledged, the value reaches the peripheral after the transfer without the client waiting
+            if await self.__transfer__(lossRaises=False, wait=False):
+                self.__loop.call_later(self.__peripheral.delay(), self.__written__, self.__peripheral, characteristic, bytearray(data))
+            return
+        if await self.__transfer__(lossRaises=response):
+            self.__written__(self.__peripheral, characteristic, bytearray(data))
+
+    @staticmethod
+    def __written__(peripheral: SimulatedPeripheral, characteristic: SimulatedCharacteristic, data: bytearray):
+        characteristic.value = data
+        if characteristic.onWrite is not None:
+            characteristic.onWrite(peripheral, characteristic, bytearray(data))
+
+    async def write_gatt_descriptor(self, handle: int, data: Union[bytes, bytearray, memoryview]) -> None:
+        await self.__transfer__()
+
+    async def start_notify(self, characteristic: BleakGATTCharacteristic, callback, **kwargs) -> None:
+        if "notify" not in characteristic.properties and "indicate" not in characteristic.properties:
+            raise bleak.exc.BleakError(f"Characteristic {characteristic.uuid} does not support notifications!")
+        await self.__transfer__()
+        self.__peripheral._subscribe_(self, characteristic, callback)
+
+    async def stop_notify(self, char_specifier) -> None:
+        characteristic = self.__characteristic__(char_specifier)
+        await self.__transfer__()
+        self.__peripheral._unsubscribe_(self, characteristic)
+
+    def _lose_(self):
+        """! @brief \b protected Drops the connection without notice to the client """
+        self.__lostConnection = True
+        if self.__peripheral is not None:
+            self.__peripheral._unsubscribe_(self)
+        if self.__adapter is not None:
+            self.__adapter.connections.discard(self)    # The controller frees the connection after the supervision timeout
+
+    def _deliver_(self, callback, data: bytearray, delay: float):
+        """! @brief \b protected Calls the notification callback within the loop of the client after the transfer delay """
+        loop = self.__loop
+        if loop is None or loop.is_closed():
+            return
+        def deliver():
+            if self.__connected and not self.__lostConnection:
+                callback(data)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.call_later(delay, deliver)
+        else:
+            loop.call_soon_threadsafe(loop.call_later, delay, deliver)
+
+class SimulatedBleakScanner(BaseBleakScanner):
+    """! @brief bleak scanner backend receiving the advertisements of the registered \ref SimulatedPeripheral objects
+        To be passed to BleakScanner or EasyBleakScanner as 'backend' parameter. Each peripheral advertises first after a
+        random part of its advertising interval and then periodically. The 'adapter' argument selects the virtual
+        adapter, whose RSSI of the peripheral is reported.
+    """
+    def __init__(self, detection_callback, service_uuids, scanning_mode: str = "active", **kwargs):
+        super().__init__(detection_callback, service_uuids)
+        self.__adapterName = kwargs.get("adapter", "hci0")
+        self.__task = None
+
+    async def start(self):
+        self.seen_devices = {}
+        self.__task = asyncio.ensure_future(self.__advertise__())
+
+    async def stop(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+
+    def set_scanning_filter(self, **kwargs):
+        if "service_uuids" in kwargs:
+            self._service_uuids = [str(uuid).lower() for uuid in kwargs["service_uuids"]]
+
+    async def __advertise__(self):
+        loop = asyncio.get_running_loop()
+        schedule = {}   # address -> loop time of the next advertisement
+        while True:
+            now = loop.time()
+            for address, peripheral in list(peripherals.items()):
+                due = schedule.setdefault(address, now + peripheral.random.uniform(0.0, peripheral.advertisingInterval))
+                if due <= now:
+                    schedule[address] = max(due + peripheral.advertisingInterval, now)
+                    self.__receive__(peripheral)
+            for address in set(schedule) - set(peripherals):
+                del schedule[address]
+            await asyncio.sleep(max(min(schedule.values(), default=now + 0.1) - loop.time(), 0.0))
+
+    def __receive__(self, peripheral: SimulatedPeripheral):
+        """! @brief \b private Passes an advertisement of the peripheral to the callback if the adapter receives it """
+        if not peripheral.advertising:
+            return
+        if adapters:
+            adapter = adapters.get(self.__adapterName)
+            if adapter is None or not adapter.powered or (peripheral.rssi is not None and self.__adapterName not in peripheral.rssi):
+                return
+        rssi = peripheral.rssi.get(self.__adapterName, -60) if peripheral.rssi is not None else -60
+        advertisement = peripheral.advertisementData(rssi)
+        if self._service_uuids and not set(self._service_uuids).intersection(advertisement.service_uuids):
+            return
+        device = self.create_or_update_device(peripheral.address, peripheral.name, None, advertisement)
+        if self._callback is not None:
+            self._callback(device, advertisement)